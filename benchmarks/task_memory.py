@@ -0,0 +1,60 @@
+"""
+Measures the resident memory used by tasks and their strategies.
+
+Usage::
+
+    $ python benchmarks/task_memory.py --tasks 50000
+"""
+
+import gc
+import sys
+import resource
+
+from pathlib import Path
+from argparse import ArgumentParser
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pab.strategy import BaseStrategy  # noqa: E402
+from pab.task import Task  # noqa: E402
+
+
+class NoopStrategy(BaseStrategy):
+    def run(self):
+        pass
+
+
+def rss_bytes() -> int:
+    """Current resident set size. Falls back to peak RSS outside of Linux."""
+    status = Path("/proc/self/status")
+    if status.is_file():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def create_tasks(amount: int) -> list:
+    return [
+        Task(ix, NoopStrategy(None, f"Task {ix}"), Task.RUN_ASAP, {"hours": 1})
+        for ix in range(amount)
+    ]
+
+
+def main(args):
+    p = ArgumentParser(description=__doc__)
+    p.add_argument("-n", "--tasks", type=int, default=50_000, help="Amount of tasks")
+    opts = p.parse_args(args)
+    gc.collect()
+    before = rss_bytes()
+    tasks = create_tasks(opts.tasks)
+    gc.collect()
+    used = rss_bytes() - before
+    per_10k = used / len(tasks) * 10_000
+    print(f"Tasks: {len(tasks)}")
+    print(f"RSS increase: {used / 2 ** 20:.2f} MiB")
+    print(f"RSS per 10k tasks: {per_10k / 2 ** 20:.2f} MiB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,18 +1,30 @@
+from __future__ import annotations
+
 import ssl
 import logging
 import smtplib
 import traceback
 
+from functools import lru_cache
+from typing import TYPE_CHECKING
 from contextlib import contextmanager
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
-from pab.config import Config
+from pab.metrics import ALERTS
+
+if TYPE_CHECKING:
+    from pab.config import Config
 
 APP_CONFIG = None
 
 logger = logging.getLogger("pab.alert")
-SSL_CONTEXT = ssl.create_default_context()
+
+
+@lru_cache(maxsize=None)
+def _ssl_context() -> ssl.SSLContext:
+    # Loading the default certificates is slow, only done when an email is sent
+    return ssl.create_default_context()
 
 
 @contextmanager
@@ -20,12 +32,13 @@ def smtp(config: Config):
     with smtplib.SMTP(
         config.get("emails.host"), port=config.get("emails.port")
     ) as _server:
-        _server.starttls(context=SSL_CONTEXT)
+        _server.starttls(context=_ssl_context())
         _server.login(config.get("emails.user"), config.get("emails.password"))
         yield _server
 
 
 def alert_exception(exception, config: Config):
+    ALERTS.inc(error=type(exception).__name__)
     content = "Error on PyAutoBlockchain:\n\n"
     content += "".join(traceback.format_tb(exception.__traceback__))
     content += f"\n{type(exception).__name__}: {exception}"
@@ -0,0 +1,26 @@
+"""
+Performance benchmarks for PAB, run with `pab bench`.
+
+Benchmarks run against a temporary project connected to an in-process :class:`StubNode`,
+so they don't need a network or a local blockchain.
+"""
+
+from pab.bench.stubnode import StubNode
+from pab.bench.suite import (
+    BENCHMARKS,
+    Benchmark,
+    BenchProject,
+    BenchResult,
+    compare_reports,
+    run_benchmarks,
+)
+
+__all__ = [
+    "BENCHMARKS",
+    "Benchmark",
+    "BenchProject",
+    "BenchResult",
+    "StubNode",
+    "compare_reports",
+    "run_benchmarks",
+]
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+import time
+import logging
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+__all__ = ["StubNode"]
+
+
+_logger = logging.getLogger("pab.bench.stubnode")
+
+
+def _hex(value: int) -> str:
+    return hex(value)
+
+
+class StubNode:
+    """In-process JSON-RPC node that answers the calls PAB makes with canned data.
+
+    It doesn't execute anything: sent transactions are mined instantly in a new block
+    with a successful receipt, and `eth_call` returns a zero word. Each HTTP request
+    waits `latency` seconds before replying, to emulate a remote node.
+    Batch requests are supported."""
+
+    GAS_PRICE = 5 * 10**9
+    GAS_ESTIMATE = 50000
+    BALANCE = 10**18
+
+    def __init__(
+        self, chain_id: int = 1337, latency: float = 0, host: str = "127.0.0.1"
+    ):
+        self.chain_id = chain_id
+        self.latency = latency
+        self.block_number = 1
+        self.requests = 0
+        """ Amount of JSON-RPC requests answered, counting each request in a batch. """
+        self.code: dict[str, str] = {}
+        """ Code returned by `eth_getCode` by lowercase address. Other addresses have no code. """
+        self._nonces: dict[str, int] = {}
+        self._receipts: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._methods: dict[str, Callable[[list], Any]] = {
+            "web3_clientVersion": lambda params: "PABStubNode/1.0",
+            "net_version": lambda params: str(self.chain_id),
+            "eth_chainId": lambda params: _hex(self.chain_id),
+            "eth_blockNumber": lambda params: _hex(self.block_number),
+            "eth_gasPrice": lambda params: _hex(self.GAS_PRICE),
+            "eth_estimateGas": lambda params: _hex(self.GAS_ESTIMATE),
+            "eth_call": lambda params: "0x" + "00" * 32,
+            "eth_getLogs": lambda params: [],
+            "eth_getCode": lambda params: self.code.get(params[0].lower(), "0x"),
+            "eth_getBalance": lambda params: _hex(self.BALANCE),
+            "eth_getTransactionCount": self._get_transaction_count,
+            "eth_sendRawTransaction": self._send_raw_transaction,
+            "eth_getTransactionReceipt": self._get_transaction_receipt,
+            "eth_getBlockByNumber": self._get_block,
+        }
+        self.server = ThreadingHTTPServer((host, 0), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> StubNode:
+        """Starts serving in a daemon thread."""
+        threading.Thread(
+            target=self.server.serve_forever, name="pab-stubnode", daemon=True
+        ).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> StubNode:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def handle(self, request: dict) -> dict:
+        """Returns the JSON-RPC response to a single request."""
+        reply: dict[str, Any] = {"jsonrpc": "2.0", "id": request.get("id")}
+        method = self._methods.get(request.get("method", ""))
+        with self._lock:
+            self.requests += 1
+            if method is None:
+                reply["error"] = {"code": -32601, "message": "Method not found"}
+                return reply
+            reply["result"] = method(request.get("params", []))
+        return reply
+
+    def _get_transaction_count(self, params: list) -> str:
+        return _hex(self._nonces.get(params[0].lower(), 0))
+
+    def _send_raw_transaction(self, params: list) -> str:
+        from eth_account import Account
+        from eth_utils import keccak
+
+        raw = bytes.fromhex(params[0][2:])
+        sender = Account.recover_transaction(raw).lower()
+        txhash = "0x" + keccak(raw).hex()
+        self._nonces[sender] = self._nonces.get(sender, 0) + 1
+        self.block_number += 1
+        self._receipts[txhash] = {
+            "transactionHash": txhash,
+            "transactionIndex": "0x0",
+            "blockHash": "0x" + self.block_number.to_bytes(32, "big").hex(),
+            "blockNumber": _hex(self.block_number),
+            "from": sender,
+            "to": None,
+            "cumulativeGasUsed": _hex(self.GAS_ESTIMATE),
+            "gasUsed": _hex(self.GAS_ESTIMATE),
+            "effectiveGasPrice": _hex(self.GAS_PRICE),
+            "contractAddress": None,
+            "logs": [],
+            "logsBloom": "0x" + "00" * 256,
+            "status": "0x1",
+            "type": "0x0",
+        }
+        return txhash
+
+    def _get_transaction_receipt(self, params: list) -> dict | None:
+        return self._receipts.get(params[0])
+
+    def _get_block(self, params: list) -> dict:
+        number = self.block_number if params[0] == "latest" else int(params[0], 16)
+        return {
+            "number": _hex(number),
+            "hash": "0x" + number.to_bytes(32, "big").hex(),
+            "parentHash": "0x" + max(number - 1, 0).to_bytes(32, "big").hex(),
+            "timestamp": _hex(int(time.time())),
+            "gasLimit": _hex(30_000_000),
+            "gasUsed": "0x0",
+            "baseFeePerGas": _hex(self.GAS_PRICE),
+            "miner": "0x" + "00" * 20,
+            "extraData": "0x",
+            "transactions": [],
+        }
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        node = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                if node.latency:
+                    time.sleep(node.latency)
+                if isinstance(payload, list):
+                    reply: Any = [node.handle(request) for request in payload]
+                else:
+                    reply = node.handle(payload)
+                content = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                _logger.debug(format, *args)
+
+        return _Handler
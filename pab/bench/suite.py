@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import json
+import time
+import logging
+import platform
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Callable
+
+import numpy as np
+
+from pab.bench.stubnode import StubNode
+from pab.blockchain import Blockchain
+from pab.config import ABIS_DIR, CONTRACTS_FILE, CONFIG_FILE, TASKS_FILE, load_configs
+from pab.contract import ContractManager
+from pab.strategy import BaseStrategy
+from pab.task import Task, TaskFileParser, TaskTable
+
+__all__ = [
+    "BENCHMARKS",
+    "Benchmark",
+    "BenchProject",
+    "BenchResult",
+    "compare_reports",
+    "run_benchmarks",
+]
+
+
+class BenchStrategy(BaseStrategy):
+    """Strategy that does nothing, used by synthetic tasks."""
+
+    def __init__(self, *args, pool: int = 0):
+        super().__init__(*args)
+        self.pool = pool
+
+    def run(self):
+        pass
+
+
+POKE_ABI = [
+    {
+        "type": "function",
+        "name": "poke",
+        "inputs": [{"name": "value", "type": "uint256"}],
+        "outputs": [],
+        "stateMutability": "nonpayable",
+    }
+]
+""" ABI of the contract used to build transactions. """
+
+
+def _synthetic_abi(functions: int) -> list[dict]:
+    """Returns an ABI with `functions` functions and as many events."""
+    abi = []
+    for ix in range(functions):
+        inputs = [
+            {"name": "account", "type": "address"},
+            {"name": "amount", "type": "uint256"},
+        ]
+        abi.append(
+            {
+                "type": "function",
+                "name": f"function{ix}",
+                "inputs": inputs,
+                "outputs": [{"name": "", "type": "uint256"}],
+                "stateMutability": "view",
+            }
+        )
+        abi.append(
+            {
+                "type": "event",
+                "name": f"Event{ix}",
+                "inputs": [dict(arg, indexed=False) for arg in inputs],
+                "anonymous": False,
+            }
+        )
+    return abi
+
+
+def _synthetic_task(ix: int) -> dict:
+    task: dict[str, Any] = {
+        "name": f"Task {ix}",
+        "strategy": "BenchStrategy",
+        "params": {"pool": ix},
+        "priority": ix % 3,
+    }
+    if ix % 10 == 0:
+        task["cron"] = "*/5 * * * *"
+    else:
+        task["repeat_every"] = {"minutes": 5 + ix % 55}
+    return task
+
+
+class BenchProject:
+    """Temporary PAB project connected to a :class:`StubNode`, used by the benchmarks."""
+
+    CHAIN_ID = 1337
+    ADDRESS = "0x000000000000000000000000000000000000dEaD"
+
+    def __init__(self, latency: float = 0):
+        self.node = StubNode(self.CHAIN_ID, latency)
+        self.node.code[self.ADDRESS.lower()] = "0x00"
+        self._tmpdir = TemporaryDirectory()
+        self.root = Path(self._tmpdir.name)
+        (self.root / ABIS_DIR).mkdir()
+        (self.root / ABIS_DIR / "poke.abi").write_text(json.dumps(POKE_ABI))
+        self.write_json(
+            CONTRACTS_FILE, {"Poke": {"address": self.ADDRESS, "abifile": "poke.abi"}}
+        )
+        self.write_json(
+            CONFIG_FILE,
+            {"endpoint": self.node.url, "chainId": self.CHAIN_ID, "blockchain": "stub"},
+        )
+        self.node.start()
+        self.blockchain = Blockchain(self.root, load_configs(self.root), {})
+
+    def write_json(self, path: Path | str, data: Any) -> None:
+        (self.root / path).write_text(json.dumps(data))
+
+    def close(self) -> None:
+        self.node.stop()
+        self._tmpdir.cleanup()
+
+    def __enter__(self) -> BenchProject:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@dataclass
+class BenchResult:
+    """Result of a benchmark for one size."""
+
+    name: str
+    size: int
+    seconds: float
+    ops: int
+    """ Amount of operations timed, e.g. tasks loaded or transactions sent """
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ops_per_second(self) -> float:
+        return self.ops / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "size": self.size,
+            "seconds": round(self.seconds, 6),
+            "ops": self.ops,
+            "ops_per_second": round(self.ops_per_second, 3),
+            **self.extra,
+        }
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable[[BenchProject, int], BenchResult]
+    sizes: tuple[int, ...]
+    quick_sizes: tuple[int, ...]
+
+    @property
+    def doc(self) -> str:
+        return " ".join((self.func.__doc__ or "").split())
+
+
+def bench_tasks_load(project: BenchProject, size: int) -> BenchResult:
+    """Loads a synthetic `tasks.json` of `size` tasks with `TaskFileParser.load`."""
+    project.write_json(TASKS_FILE, [_synthetic_task(ix) for ix in range(size)])
+    parser = TaskFileParser(
+        project.root, project.blockchain, {"BenchStrategy": BenchStrategy}
+    )
+    start = time.perf_counter()
+    tasks = parser.load()
+    seconds = time.perf_counter() - start
+    (project.root / TASKS_FILE).unlink()
+    return BenchResult("tasks_load", size, seconds, len(tasks))
+
+
+def bench_scheduler_tick(
+    project: BenchProject, size: int, ticks: int = 100
+) -> BenchResult:
+    """Runs scheduler ticks (`TaskTable.ready` and `TaskTable.reschedule`) over `size`
+    tasks due within the next hour. Each tick advances the clock so about 1% of the tasks
+    is due."""
+    now = time.time()
+    table = TaskTable(
+        Task(ix, None, int(now + ix * 3600 / size), repeat_every={"hours": 1})  # type: ignore
+        for ix in range(size)
+    )
+    due = 0
+    start = time.perf_counter()
+    for tick in range(ticks):
+        now_tick = now + tick * 3600 / ticks
+        rows = table.ready(now_tick)
+        table.last_start[rows] = int(now_tick)
+        table.reschedule(rows, now_tick)
+        due += len(rows)
+    seconds = time.perf_counter() - start
+    return BenchResult("scheduler_tick", size, seconds, ticks, {"due": due})
+
+
+def bench_contracts_startup(
+    project: BenchProject, size: int, functions: int = 100
+) -> BenchResult:
+    """Starts a `ContractManager` with `size` contracts of `functions` functions and events
+    each, and creates every contract once."""
+    root = project.root / f"contracts-{size}"
+    (root / ABIS_DIR).mkdir(parents=True)
+    abi = json.dumps(_synthetic_abi(functions))
+    contracts = {}
+    for ix in range(size):
+        (root / ABIS_DIR / f"c{ix}.abi").write_text(abi)
+        address = "0x" + ix.to_bytes(20, "big").hex()
+        contracts[f"Contract{ix}"] = {"address": address, "abifile": f"c{ix}.abi"}
+    (root / CONTRACTS_FILE).write_text(json.dumps(contracts))
+    start = time.perf_counter()
+    manager = ContractManager(project.blockchain.w3, root)
+    for name in manager.contracts:
+        manager.get(name)
+    seconds = time.perf_counter() - start
+    return BenchResult("contracts_startup", size, seconds, size)
+
+
+def bench_transactions(project: BenchProject, size: int) -> BenchResult:
+    """Builds, signs and sends `size` transactions, waiting for each receipt, with
+    `Blockchain.transact` against the stub node."""
+    from eth_account import Account
+
+    account = Account.create()
+    func = project.blockchain.contracts.get("Poke").functions.poke
+    requests = project.node.requests
+    # Receipts are logged at INFO, keep them out of the timings
+    logger = logging.getLogger("TransactionHandler")
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        start = time.perf_counter()
+        for ix in range(size):
+            project.blockchain.transact(account, func, (ix,))
+        seconds = time.perf_counter() - start
+    finally:
+        logger.setLevel(level)
+    extra = {
+        "latency": project.node.latency,
+        "requests": project.node.requests - requests,
+    }
+    return BenchResult("transactions", size, seconds, size, extra)
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    bench.name: bench
+    for bench in (
+        Benchmark("tasks_load", bench_tasks_load, (10_000, 100_000), (1000,)),
+        Benchmark("scheduler_tick", bench_scheduler_tick, (10_000, 100_000), (1000,)),
+        Benchmark("contracts_startup", bench_contracts_startup, (100, 1000), (10,)),
+        Benchmark("transactions", bench_transactions, (100, 1000), (10,)),
+    )
+}
+""" Available benchmarks by name. """
+
+
+def run_benchmarks(
+    names: list[str] | None = None,
+    quick: bool = False,
+    latency: float = 0,
+    on_result: Callable[[BenchResult], None] | None = None,
+) -> dict[str, Any]:
+    """Runs the benchmarks in `names` (all by default) and returns a report that can be
+    saved as JSON. With `quick`, only small sizes are run. `latency` is the delay in
+    seconds of each request to the stub node."""
+    unknown = set(names or []) - BENCHMARKS.keys()
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    results = []
+    with BenchProject(latency) as project:
+        for name in names or list(BENCHMARKS):
+            bench = BENCHMARKS[name]
+            for size in bench.quick_sizes if quick else bench.sizes:
+                result = bench.func(project, size)
+                results.append(result.to_dict())
+                if on_result is not None:
+                    on_result(result)
+    return {
+        "version": _pab_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "quick": quick,
+        "latency": latency,
+        "results": results,
+    }
+
+
+def compare_reports(old: dict, new: dict) -> list[dict[str, Any]]:
+    """Returns the change in seconds of each benchmark and size present in both reports.
+    A `ratio` above 1 means the new report is slower."""
+    before = {(r["name"], r["size"]): r for r in old["results"]}
+    changes = []
+    for result in new["results"]:
+        prev = before.get((result["name"], result["size"]))
+        if prev is None or not prev["seconds"]:
+            continue
+        changes.append(
+            {
+                "name": result["name"],
+                "size": result["size"],
+                "before": prev["seconds"],
+                "after": result["seconds"],
+                "ratio": round(result["seconds"] / prev["seconds"], 3),
+            }
+        )
+    return changes
+
+
+def _pab_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("PyAutoBlockchain")
+    except PackageNotFoundError:
+        return "unknown"
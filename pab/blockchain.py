@@ -1,19 +1,30 @@
+import time
+import asyncio
+import threading
+
 from pathlib import Path
-from typing import Dict, TYPE_CHECKING, Callable
+from typing import Any, Dict, TYPE_CHECKING, Callable
 
 
-from pab.contract import ContractManager
-from pab.transaction import TransactionHandler
 from pab.config import Config
+from pab.middleware import RPCMonitor, RPCStats
+from pab.tracing import TRACER
 
 if TYPE_CHECKING:
     from web3 import Web3
+    from web3.contract import ContractFunction
     from web3.types import TxReceipt
     from eth_account.signers.local import LocalAccount
+    from pab.contract import ContractData, ContractManager
+    from pab.transaction import TransactionHandler
 
 
 class Blockchain:
-    """Web3 connection manager."""
+    """Web3 connection manager.
+
+    The Web3 connection, contracts and transaction handler are created on first use,
+    so loading a project doesn't touch the network or read the ABIs. Call :meth:`warmup`
+    to set them up and check them against the network in advance."""
 
     def __init__(self, root: Path, config: Config, accounts: Dict[int, "LocalAccount"]):
         self.root = root
@@ -24,28 +35,191 @@ class Blockchain:
         """ Network Chain ID """
         self.name: str = config.get("blockchain")
         """ Network name """
-        self.w3: "Web3" = self._connect_web3()
-        """ Internal Web3 connection"""
+        self.rpc_stats = RPCStats(config.get("rpc.statsWindow"))
+        """ Rolling stats of the JSON-RPC requests sent """
+        self._rpc_monitor = RPCMonitor(
+            self.rpc_stats, config.get("rpc.slowCallThreshold")
+        )
         self.accounts: Dict[int, "LocalAccount"] = accounts
         """ List of loaded accounts """
-        self.contracts: ContractManager = ContractManager(self.w3, root)
-        """ Initialized contract manager """
-        self._txn_handler = TransactionHandler(self.w3, self.id, config)
-        """ Initialized transaction handler"""
+        self.balances: Dict[int, int] = {}
+        """ Balances in wei of :attr:`accounts` by index, loaded by :meth:`warmup` """
+        self._components: Dict[str, Any] = {}
+        self._components_lock = threading.RLock()
+
+    def _lazy(self, name: str, create: Callable[[], Any]) -> Any:
+        """Returns the component `name`, creating it with `create` on first use. Threads
+        that use it at the same time share a single instance."""
+        component = self._components.get(name)
+        if component is None:
+            with self._components_lock:
+                component = self._components.get(name)
+                if component is None:
+                    component = self._components[name] = create()
+        return component
+
+    @property
+    def w3(self) -> "Web3":
+        """Internal Web3 connection"""
+        return self._lazy("w3", self._create_w3)
+
+    @property
+    def contracts(self) -> "ContractManager":
+        """Initialized contract manager"""
+        from pab.contract import ContractManager
+
+        return self._lazy("contracts", lambda: ContractManager(self.w3, self.root))
 
-    def _connect_web3(self):
+    @property
+    def _txn_handler(self) -> "TransactionHandler":
+        """Initialized transaction handler"""
+        from pab.transaction import TransactionHandler
+
+        return self._lazy(
+            "txn_handler", lambda: TransactionHandler(self.w3, self.id, self.config)
+        )
+
+    def _create_w3(self) -> "Web3":
         from web3 import Web3
         from web3.middleware.geth_poa import geth_poa_middleware
 
-        w3 = Web3(Web3.HTTPProvider(self.rpc))
+        w3 = Web3(self._create_provider())
         w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+        w3.middleware_onion.add(self._rpc_monitor.middleware, "pab_rpc")
         return w3
 
+    def _create_provider(self):
+        """Returns the Web3 provider for the configured endpoint, or the cassette provider
+        if `rpc.record` or `rpc.replay` are set."""
+        from pab.providers import (
+            Cassette,
+            RecordingProvider,
+            ReplayProvider,
+            SizedHTTPProvider,
+        )
+
+        if replay := self.config.get("rpc.replay"):
+            return ReplayProvider(Cassette.load(self.root / replay))
+        provider = SizedHTTPProvider(self.rpc)
+        if record := self.config.get("rpc.record"):
+            return RecordingProvider(provider, self.root / record)
+        return provider
+
+    async def warmup(self) -> None:
+        """Creates the lazy components and runs the preflight checks in parallel: the chain ID
+        of the network matches `chainId`, every contract of `contracts.json` has code, and the
+        balances of all accounts are loaded into :attr:`balances`.
+        May raise :exc:`WarmupError` with all the failed checks."""
+        self._txn_handler  # Creates the connection before it's shared by the checks
+        checks = [asyncio.to_thread(self._check_chain_id)]
+        checks += [
+            asyncio.to_thread(self._check_code, contract)
+            for contract in self.contracts.contracts.values()
+        ]
+        checks += [
+            asyncio.to_thread(self._load_balance, ix, account)
+            for ix, account in self.accounts.items()
+        ]
+        results = await asyncio.gather(*checks, return_exceptions=True)
+        errors = [str(result) for result in results if isinstance(result, Exception)]
+        if errors:
+            raise WarmupError(
+                f"Preflight checks failed on {self}:\n" + "\n".join(errors)
+            )
+
+    def _check_chain_id(self) -> None:
+        chain_id = self.w3.eth.chain_id
+        if chain_id != self.id:
+            raise WarmupError(
+                f"Chain ID of '{self.rpc}' is {chain_id}, 'chainId' config is {self.id}"
+            )
+
+    def _check_code(self, contract: "ContractData") -> None:
+        address = self.w3.toChecksumAddress(contract.address)
+        if not self.w3.eth.get_code(address):
+            raise WarmupError(f"Contract '{contract.name}' has no code at {address}")
+
+    def _load_balance(self, ix: int, account: "LocalAccount") -> None:
+        try:
+            self.balances[ix] = self.w3.eth.get_balance(account.address)
+        except Exception as err:
+            raise WarmupError(
+                f"Can't load balance of {account.address}: {err}"
+            ) from err
+
     def transact(
         self, account: "LocalAccount", func: Callable, args: tuple
     ) -> "TxReceipt":
         """Uses internal transaction handler to submit a transaction."""
         return self._txn_handler.transact(account, func, args)
 
+    def network_gas_price(self) -> int:
+        """Returns the current gas price of the network in wei."""
+        return self._txn_handler.network_gas_price()
+
+    def batch_call(
+        self, funcs: list["ContractFunction"], block: int | str = "latest"
+    ) -> list[Any]:
+        """Calls many read-only contract functions at `block` and returns their results in the
+        same order. With HTTP endpoints, all calls are sent in a single JSON-RPC batch request.
+        May raise :exc:`BatchCallError`."""
+        from web3 import HTTPProvider
+
+        if not funcs:
+            return []
+        if not isinstance(self.w3.provider, HTTPProvider):
+            return [func.call(block_identifier=block) for func in funcs]
+        return self._http_batch_call(funcs, block)
+
+    def _http_batch_call(self, funcs: list["ContractFunction"], block: int | str):
+        import requests
+
+        block_id = hex(block) if isinstance(block, int) else block
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": ix,
+                "method": "eth_call",
+                "params": [
+                    {"to": func.address, "data": func._encode_transaction_data()},
+                    block_id,
+                ],
+            }
+            for ix, func in enumerate(funcs)
+        ]
+        url = self.w3.provider.endpoint_uri
+        start = time.perf_counter()
+        response = None
+        try:
+            with TRACER.span("rpc.eth_call(batch)", calls=len(funcs)):
+                response = requests.post(url, json=payload, timeout=30)
+                response.raise_for_status()
+        finally:
+            self._rpc_monitor.record(
+                "eth_call(batch)",
+                time.perf_counter() - start,
+                len(response.content) if response is not None else 0,
+                response is None or not response.ok,
+            )
+        replies = {reply["id"]: reply for reply in response.json()}
+        results = []
+        for ix, func in enumerate(funcs):
+            reply = replies.get(ix, {"error": "Missing reply"})
+            if "error" in reply:
+                raise BatchCallError(f"Call to {func.fn_name} failed: {reply['error']}")
+            types = [output["type"] for output in func.abi["outputs"]]
+            data = bytes.fromhex(reply["result"][2:])
+            decoded = self.w3.codec.decode_abi(types, data)
+            results.append(decoded[0] if len(decoded) == 1 else list(decoded))
+        return results
+
     def __str__(self):
         return f"{self.name}#{self.id}"
+
+
+class BatchCallError(Exception):
+    """Error in a call of :meth:`Blockchain.batch_call`."""
+
+
+class WarmupError(Exception):
+    """Failed preflight check of :meth:`Blockchain.warmup`."""
@@ -1,6 +1,8 @@
 """
 PAB is a framework for developing and running custom tasks in crypto blockchains.
 """
+from __future__ import annotations
+
 import json
 import os
 import sys
@@ -8,16 +10,17 @@ import getpass
 import logging
 
 from pathlib import Path
+from typing import TYPE_CHECKING
 from contextlib import contextmanager
-from argparse import ArgumentParser, RawDescriptionHelpFormatter
+from argparse import ArgumentParser, Namespace, RawDescriptionHelpFormatter
+
+# Subcommands import what they need when they run, so that `pab --help` and light
+# commands don't load web3, numpy and the strategies.
+from pab.config import DATETIME_FORMAT
 
-from pab.core import PAB, TasksRunner, SingleStrategyRunner
-from pab.config import DATETIME_FORMAT, Config
-from pab.strategy import import_strategies
-from pab.utils import print_strats, json_strats
-from pab.alert import alert_exception
-from pab.init import initialize_project as _initialize_project
-from pab.accounts import create_keyfile, KeyfileOverrideException
+if TYPE_CHECKING:
+    from pab.config import Config
+    from pab.jobs import JobQueue
 
 
 def _create_logger():
@@ -39,6 +42,8 @@ def _create_logger():
 
 
 def _create_keyfile(args, extra, logger):
+    from pab.accounts import create_keyfile, KeyfileOverrideException
+
     private_key = getpass.getpass("Enter private key: ")
     password = getpass.getpass("Enter keyfile password: ")
     pass_repeat = getpass.getpass("Repeat keyfile password: ")
@@ -55,15 +60,27 @@ def _create_keyfile(args, extra, logger):
 
 
 def list_strats(args, extra, logger):
-    import_strategies(Path.cwd())
+    from pab.utils import print_strats, json_strats
+
+    if args.imported:
+        from pab.strategy import import_strategies
+
+        import_strategies(Path.cwd())
+        strats = json_strats()
+    else:
+        from pab.strategy_index import StrategyIndex
+
+        strats = StrategyIndex.load(Path.cwd()).json()
     if args.json:
-        json.dump(json_strats(), sys.stdout)
+        json.dump(strats, sys.stdout)
         print()
     else:
-        print_strats(args.verbose)
+        print_strats(args.verbose, strats)
 
 
 def initialize_project(args, extra, logger):
+    from pab.init import initialize_project as _initialize_project
+
     directory = args.directory
     if directory is None:
         directory = Path.cwd()
@@ -78,21 +95,255 @@ def _parse_run_args(args) -> tuple:
 
 
 def run_tasks(args, extra, logger):
+    from pab.core import PAB, TasksRunner
+
     envs, keyfiles = _parse_run_args(args)
+    if args.workers > 1:
+        from pab.config import load_configs
+        from pab.workers import WorkerSupervisor
+
+        supervisor = WorkerSupervisor(Path.cwd(), args.workers, keyfiles, envs)
+        sys.excepthook = exception_handler(logger, load_configs(Path.cwd(), envs))
+        supervisor.run()
+        return
     pab = PAB(Path.cwd(), keyfiles, envs)
-    runner = TasksRunner(pab)
+    runner = TasksRunner(pab, stream=True)
     sys.excepthook = exception_handler(logger, pab.config)
     runner.run()
 
 
+def _raise_parser_error(message: str):
+    """Replaces `ArgumentParser.error` so invalid params fail instead of exiting."""
+    raise ValueError(message)
+
+
 def run_strat(args, extra, logger):
+    from pab.strategy_index import StrategyIndex
+
+    meta = StrategyIndex.load(Path.cwd()).get(args.strategy)
+    params: list[str] | Namespace = extra
+    if meta is not None and meta.typed and not args.params_file:
+        # Parses the parameters before connecting and importing the strategies. If they
+        # are invalid, the parser of the imported strategy reports it, as the index may
+        # not know all its parameters.
+        parser = meta.parser()
+        parser.error = _raise_parser_error  # type: ignore
+        try:
+            params = parser.parse_args(extra)
+        except ValueError:
+            pass
+
+    from pab.core import PAB, SingleStrategyRunner, SweepRunner
+
     envs, keyfiles = _parse_run_args(args)
     pab = PAB(Path.cwd(), keyfiles, envs)
-    runner = SingleStrategyRunner(pab, strategy=args.strategy, params=extra)
+    if meta is not None and isinstance(params, Namespace):
+        strat_class = pab.strategies.get(args.strategy)
+        if strat_class is None or not meta.matches(strat_class):
+            params = extra
+    if args.params_file:
+        runner = SweepRunner(
+            pab,
+            strategy=args.strategy,
+            params_file=Path(args.params_file),
+            jobs=args.jobs,
+            summary=Path(args.summary) if args.summary else None,
+            params=extra,
+            profile=args.profile,
+        )
+    else:
+        runner = SingleStrategyRunner(
+            pab, strategy=args.strategy, params=params, profile=args.profile
+        )
     sys.excepthook = exception_handler(logger, pab.config)
     runner.run()
 
 
+def compile_tasks(args, extra, logger):
+    from pab.task import compile_tasks_file, TasksFileParseError
+
+    output = Path(args.output) if args.output else None
+    try:
+        count = compile_tasks_file(Path.cwd(), output)
+    except TasksFileParseError as err:
+        logger.error(err)
+        sys.exit(1)
+    logger.info(f"Compiled {count} tasks.")
+
+
+def control(args, extra, logger):
+    import urllib.error
+    import urllib.parse
+    import urllib.request
+
+    from pab.config import load_configs
+
+    config = load_configs(Path.cwd())
+    url = f"http://{config.get('control.host')}:{config.get('control.port')}"
+    method, data = "POST", None
+    if args.action in ("list", "stats"):
+        method, path = "GET", "/tasks" if args.action == "list" else "/stats"
+    elif not args.target:
+        logger.error(f"'{args.action}' requires a target")
+        sys.exit(1)
+    elif args.action == "add":
+        path, data = "/tasks", args.target.encode()
+    else:
+        path = f"/tasks/{urllib.parse.quote(args.target)}/{args.action}"
+    request = urllib.request.Request(url + path, data, method=method)
+    try:
+        with urllib.request.urlopen(request) as response:
+            json.dump(json.load(response), sys.stdout, indent=4)
+            print()
+    except urllib.error.HTTPError as err:
+        logger.error(json.load(err).get("error"))
+        sys.exit(1)
+    except urllib.error.URLError as err:
+        logger.error(f"Can't connect to {url}: {err.reason}")
+        sys.exit(1)
+
+
+def _jobs_queue() -> JobQueue:
+    from pab.config import load_configs
+    from pab.jobs import JobQueue
+
+    config = load_configs(Path.cwd())
+    return JobQueue(Path.cwd() / config.get("jobs.database"))
+
+
+def submit_job(args, extra, logger):
+    job_id = _jobs_queue().submit(args.strategy, extra)
+    logger.info(f"Submitted job #{job_id}")
+
+
+def list_jobs(args, extra, logger):
+    jobs = _jobs_queue().list(args.status, args.limit)
+    json.dump([job.__dict__ for job in jobs], sys.stdout, indent=4)
+    print()
+
+
+def show_traces(args, extra, logger):
+    from pab.config import load_configs
+    from pab.tracing import summarize_traces
+
+    path = (
+        Path(args.file)
+        if args.file
+        else Path.cwd() / load_configs(Path.cwd()).get("tracing.file")
+    )
+    if not path.is_file():
+        logger.error(
+            f"Traces file '{path}' not found. Enable the 'tracing.enabled' config to write traces."
+        )
+        sys.exit(1)
+    for task, data in summarize_traces(path).items():
+        print(f"{task}: {data['runs']} runs, {data['mean']:.3f}s mean")
+        for name, seconds in list(data["spans"].items())[: args.limit]:
+            print(f"    {seconds:10.3f}s  {seconds / (data['mean'] or 1):6.1%}  {name}")
+
+
+def show_profile(args, extra, logger):
+    from pab.profiling import PROFILES_DIR, find_profiles, hotspots
+
+    paths = [Path(f) for f in args.files] or find_profiles(
+        Path.cwd() / PROFILES_DIR, args.task
+    )
+    if not paths:
+        logger.error(
+            "No profiles found. Use 'pab run strat --profile' or the 'profile' task field."
+        )
+        sys.exit(1)
+    print(f"{len(paths)} profiles, top {args.limit} functions by {args.sort}:")
+    print(f"{'calls':>10}  {'tottime':>10}  {'cumtime':>10}  function")
+    for spot in hotspots(paths, args.limit, args.sort):
+        print(
+            f"{spot.calls:>10}  {spot.tottime:>10.3f}  {spot.cumtime:>10.3f}  {spot.function}"
+        )
+
+
+def bench(args, extra, logger):
+    from pab.bench import BENCHMARKS, compare_reports, run_benchmarks
+
+    if args.list:
+        for name, benchmark in BENCHMARKS.items():
+            print(f"{name}: {benchmark.doc}")
+        return
+
+    def _print_result(result):
+        print(
+            f"{result.name:<20} {result.size:>8}  {result.seconds:>10.4f}s  {result.ops_per_second:>12.1f} ops/s"
+        )
+
+    try:
+        report = run_benchmarks(args.benchmark, args.quick, args.latency, _print_result)
+    except ValueError as err:
+        logger.error(err)
+        sys.exit(1)
+    with open(args.output, "w") as fp:
+        json.dump(report, fp, indent=4)
+    logger.info(f"Results written to '{args.output}'")
+    if args.compare:
+        with open(args.compare) as fp:
+            previous = json.load(fp)
+        print(f"Compared with '{args.compare}' (version {previous.get('version')}):")
+        for change in compare_reports(previous, report):
+            print(f"{change['name']:<20} {change['size']:>8}  {change['ratio']:>8.3f}x")
+
+
+def _format_timestamp(timestamp: float) -> str:
+    from datetime import datetime
+
+    return datetime.fromtimestamp(timestamp).strftime(DATETIME_FORMAT)
+
+
+def simulate(args, extra, logger):
+    import time
+
+    from datetime import datetime
+
+    from pab.clock import VirtualClock
+    from pab.core import PAB, TasksRunner
+    from pab.simulation import Simulation
+
+    start = (
+        datetime.strptime(args.start, DATETIME_FORMAT).timestamp()
+        if args.start
+        else time.time()
+    )
+    envs = [env.strip() for env in args.envs.split(",") if env.strip() != ""]
+    pab = PAB(Path.cwd(), envs=envs)
+    runner = TasksRunner(pab, stream=True, clock=VirtualClock(start))
+    simulation = Simulation(runner, args.tick, args.reschedule_rate, args.seed)
+    report = simulation.run(args.days * 86400)
+    if args.json:
+        json.dump(report.to_dict(), sys.stdout, indent=4)
+        print()
+        return
+    print(
+        f"Simulated {args.days} days from {_format_timestamp(report.start)} "
+        f"in {report.wall_seconds:.2f}s ({report.runs_per_second:.0f} runs/s)"
+    )
+    print(
+        f"{report.total_runs} runs in {report.iterations} iterations, {report.rescheduled} rescheduled"
+    )
+    print(
+        f"Peak: {report.peak} tasks at {_format_timestamp(report.peak_at)}"
+        if report.peak
+        else "Peak: -"
+    )
+    print(
+        f"Collisions: {report.collisions} iterations with more ready tasks than 'tasks.parallelism' in a lane"
+    )
+    print("Busiest hours:")
+    for hour, runs in report.busiest_hours():
+        print(f"    {_format_timestamp(hour)}  {runs} runs")
+    print("Runs by task:")
+    for name, runs in sorted(report.runs.items(), key=lambda item: -item[1]):
+        print(f"    {runs:>8}  {name}")
+    if report.not_simulated:
+        print(f"Not simulated (triggers): {', '.join(report.not_simulated)}")
+
+
 def parser():
     p = ArgumentParser(
         "pab", description=__doc__, formatter_class=RawDescriptionHelpFormatter
@@ -129,6 +380,13 @@ def parser():
     p_run_tasks = p_run_subparsers.add_parser(
         "tasks", description="Run and schedule all tasks from 'tasks.json'."
     )
+    p_run_tasks.add_argument(
+        "--workers",
+        type=int,
+        help="Amount of worker processes. Tasks are split between workers "
+        "by the hash of their 'shard_key' or name.",
+        default=1,
+    )
     p_run_tasks.set_defaults(func=run_tasks)
 
     p_run_strat = p_run_subparsers.add_parser(
@@ -137,6 +395,29 @@ def parser():
     p_run_strat.add_argument(
         "--strategy", type=str, help="Name of the strategy to run", required=True
     )
+    p_run_strat.add_argument(
+        "--params-file",
+        help="CSV file with one set of strategy parameters per row. "
+        "Runs the strategy once per row. Column names are parameter names.",
+        default=None,
+    )
+    p_run_strat.add_argument(
+        "--jobs",
+        type=int,
+        help="Amount of concurrent runs when using --params-file.",
+        default=1,
+    )
+    p_run_strat.add_argument(
+        "--summary",
+        help="Output file for the results of each run when using --params-file. "
+        "Defaults to '<params-file>.summary.jsonl'.",
+        default=None,
+    )
+    p_run_strat.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run and write the stats to 'profiles/'. See 'pab profile'.",
+    )
     p_run_strat.set_defaults(func=run_strat)
 
     # List Strategies
@@ -149,8 +430,157 @@ def parser():
     p_list_strats.add_argument(
         "-j", "--json", action="store_true", help="Print strategies as JSON"
     )
+    p_list_strats.add_argument(
+        "--import",
+        dest="imported",
+        action="store_true",
+        help="Import the 'strategies' module instead of reading the strategies from its source. "
+        "Needed for strategies created dynamically.",
+    )
     p_list_strats.set_defaults(func=list_strats)
 
+    # Tasks
+    p_tasks = subparsers.add_parser("tasks", help="Manage the tasks file")
+    p_tasks_subparsers = p_tasks.add_subparsers(help="subcommands for pab tasks")
+    p_tasks_compile = p_tasks_subparsers.add_parser(
+        "compile",
+        description="Validate 'tasks.json' and compile it to 'tasks.ndjson' for faster loading. "
+        "'tasks.ndjson' is used instead of 'tasks.json' while it's up to date.",
+    )
+    p_tasks_compile.add_argument(
+        "-o", "--output", action="store", help="Output file.", default=None
+    )
+    p_tasks_compile.set_defaults(func=compile_tasks)
+
+    # Control
+    p_control = subparsers.add_parser(
+        "control",
+        help="Control a running 'pab run tasks' through its control API (see 'control.enabled' config).",
+    )
+    p_control.add_argument(
+        "action",
+        choices=["list", "stats", "run", "pause", "resume", "add"],
+        help="'run', 'pause' and 'resume' receive a task name. "
+        "'add' receives a one-shot task as JSON.",
+    )
+    p_control.add_argument("target", nargs="?", help="Task name or task JSON.")
+    p_control.set_defaults(func=control)
+
+    # Jobs
+    p_jobs = subparsers.add_parser(
+        "jobs", help="Submit and list one-shot jobs (see 'jobs.enabled' config)."
+    )
+    p_jobs_subparsers = p_jobs.add_subparsers(help="subcommands for pab jobs")
+    p_jobs_submit = p_jobs_subparsers.add_parser(
+        "submit",
+        description="Submit a strategy run to the jobs database. Strategy parameters "
+        "are passed as in 'pab run strat'.",
+    )
+    p_jobs_submit.add_argument(
+        "--strategy", type=str, help="Name of the strategy to run", required=True
+    )
+    p_jobs_submit.set_defaults(func=submit_job)
+    p_jobs_list = p_jobs_subparsers.add_parser("list", description="List latest jobs.")
+    p_jobs_list.add_argument(
+        "-s", "--status", choices=["pending", "running", "done", "failed"], default=None
+    )
+    p_jobs_list.add_argument("-n", "--limit", type=int, default=100)
+    p_jobs_list.set_defaults(func=list_jobs)
+
+    # Traces
+    p_traces = subparsers.add_parser(
+        "traces",
+        help="Summarize where tasks spend their time, from the spans written with 'tracing.enabled'.",
+    )
+    p_traces.add_argument(
+        "-f",
+        "--file",
+        help="Traces file. Defaults to the 'tracing.file' config.",
+        default=None,
+    )
+    p_traces.add_argument(
+        "-n", "--limit", type=int, help="Amount of spans to show per task.", default=10
+    )
+    p_traces.set_defaults(func=show_traces)
+
+    # Profile
+    p_profile = subparsers.add_parser(
+        "profile", help="Show the functions where profiled runs spent the most time."
+    )
+    p_profile.add_argument(
+        "files", nargs="*", help="Profiles to merge. Defaults to all in 'profiles/'."
+    )
+    p_profile.add_argument(
+        "-t", "--task", help="Only profiles of this task or strategy."
+    )
+    p_profile.add_argument(
+        "-s", "--sort", choices=["tottime", "cumtime"], default="tottime"
+    )
+    p_profile.add_argument("-n", "--limit", type=int, default=20)
+    p_profile.set_defaults(func=show_profile)
+
+    # Bench
+    p_bench = subparsers.add_parser(
+        "bench",
+        help="Run performance benchmarks against an in-process stub node.",
+    )
+    p_bench.add_argument(
+        "-b",
+        "--benchmark",
+        action="append",
+        help="Benchmark to run, can be repeated. Defaults to all. See --list.",
+        default=None,
+    )
+    p_bench.add_argument(
+        "--list", action="store_true", help="List benchmarks and exit."
+    )
+    p_bench.add_argument("--quick", action="store_true", help="Only run small sizes.")
+    p_bench.add_argument(
+        "--latency",
+        type=float,
+        help="Seconds the stub node waits before each reply.",
+        default=0.0,
+    )
+    p_bench.add_argument(
+        "-o", "--output", help="JSON file for the results.", default="bench.json"
+    )
+    p_bench.add_argument(
+        "--compare", help="Previous results file to compare with.", default=None
+    )
+    p_bench.set_defaults(func=bench)
+
+    # Simulate
+    p_simulate = subparsers.add_parser(
+        "simulate",
+        help="Simulate the schedule of 'tasks.json' with a virtual clock and stubbed strategies.",
+    )
+    p_simulate.add_argument("--days", type=float, help="Days to simulate.", default=30)
+    p_simulate.add_argument(
+        "--start",
+        help=f"Start of the simulation, as '{DATETIME_FORMAT.replace('%', '%%')}'. Defaults to now.",
+        default=None,
+    )
+    p_simulate.add_argument(
+        "--tick",
+        type=float,
+        help="Seconds between scheduler iterations. Defaults to the runner's.",
+        default=None,
+    )
+    p_simulate.add_argument(
+        "--reschedule-rate",
+        type=float,
+        help="Probability of each run raising RescheduleError.",
+        default=0.0,
+    )
+    p_simulate.add_argument("--seed", type=int, help="Random seed.", default=None)
+    p_simulate.add_argument(
+        "-e", "--envs", help="List of environments separated by commas.", default=""
+    )
+    p_simulate.add_argument(
+        "--json", action="store_true", help="Print the report as JSON."
+    )
+    p_simulate.set_defaults(func=simulate)
+
     # Create Keyfile
     p_createkf = subparsers.add_parser(
         "create-keyfile",
@@ -180,6 +610,8 @@ def _catch_ctrlc():
 
 
 def exception_handler(logger, config: Config):
+    from pab.alert import alert_exception
+
     def _handle_exceptions(exc_type, exc_value, exc_traceback):
         if issubclass(exc_type, KeyboardInterrupt):
             sys.__excepthook__(exc_type, exc_value, exc_traceback)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+
+from abc import ABC, abstractmethod
+
+__all__ = ["Clock", "SystemClock", "VirtualClock", "SYSTEM_CLOCK"]
+
+
+class Clock(ABC):
+    """Source of the current time for the scheduler. Tasks and runners read the time
+    from a clock instead of the system, so schedules can be simulated."""
+
+    @abstractmethod
+    def time(self) -> float:
+        """Returns the current time as a timestamp."""
+
+
+class SystemClock(Clock):
+    """Clock that reads the system time."""
+
+    def time(self) -> float:
+        return time.time()
+
+
+class VirtualClock(Clock):
+    """Clock that only moves when told to."""
+
+    def __init__(self, start: float):
+        self.now: float = start
+        """ Current virtual time. """
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        """Moves the clock `seconds` forward."""
+        self.now += seconds
+
+
+SYSTEM_CLOCK = SystemClock()
+""" Default clock of tasks and runners. """
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+import operator
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from pab.blockchain import Blockchain
+
+__all__ = ["Condition", "ConditionError", "evaluate_conditions"]
+
+
+OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+""" Comparison operators available for conditions. """
+
+
+@dataclass(frozen=True)
+class Condition:
+    """Read-only contract call compared against a value, as declared in `tasks.json`::
+
+    {"contract": "MasterChef", "function": "pendingCake", "args": [0, "0x..."], "op": ">", "value": 1000}
+
+    `contract` must be defined in `contracts.json`."""
+
+    contract: str
+    function: str
+    op: str
+    value: Any
+    args: tuple = field(default_factory=tuple)
+
+    @classmethod
+    def from_data(cls, data: Any) -> Condition:
+        """Creates a condition from its raw data. May raise :exc:`ConditionError`."""
+        if not isinstance(data, dict):
+            raise ConditionError("Condition must be a dict")
+        missing = {"contract", "function", "op", "value"} - data.keys()
+        if missing:
+            raise ConditionError(f"Condition is missing: {', '.join(sorted(missing))}")
+        if data["op"] not in OPERATORS:
+            ops = ", ".join(OPERATORS)
+            raise ConditionError(f"Condition 'op' must be one of: {ops}")
+        if not isinstance(data.get("args", []), list):
+            raise ConditionError("Condition 'args' must be a list")
+        return cls(
+            data["contract"],
+            data["function"],
+            data["op"],
+            data["value"],
+            tuple(data.get("args", [])),
+        )
+
+    def validate(self, blockchain: Blockchain) -> None:
+        """Checks that the contract and function read by the condition are declared in
+        `contracts.json` and the contract ABI. May raise :exc:`ConditionError`."""
+        contract = blockchain.contracts.contracts.get(self.contract)
+        if contract is None:
+            raise ConditionError(f"Contract '{self.contract}' not found")
+        for abi in json.loads(contract.abi):
+            if abi.get("type") == "function" and abi.get("name") == self.function:
+                return
+        raise ConditionError(
+            f"Function '{self.function}' not found in '{self.contract}'"
+        )
+
+    @property
+    def call_key(self) -> str:
+        """Identifies the contract call, conditions with the same key read the same value."""
+        return json.dumps([self.contract, self.function, self.args])
+
+    def call(self, blockchain: Blockchain) -> Any:
+        """Returns the bound contract function of this condition."""
+        contract = blockchain.contracts.get(self.contract)
+        return contract.get_function_by_name(self.function)(*self.args)
+
+    def check(self, result: Any) -> bool:
+        """Compares the result of the call with :attr:`value`."""
+        return OPERATORS[self.op](result, self.value)
+
+
+def evaluate_conditions(
+    blockchain: Blockchain, conditions: list[Condition], block: int | str = "latest"
+) -> list[bool]:
+    """Evaluates `conditions` at `block` and returns the results in the same order.
+    All calls are read with a single :meth:`pab.blockchain.Blockchain.batch_call`,
+    and conditions with the same call are only read once."""
+    calls = {cond.call_key: cond for cond in conditions}
+    values = blockchain.batch_call([c.call(blockchain) for c in calls.values()], block)
+    results = dict(zip(calls, values))
+    return [cond.check(results[cond.call_key]) for cond in conditions]
+
+
+class ConditionError(ValueError):
+    """Invalid condition."""
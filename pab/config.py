@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 from pathlib import Path
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
-from projectutils.config import Config, JSONSource, ENVSource, ConfigSchema
+if TYPE_CHECKING:
+    from projectutils.config import Config, ConfigSchema
 
 
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
@@ -13,13 +16,36 @@ DEFAULTS_SCHEMA_FILE = RESOURCES_DIR / "config.schema.json"
 ABIS_DIR = Path("abis")
 CONFIG_FILE = Path("config.json")
 TASKS_FILE = Path("tasks.json")
+TASKS_NDJSON_FILE = Path("tasks.ndjson")
 CONTRACTS_FILE = Path("contracts.json")
+STRATEGY_INDEX_FILE = Path(".strategies.index.json")
 
 ENV_VARS_PREFIX = "PAB_CONF_"
 
-SCHEMA = ConfigSchema.from_json_file(DEFAULTS_SCHEMA_FILE)
 
+@lru_cache(maxsize=None)
+def get_schema() -> ConfigSchema:
+    """Returns the config schema, parsed from :data:`DEFAULTS_SCHEMA_FILE` on first use."""
+    from projectutils.config import ConfigSchema
+
+    return ConfigSchema.from_json_file(DEFAULTS_SCHEMA_FILE)
+
+
+def __getattr__(name: str) -> Any:
+    # `SCHEMA` and `Config` are loaded on first access, importing this module stays cheap
+    if name == "SCHEMA":
+        return get_schema()
+    if name == "Config":
+        from projectutils.config import Config
+
+        return Config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def load_configs(root: Path, envs: list[str] | None = None) -> Config:
+    from projectutils.config import Config, JSONSource, ENVSource
 
-def load_configs(root: Path, envs: list[str] | None = None):
     jsoncfg = root / CONFIG_FILE
-    return Config(SCHEMA, [JSONSource(jsoncfg), ENVSource(ENV_VARS_PREFIX, root, envs)])
+    return Config(
+        get_schema(), [JSONSource(jsoncfg), ENVSource(ENV_VARS_PREFIX, root, envs)]
+    )
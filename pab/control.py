@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import re
+import json
+import logging
+import threading
+
+from typing import TYPE_CHECKING, Any, Callable
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+if TYPE_CHECKING:
+    from pab.core import TasksRunner
+
+from pab.task import Task, TaskLoadError, TasksFileParseError
+
+__all__ = ["ControlServer", "ControlError", "task_info"]
+
+
+_logger = logging.getLogger("pab.control")
+
+
+def task_info(task: Task) -> dict:
+    """Returns a JSON serializable summary of a task."""
+    return {
+        "id": task.id,
+        "name": task.strategy.name,
+        "strategy": task.strategy.__class__.__name__,
+        "next_at": task.next_at,
+        "last_start": task.last_start,
+        "repeats": task.repeats(),
+        "paused": task.paused,
+        "priority": task.priority,
+        "lane": task.lane,
+    }
+
+
+class ControlServer:
+    """Local HTTP server to inspect and control a running :class:`pab.core.TasksRunner`.
+
+    Endpoints:
+
+        * ``GET /tasks``: List tasks with their schedule.
+        * ``GET /stats``: Runner stats.
+        * ``POST /tasks``: Add a one-shot task. Body is a task as defined in `tasks.json`.
+        * ``POST /tasks/<name>/run``: Run a task as soon as possible.
+        * ``POST /tasks/<name>/pause``: Pause a task.
+        * ``POST /tasks/<name>/resume``: Resume a paused task.
+
+    Changes are applied by the runner between task executions."""
+
+    def __init__(self, runner: TasksRunner, host: str, port: int):
+        self.runner = runner
+        self.server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """Host and port the server is listening on."""
+        return self.server.server_address[:2]
+
+    def start(self) -> None:
+        """Starts serving requests in a daemon thread."""
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="pab-control", daemon=True
+        )
+        self._thread.start()
+        _logger.info("Control server listening on %s:%s", *self.address)
+
+    def stop(self) -> None:
+        """Stops the server."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, method: str, path: str, body: Any) -> tuple[int, Any]:
+        """Routes a request and returns a status code and a JSON serializable response."""
+        for route_method, pattern, func in self._routes():
+            match = re.fullmatch(pattern, path.rstrip("/"))
+            if match and route_method == method:
+                try:
+                    return func(body, *match.groups())
+                except ControlError as err:
+                    return err.status, {"error": str(err)}
+        return 404, {"error": f"Unknown endpoint {method} {path}"}
+
+    def _routes(self) -> list[tuple[str, str, Callable]]:
+        return [
+            ("GET", r"/tasks", self._list_tasks),
+            ("GET", r"/stats", self._stats),
+            ("POST", r"/tasks", self._add_task),
+            ("POST", r"/tasks/([^/]+)/run", self._run_task),
+            ("POST", r"/tasks/([^/]+)/pause", self._pause_task),
+            ("POST", r"/tasks/([^/]+)/resume", self._resume_task),
+        ]
+
+    def _list_tasks(self, body: Any) -> tuple[int, Any]:
+        return 200, [task_info(task) for task in list(self.runner.tasks)]
+
+    def _stats(self, body: Any) -> tuple[int, Any]:
+        return 200, self.runner.stats()
+
+    def _add_task(self, body: Any) -> tuple[int, Any]:
+        try:
+            task = self.runner.add_task(body)
+        except (TasksFileParseError, TaskLoadError) as err:
+            raise ControlError(str(err), 400)
+        return 202, task_info(task)
+
+    def _run_task(self, body: Any, name: str) -> tuple[int, Any]:
+        task = self._find(name)
+        self.runner.call_soon(lambda: task.schedule_for(Task.RUN_ASAP))
+        return 202, {"name": task.strategy.name}
+
+    def _pause_task(self, body: Any, name: str) -> tuple[int, Any]:
+        task = self._find(name)
+        self.runner.call_soon(lambda: setattr(task, "paused", True))
+        return 202, {"name": task.strategy.name}
+
+    def _resume_task(self, body: Any, name: str) -> tuple[int, Any]:
+        task = self._find(name)
+        self.runner.call_soon(lambda: setattr(task, "paused", False))
+        return 202, {"name": task.strategy.name}
+
+    def _find(self, name: str) -> Task:
+        task = self.runner.find_task(unquote(name))
+        if task is None:
+            raise ControlError(f"Task '{unquote(name)}' not found", 404)
+        return task
+
+
+def _handler_for(control: ControlServer) -> type[BaseHTTPRequestHandler]:
+    """Creates a request handler class bound to `control`."""
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self._respond(*control.handle("GET", self.path, None))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length)) if length else None
+            except json.JSONDecodeError:
+                return self._respond(400, {"error": "Body must be JSON"})
+            self._respond(*control.handle("POST", self.path, body))
+
+        def _respond(self, status: int, data: Any):
+            content = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            _logger.debug(format, *args)
+
+    return _Handler
+
+
+class ControlError(Exception):
+    """Error while handling a control request."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
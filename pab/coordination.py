@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import os
+import time
+import socket
+import sqlite3
+import logging
+import threading
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from contextlib import closing, contextmanager
+from typing import Iterable, Iterator
+
+from pab.config import Config
+
+__all__ = [
+    "LeaseBackend",
+    "SQLiteLeaseBackend",
+    "Coordinator",
+    "CoordinationError",
+    "create_coordinator",
+]
+
+
+_logger = logging.getLogger("pab.coordination")
+
+
+class LeaseBackend(ABC):
+    """Storage for time-bounded leases shared by many nodes.
+
+    A lease gives exclusive ownership of a key to a node until it expires.
+    Backends must make :meth:`acquire` atomic."""
+
+    @abstractmethod
+    def acquire(self, keys: Iterable[str], owner: str, ttl: float) -> set[str]:
+        """Acquires or renews the leases of `keys` for `owner` for `ttl` seconds.
+        Keys leased by other owners are only acquired if their lease expired, and each
+        owner holds at most its fair share of `keys` between the live owners.
+        Returns the keys leased by `owner` after the operation."""
+        ...
+
+    @abstractmethod
+    def release(self, keys: Iterable[str], owner: str) -> None:
+        """Releases the leases of `keys` held by `owner`."""
+        ...
+
+    def leave(self, owner: str) -> None:
+        """Stops counting `owner` as a live owner, so others can take its share."""
+        pass
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """Leases stored in a SQLite database. To coordinate many hosts the database must
+    be on shared storage. Expiration times use the clock of each node, so `ttl` must
+    be larger than the clock difference between nodes.
+
+    Each call to :meth:`acquire` is also a heartbeat of the owner, valid for `ttl`.
+    Owners holding more than their share release the excess, so keys are split between
+    all live owners after a renewal of each."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS leases (
+        key TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS owners (
+        owner TEXT PRIMARY KEY,
+        expires_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+        """ Database file. """
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Opens a connection in autocommit mode. Connections are not shared between threads."""
+        with closing(
+            sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        ) as conn:
+            yield conn
+
+    def acquire(self, keys: Iterable[str], owner: str, ttl: float) -> set[str]:
+        keys = set(keys)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT INTO owners (owner, expires_at) VALUES (?, ?) "
+                    "ON CONFLICT(owner) DO UPDATE SET expires_at = excluded.expires_at",
+                    (owner, now + ttl),
+                )
+                (live,) = conn.execute(
+                    "SELECT COUNT(*) FROM owners WHERE expires_at > ? OR owner = ?",
+                    (now, owner),
+                ).fetchone()
+                share = -(-len(keys) // live)
+                leased = conn.execute(
+                    "SELECT key, owner FROM leases WHERE expires_at > ?", (now,)
+                ).fetchall()
+                held = sorted(key for key, by in leased if by == owner and key in keys)
+                taken = {key for key, _ in leased}
+                free = sorted(keys - taken)[: max(share - len(held), 0)]
+                conn.executemany(
+                    "DELETE FROM leases WHERE key = ? AND owner = ?",
+                    [(key, owner) for key in held[share:]],
+                )
+                conn.executemany(
+                    "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET "
+                    "owner = excluded.owner, expires_at = excluded.expires_at "
+                    "WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                    [(key, owner, now + ttl, now) for key in held[:share] + free],
+                )
+                rows = conn.execute(
+                    "SELECT key FROM leases WHERE owner = ? AND expires_at > ?",
+                    (owner, now),
+                ).fetchall()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return {row[0] for row in rows} & keys
+
+    def release(self, keys: Iterable[str], owner: str) -> None:
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM leases WHERE key = ? AND owner = ?",
+                [(key, owner) for key in keys],
+            )
+
+    def leave(self, owner: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM owners WHERE owner = ?", (owner,))
+
+
+class Coordinator:
+    """Keeps the leases of a set of keys for this node.
+
+    Nodes running the same tasks call :meth:`set_keys` with the same keys. Each key is leased
+    by a single node, which renews it every third of `ttl` from a background thread. Keys are
+    split between the live nodes, and leases of nodes that stop are taken over by other
+    nodes once they expire."""
+
+    def __init__(self, backend: LeaseBackend, node_id: str, ttl: float):
+        self.backend = backend
+        self.node_id = node_id
+        self.ttl = ttl
+        self._keys: set[str] = set()
+        self._owned: set[str] = set()
+        self._valid_until: float = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def set_keys(self, keys: Iterable[str]) -> None:
+        """Sets the keys to lease. Thread-safe."""
+        with self._lock:
+            self._keys = set(keys)
+
+    def owns(self, key: str) -> bool:
+        """Returns True if this node holds a valid lease on `key`."""
+        return key in self._owned and time.time() < self._valid_until
+
+    def renew(self) -> set[str]:
+        """Acquires and renews leases and returns the keys owned by this node.
+        Leases of keys no longer set are released."""
+        start = time.time()
+        with self._lock:
+            keys = set(self._keys)
+        released = self._owned - keys
+        if released:
+            self.backend.release(released, self.node_id)
+        owned = self.backend.acquire(keys, self.node_id, self.ttl)
+        if gained := len(owned - self._owned):
+            _logger.info(f"Acquired {gained} leases ({len(owned)}/{len(keys)} owned)")
+        if lost := len(self._owned - owned - released):
+            _logger.warning(f"Lost {lost} leases ({len(owned)}/{len(keys)} owned)")
+        self._owned, self._valid_until = owned, start + self.ttl
+        return owned
+
+    def start(self) -> None:
+        """Renews leases every third of :attr:`ttl` in a daemon thread."""
+        thread = threading.Thread(target=self._loop, name="pab-leases", daemon=True)
+        thread.start()
+
+    def stop(self) -> None:
+        """Stops renewing and releases all leases."""
+        self._stop.set()
+        self.backend.release(self._owned, self.node_id)
+        self.backend.leave(self.node_id)
+        self._owned = set()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                self.renew()
+            except Exception as err:
+                # Leases expire locally too, so tasks stop running if errors persist
+                _logger.error(f"Error renewing leases: {err}")
+
+
+BACKENDS: dict[str, type[LeaseBackend]] = {"sqlite": SQLiteLeaseBackend}
+""" Lease backends by name, as used in the `coordination.backend` config. """
+
+
+def create_coordinator(root: Path, config: Config) -> Coordinator:
+    """Creates a :class:`Coordinator` from the `coordination.*` configs.
+    May raise :exc:`CoordinationError`."""
+    name = config.get("coordination.backend")
+    if name not in BACKENDS:
+        raise CoordinationError(f"Unknown coordination backend '{name}'")
+    backend = BACKENDS[name](root / config.get("coordination.database"))
+    node_id = config.get("coordination.nodeId")
+    if not node_id:
+        node_id = f"{socket.gethostname()}-{os.getpid()}"
+    return Coordinator(backend, node_id, config.get("coordination.leaseTtl"))
+
+
+class CoordinationError(Exception):
+    """Error in the coordination configuration."""
@@ -2,22 +2,52 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 
+import csv
+import json
 import time
+import heapq
+import asyncio
+import queue
 import logging
 import argparse
+import threading
 
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
 from inspect import signature, Parameter
 from pathlib import Path
 from types import MappingProxyType
-from typing import Any, Callable
+from typing import Any, Callable, Iterator, TextIO
 
 from pab.accounts import load_accounts
 
 from pab.blockchain import Blockchain
 from pab.config import load_configs
 from pab.strategy import BaseStrategy, load_strategies
+from pab.strategy_index import PARAM_TYPES
 from pab.alert import alert_exception
-from pab.task import Task, TaskFileParser, TaskList
+from pab.control import ControlServer
+from pab.metrics import REGISTRY, MetricsServer
+from pab.tracing import configure_tracing
+from pab.profiling import PROFILES_DIR, profile
+from pab.clock import SYSTEM_CLOCK, Clock
+from pab.coordination import Coordinator, create_coordinator
+from pab.graph import TaskGraph
+from pab.triggers import ChainWatcher
+from pab.conditions import evaluate_conditions
+from pab.jobs import Job, JobPoller, JobQueue
+from pab.task import (
+    Task,
+    TaskFileParser,
+    TaskList,
+    TaskLoadError,
+    TaskTable,
+    TasksFileParseError,
+    task_digest,
+    task_shard,
+    task_shard_key,
+)
 
 
 class PAB:
@@ -33,6 +63,7 @@ class PAB:
         self.logger = logging.getLogger(self.__class__.__name__)
         self.root = root
         self.config = load_configs(root, envs)
+        configure_tracing(root, self.config)
         self.strategies = load_strategies(root)
         self.accounts = load_accounts(keyfiles or [])
         self.blockchain = Blockchain(self.root, self.config, self.accounts)
@@ -59,34 +90,596 @@ class TasksRunner(Runner):
 
     # TODO: Move to config
     ITERATION_SLEEP = 60
+    LOAD_BATCH_SIZE = 100
+    """ Tasks read from the tasks file between calls to :meth:`process_tasks` while streaming. """
 
-    def __init__(self, *args):
+    def __init__(
+        self,
+        *args,
+        stream: bool = False,
+        shard: tuple[int, int] | None = None,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
+        """If `stream` is True tasks are not loaded until :meth:`run` is called, which
+        starts processing them while the rest of the tasks file is being read.
+        If `shard` is given as ``(index, count)``, only tasks assigned to that shard
+        by :func:`pab.task.task_shard` are loaded. Schedules are evaluated with `clock`.
+        """
         super().__init__(*args)
-        self.tasks: TaskList | list = TaskFileParser(
-            self.pab.root, self.pab.blockchain, self.pab.strategies
-        ).load()
+        self.clock: Clock = clock
+        """ Source of the current time for schedules. """
+        self.shard: tuple[int, int] | None = shard
+        """ Shard index and amount of shards, when running as a worker. """
+        self.watch: bool = self.pab.config.get("tasks.watch")
+        """ If True, tasks are reloaded when the tasks file changes. """
+        self.parallelism: int = max(self.pab.config.get("tasks.parallelism"), 1)
+        """ Amount of tasks of each lane that can run at the same time. """
+        self.table: TaskTable = TaskTable()
+        """ Schedule state of all tasks. Rebuilt when :attr:`tasks` is set. """
+        self.tasks = TaskList([])
+        self.graph: TaskGraph = TaskGraph({})
+        """ Dependencies between tasks. """
+        self._parser = TaskFileParser(
+            self.pab.root, self.pab.blockchain, self.pab.strategies, clock
+        )
+        self._digests: dict[str, str] = {}
+        self._lease_keys: dict[str, str] = {}
+        self._after: dict[str, list[str]] = {}
+        self._shard_keys: dict[str, str] = {}
+        self._lanes: dict[str, ThreadPoolExecutor] = {}
+        self._queued: dict[str, list[tuple[int, int, float, Task]]] = {}
+        """ Tasks waiting for a free slot in each lane, as heaps by priority. """
+        self._running: dict[Future, Task] = {}
+        """ Tasks running in the lanes, by their future. """
+        self._in_flight: set[Task] = set()
+        """ Tasks queued or running. They are not dispatched again until they finish. """
+        self._finished_while_loading: list[Task] = []
+        self._order: int = 0
+        self._deferred: dict[str, float] = {}
+        self._runtime: set[str] = set()
+        """ Names of the tasks added with :meth:`add_task`. They are kept on reloads. """
+        self.watcher: ChainWatcher | None = None
+        """ Fires the triggers of tasks. Created by :meth:`run`. """
+        self.coordinator: Coordinator | None = None
+        """ Leases of tasks shared with other nodes. Only set if `coordination.enabled`. """
+        if self.pab.config.get("coordination.enabled"):
+            self.coordinator = create_coordinator(self.pab.root, self.pab.config)
+        self._file_stamp: tuple = self._tasks_file_stamp()
+        self._loader: Iterator[dict] | None = self._parser.iter_raw()
+        self._commands: queue.SimpleQueue[Callable[[], Any]] = queue.SimpleQueue()
+        self._wakeup = threading.Event()
+        self.started_at: float = time.time()
+        self.iterations: int = 0
+        """ Amount of finished iterations. """
+        self.processed: int = 0
+        """ Amount of processed tasks. """
+        self.missed_deadlines: int = 0
+        """ Amount of tasks that started after their deadline. """
+        self._processed_lock = threading.Lock()
+        if not stream:
+            self.load_tasks()
+
+    @property
+    def tasks(self) -> TaskList | list:
+        """Loaded tasks."""
+        return self._tasks
+
+    @tasks.setter
+    def tasks(self, tasks: TaskList | list) -> None:
+        self._tasks = tasks
+        self._loader = None
+        self._by_name = {task.strategy.name: task for task in tasks}
+        self.table = TaskTable(tasks)
+
+    def load_tasks(self, process: bool = False):
+        """Loads pending tasks from the tasks file into :attr:`table`. If `process` is True,
+        :meth:`process_tasks` runs after each :attr:`LOAD_BATCH_SIZE` tasks, so ready tasks
+        start while the rest of the file is being read. Tasks that depend on the tasks that
+        finished meanwhile are dispatched once the whole file is loaded."""
+        if self._loader is None:
+            return
+        for ix, data in enumerate(self._loader):
+            if process and ix and ix % self.LOAD_BATCH_SIZE == 0:
+                self.process_tasks()
+            # Dependencies are checked for the whole file, even with shards
+            self._after[data["name"]] = data.get("after", [])
+            self._shard_keys[data["name"]] = task_shard_key(data)
+            if not self._in_shard(data):
+                continue
+            task = self._parser.create_task(ix, data)
+            self._digests[data["name"]] = task_digest(data)
+            self._lease_keys[data["name"]] = task_shard_key(data)
+            self._tasks.append(task)
+            self._by_name[data["name"]] = task
+            self.table.add(task)
+        self._loader = None
+        self.graph = self._create_graph(self._after, self._shard_keys)
+        self.logger.info(f"Loaded {len(self._tasks)} tasks.")
+        finished, self._finished_while_loading = self._finished_while_loading, []
+        if finished:
+            downstream = [t for task in finished for t in self._downstream_of(task)]
+            self._dispatch(self._gate(downstream, self.clock.time()))
+
+    def reload_tasks(self):
+        """Reloads the tasks file and applies the differences by task name.
+        New and changed tasks are created, removed tasks are dropped, and unchanged
+        tasks are kept with their strategy and schedule. Tasks added with :meth:`add_task`
+        are kept, unless the file now declares a task with the same name. If the new file
+        can't be loaded, the error is logged and current tasks are kept."""
+        current = {task.strategy.name: task for task in self._tasks}
+        tasks, digests, lease_keys, after, shard_keys = [], {}, {}, {}, {}
+        added = changed = 0
+        try:
+            for ix, data in enumerate(self._parser.iter_raw()):
+                after[data["name"]] = data.get("after", [])
+                shard_keys[data["name"]] = task_shard_key(data)
+                if not self._in_shard(data):
+                    continue
+                name, digest = data["name"], task_digest(data)
+                task = current.get(name)
+                if task is None or self._digests.get(name) != digest:
+                    added += task is None
+                    changed += task is not None
+                    task = self._parser.create_task(ix, data)
+                task.id = ix
+                tasks.append(task)
+                digests[name] = digest
+                lease_keys[name] = task_shard_key(data)
+            graph = self._create_graph(after, shard_keys)
+        except (TasksFileParseError, TaskLoadError) as err:
+            self.logger.error(f"Tasks not reloaded: {err}")
+            return
+        for name in sorted(self._runtime & digests.keys()):
+            self.logger.warning(
+                f"Task '{name}' added at runtime replaced by the tasks file."
+            )
+        self._runtime -= digests.keys()
+        tasks += [current[name] for name in sorted(self._runtime) if name in current]
+        removed = len(current.keys() - digests.keys() - self._runtime)
+        self.tasks = TaskList(tasks)
+        self._prune_state()
+        self._digests = digests
+        self._lease_keys = lease_keys
+        self._after, self._shard_keys, self.graph = after, shard_keys, graph
+        self._update_triggers()
+        if self.coordinator is not None:
+            self.coordinator.set_keys(lease_keys.values())
+        self.logger.info(
+            f"Tasks reloaded: {added} added, {changed} changed, {removed} removed."
+        )
+
+    def _create_graph(
+        self, after: dict[str, list[str]], keys: dict[str, str]
+    ) -> TaskGraph:
+        """Returns the dependency graph of the tasks file. When tasks are split between
+        workers or nodes, dependent tasks must share a `shard_key` to run in the same one.
+        May raise :exc:`TasksFileParseError`."""
+        split = self.shard is not None or self.coordinator is not None
+        return TaskGraph(after, keys if split else None)
+
+    def _prune_state(self):
+        """Drops the gas price deferrals and queued runs of tasks that are no longer loaded,
+        and shuts down the executors of lanes without tasks."""
+        loaded = set(self._tasks)
+        names = {task.strategy.name for task in self._tasks}
+        self._deferred = {k: v for k, v in self._deferred.items() if k in names}
+        for lane, heap in self._queued.items():
+            dropped = [entry[-1] for entry in heap if entry[-1] not in loaded]
+            if dropped:
+                self._in_flight.difference_update(dropped)
+                heap[:] = [entry for entry in heap if entry[-1] in loaded]
+                heapq.heapify(heap)
+        # Running tasks finish in their lanes
+        used = {task.lane for task in [*self._tasks, *self._running.values()]}
+        for lane in self._lanes.keys() - used:
+            self._lanes.pop(lane).shutdown(wait=False)
+            self._queued.pop(lane, None)
+
+    def _update_triggers(self):
+        """Sends the triggers of current tasks to :attr:`watcher` and starts it if needed."""
+        if self.watcher is None:
+            return
+        triggers = {
+            task.strategy.name: task.trigger
+            for task in self._tasks
+            if task.trigger is not None
+        }
+        self.watcher.set_triggers(triggers)
+        if triggers:
+            self.watcher.start()
+
+    def _fire(self, names: list[str]):
+        """Schedules tasks whose triggers fired to run as soon as possible."""
+        for name in names:
+            task = self.find_task(name)
+            if task is not None and not task.paused and self._owns(task):
+                task.schedule_for(Task.RUN_ASAP)
+
+    def _in_shard(self, data: dict) -> bool:
+        """Returns True if the task belongs to the shard of this runner."""
+        return self.shard is None or task_shard(data, self.shard[1]) == self.shard[0]
+
+    def _owns(self, task: Task) -> bool:
+        """Returns True if this node can run `task`. Without coordination, and for tasks
+        added at runtime, it's always True."""
+        key = self._lease_keys.get(task.strategy.name)
+        return self.coordinator is None or key is None or self.coordinator.owns(key)
+
+    def find_task(self, name: str) -> Task | None:
+        """Returns a task by name."""
+        return self._by_name.get(name)
+
+    def add_task(self, data: dict) -> Task:
+        """Creates a task from `data` (same format as in the tasks file) and queues it to be
+        added to the runner. Tasks added this way are not saved to the tasks file.
+        Thread-safe. May raise :exc:`TasksFileParseError` or :exc:`TaskLoadError`."""
+        self._parser._validate_task(data)
+        if self.find_task(data["name"]) is not None:
+            raise TasksFileParseError(f"Duplicated task name '{data['name']}'")
+        if data.get("after"):
+            raise TasksFileParseError("Tasks added at runtime can't declare 'after'")
+        task = self._parser.create_task(len(self._tasks), data)
+
+        def _add():
+            if self.find_task(data["name"]) is None:
+                self._runtime.add(data["name"])
+                self._tasks.append(task)
+                self._by_name[data["name"]] = task
+                self.table.add(task)
+                if task.trigger is not None:
+                    self._update_triggers()
+
+        self.call_soon(_add)
+        return task
+
+    def call_soon(self, func: Callable[[], Any]):
+        """Queues `func` to be called by the runner between task executions and wakes
+        the runner up. Thread-safe."""
+        self._commands.put(func)
+        self._wakeup.set()
+
+    def stats(self) -> dict:
+        """Returns runner stats."""
+        size = len(self.table)
+        paused = (self.table.flags[:size] & TaskTable.FLAG_PAUSED) != 0
+        return {
+            "uptime": time.time() - self.started_at,
+            "iterations": self.iterations,
+            "processed": self.processed,
+            "tasks": size,
+            "ready": len(self.table.ready(self.clock.time())),
+            "paused": int(paused.sum()),
+            "missed_deadlines": self.missed_deadlines,
+            "rpc": self.pab.blockchain.rpc_stats.summary(),
+        }
+
+    def _run_commands(self):
+        """Runs all functions queued with :meth:`call_soon`."""
+        while True:
+            try:
+                func = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            func()
+
+    def _tasks_file_stamp(self) -> tuple:
+        """Returns the path, modification time and size of the current tasks file."""
+        path = self._parser.tasks_file()
+        if not path.is_file():
+            return (path, 0, 0)
+        stat = path.stat()
+        return (path, stat.st_mtime_ns, stat.st_size)
+
+    def _reload_if_changed(self):
+        """Calls :meth:`reload_tasks` if the tasks file changed since last checked."""
+        stamp = self._tasks_file_stamp()
+        if stamp != self._file_stamp:
+            self._file_stamp = stamp
+            self.reload_tasks()
 
     def run(self):
+        if self.pab.config.get("rpc.warmup"):
+            asyncio.run(self.pab.blockchain.warmup())
+        if self.pab.config.get("control.enabled"):
+            # Each worker listens on its own port
+            offset = self.shard[0] if self.shard else 0
+            ControlServer(
+                self,
+                self.pab.config.get("control.host"),
+                self.pab.config.get("control.port") + offset,
+            ).start()
+        if self.pab.config.get("jobs.enabled"):
+            self._start_jobs_poller()
+        if self.pab.config.get("metrics.enabled"):
+            offset = self.shard[0] if self.shard else 0
+            MetricsServer(
+                REGISTRY,
+                self.pab.config.get("metrics.host"),
+                self.pab.config.get("metrics.port") + offset,
+            ).start()
+        # Leases are taken for the whole tasks file, so tasks of coordinated nodes
+        # are processed once they are all loaded
+        self.load_tasks(process=self.coordinator is None)
+        self.watcher = ChainWatcher(
+            self.pab.blockchain,
+            lambda names: self.call_soon(lambda: self._fire(names)),
+            self.pab.config.get("triggers.pollInterval"),
+        )
+        self._update_triggers()
+        if self.coordinator is not None:
+            self.coordinator.set_keys(self._lease_keys.values())
+            self.coordinator.renew()
+            self.coordinator.start()
         while True:
+            self._wakeup.clear()
+            self._run_commands()
+            if self.watch:
+                self._reload_if_changed()
             self.process_tasks()
+            self.iterations += 1
             self.logger.debug("Tasks iteration finished.")
             self._sleep()
 
     def process_tasks(self):
-        for item in self.tasks:
-            self.process_item(item)
-
-    def process_item(self, item: Task):
+        """Dispatches all ready tasks to their lanes by priority, where up to :attr:`parallelism`
+        run at the same time per lane. Doesn't wait for them: tasks that finished since the
+        last call are collected, and the tasks that depend on them dispatched, by the next
+        call. Use :meth:`join` to wait for them."""
+        self._dispatch([])
+        now = self.clock.time()
+        ready, skipped = [], []
+        for row in self.table.ready(now):
+            item = self.table.tasks[row]
+            if item in self._in_flight:
+                continue
+            (ready if self._owns(item) else skipped).append(item)
+        # Tasks run by other nodes are checked again next iteration, so this node
+        # runs them soon after it takes over their leases.
+        self._delay(skipped, now)
+        self._dispatch(self._gate(ready, now))
+
+    def _gate(self, items: list[Task], now: float) -> list[Task]:
+        """Returns the tasks of `items` that can run now. Root tasks and the tasks that
+        depend on them go through the same checks."""
+        items = self._defer_by_gas_price(items, now)
+        return self._check_guards(items, now)
+
+    def _defer_by_gas_price(self, items: list[Task], now: float) -> list[Task]:
+        """Returns the tasks of `items` that can run at the current network gas price.
+        Tasks with a `max_gas_price` below it are held, and stay ready, until the price
+        drops or they have been held for `max_defer` seconds. The gas price is read once.
+        """
+        limited = [task for task in items if task.max_gas_price is not None]
+        if not limited:
+            return items
         try:
-            item.process()
+            price = self.pab.blockchain.network_gas_price()
+        except Exception as err:
+            self.logger.warning(f"Can't read gas price, tasks won't be deferred: {err}")
+            return items
+        held = []
+        for task in limited:
+            if price <= task.max_gas_price:
+                continue
+            since = self._deferred.setdefault(task.strategy.name, now)
+            if task.max_defer is not None and now - since >= task.max_defer:
+                task.logger.warning(
+                    f"{task} deferred for {now - since:.0f}s, running at gas price {price}"
+                )
+                continue
+            held.append(task)
+        if held:
+            self.logger.info(
+                f"Deferred {len(held)} tasks, gas price {price} is above their limit."
+            )
+        held_ids = {id(task) for task in held}
+        run = [task for task in items if id(task) not in held_ids]
+        for task in run:
+            self._deferred.pop(task.strategy.name, None)
+        return run
+
+    def _check_guards(self, items: list[Task], now: float) -> list[Task]:
+        """Returns the tasks of `items` whose conditions and :meth:`BaseStrategy.should_run`
+        pass. The conditions of all tasks are read in a single batch. Tasks that don't
+        pass wait for the next iteration to be checked again. If conditions can't be read,
+        the tasks with conditions wait too."""
+        checks = [(task, cond) for task in items for cond in task.conditions]
+        results = [True] * len(checks)
+        if checks:
+            try:
+                conditions = [cond for _, cond in checks]
+                results = evaluate_conditions(self.pab.blockchain, conditions)
+            except Exception as err:
+                self.logger.warning(f"Can't read task conditions: {err}")
+                results = [False] * len(checks)
+        failed = {id(task) for (task, _), ok in zip(checks, results) if not ok}
+        run, skipped = [], []
+        for task in items:
+            if id(task) in failed or not self._should_run(task):
+                skipped.append(task)
+            else:
+                run.append(task)
+        if skipped:
+            self.logger.info(f"Delayed {len(skipped)} tasks by their conditions.")
+            self._delay(skipped, now)
+        return run
+
+    def _should_run(self, task: Task) -> bool:
+        """Calls :meth:`BaseStrategy.should_run`. Errors are logged and the task runs."""
+        try:
+            return task.strategy.should_run()
+        except Exception as err:
+            task.logger.warning(f"Error in should_run of {task}: {err}")
+            return True
+
+    def _delay(self, items: list[Task], now: float):
+        """Pushes `items` back by one iteration without running them. Their schedule
+        is kept otherwise, so tasks that don't repeat are not disabled."""
+        if not items:
+            return
+        rows = [item._row for item in items]
+        self.table.next_at[rows] = int(now + self.ITERATION_SLEEP)
+
+    def _dispatch(self, items: list[Task]):
+        """Queues `items` in their lanes and starts queued tasks while their lanes have free
+        slots, without waiting for them. Each lane starts its tasks by priority, and busy
+        lanes don't delay other lanes. Tasks that finished are collected and the tasks that
+        depend on them queued, if they pass :meth:`_gate`. Tasks held by it stay ready for
+        the next :meth:`process_tasks`. If a task failed, the first error is raised."""
+        self._queue(items)
+        errors: list[BaseException] = []
+        while True:
+            self._start_queued()
+            done = [future for future in self._running if future.done()]
+            if not done:
+                break
+            for future in done:
+                item = self._running.pop(future)
+                self._in_flight.discard(item)
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                elif self._loader is not None and future.result():
+                    # Dependencies are known once the whole tasks file is loaded
+                    self._finished_while_loading.append(item)
+                elif future.result():
+                    downstream = self._downstream_of(item)
+                    self._queue(self._gate(downstream, self.clock.time()))
+        if errors:
+            raise errors[0]
+
+    def _queue(self, items: list[Task]):
+        """Queues `items` in the heaps of their lanes."""
+        now = self.clock.time()
+        for task in items:
+            if task in self._in_flight:
+                continue
+            due = task.next_at if task.next_at > 0 else now
+            entry = (-task.priority, self._order, due, task)
+            heapq.heappush(self._queued.setdefault(task.lane, []), entry)
+            self._in_flight.add(task)
+            self._order += 1
+
+    def _start_queued(self):
+        """Submits queued tasks to the executors of their lanes, up to the free slots of each lane."""
+        busy = Counter(task.lane for task in self._running.values())
+        for lane, heap in self._queued.items():
+            while heap and busy[lane] < self.parallelism:
+                _, _, due, item = heapq.heappop(heap)
+                if item.paused:
+                    self._in_flight.discard(item)
+                    continue
+                future = self._lane(lane).submit(self._start, item, due)
+                self._running[future] = item
+                busy[lane] += 1
+                # Wakes the runner up to collect the task and start the next ones
+                future.add_done_callback(lambda _: self._wakeup.set())
+
+    def join(self):
+        """Waits until all dispatched tasks, and the tasks that depend on them, finished.
+        If a task failed, the first error is raised."""
+        while self._running:
+            wait(list(self._running), return_when=FIRST_COMPLETED)
+            self._dispatch([])
+
+    def _lane(self, name: str) -> ThreadPoolExecutor:
+        """Returns the executor of a lane, creating it on first use."""
+        if name not in self._lanes:
+            self._lanes[name] = ThreadPoolExecutor(
+                self.parallelism, thread_name_prefix=f"pab-{name}"
+            )
+        return self._lanes[name]
+
+    def _start(self, item: Task, due: float) -> bool:
+        """Reports `item` if it missed its deadline and processes it."""
+        late = self.clock.time() - due
+        if item.deadline is not None and late > item.deadline:
+            with self._processed_lock:
+                self.missed_deadlines += 1
+            item.logger.warning(
+                f"{item} missed its deadline: started {late:.1f}s after it was due "
+                f"(deadline: {item.deadline}s)"
+            )
+        return self.process_item(item)
+
+    def _downstream_of(self, item: Task) -> list[Task]:
+        """Returns the tasks that can run now that `item` finished, scheduled to run ASAP."""
+        ready = []
+        for name in self.graph.complete(item.strategy.name):
+            task = self.find_task(name)
+            if task is not None and not task.paused and self._owns(task):
+                task.schedule_for(Task.RUN_ASAP)
+                ready.append(task)
+        return ready
+
+    def process_item(self, item: Task) -> bool:
+        """Processes a task. Returns True if its strategy ran until the end."""
+        try:
+            finished = item.process()
+            with self._processed_lock:
+                self.processed += 1
+            return finished
         except Exception as err:
             self.logger.exception(err)
             alert_exception(err, self.pab.config)
             raise err
 
+    def run_job(self, jobs: JobQueue, job: Job):
+        """Runs a job the same way as `pab run strat` and stores the result in `jobs`.
+        Warnings and errors logged by the job are stored with the error of failed jobs.
+        Failed jobs are recorded but don't stop the runner."""
+        self.logger.info(f"Running job #{job.id} ({job.strategy})")
+        output = _ThreadLogHandler()
+        logging.getLogger().addHandler(output)
+        try:
+            runner = SingleStrategyRunner(
+                self.pab, strategy=job.strategy, params=job.params, exit_on_error=False
+            )
+            runner.run()
+        except Exception as err:
+            failure: Exception | None = err
+        else:
+            failure = None
+        finally:
+            logging.getLogger().removeHandler(output)
+        if failure is None:
+            jobs.finish(job.id)
+            self.logger.info(f"Done with job #{job.id}")
+            return
+        error = f"{type(failure).__name__}: {failure}"
+        self.logger.error(f"Job #{job.id} failed: {error}", exc_info=failure)
+        jobs.finish(job.id, "\n".join([*output.lines, error]))
+
+    def _start_jobs_poller(self):
+        """Starts consuming jobs from the jobs database in background threads.
+        Jobs run as soon as they are claimed, at the same time as tasks."""
+        jobs = JobQueue(self.pab.root / self.pab.config.get("jobs.database"))
+        # With many workers, interrupted jobs are handled by the supervisor
+        if self.shard is None and (interrupted := jobs.fail_interrupted()):
+            self.logger.warning(f"{interrupted} interrupted jobs marked as failed.")
+        JobPoller(
+            jobs,
+            lambda job: self.run_job(jobs, job),
+            self.pab.config.get("jobs.pollInterval"),
+        ).start()
+
     def _sleep(self):
+        """Sleeps for :attr:`ITERATION_SLEEP` seconds or until woken up by :meth:`call_soon`."""
         self.logger.debug(f"Sleeping for {self.ITERATION_SLEEP} seconds.")
-        time.sleep(self.ITERATION_SLEEP)
+        self._wakeup.wait(self.ITERATION_SLEEP)
+
+
+class _ThreadLogHandler(logging.Handler):
+    """Collects the warnings and errors logged from the thread that created it."""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.lines: list[str] = []
+        thread = threading.get_ident()
+        self.addFilter(lambda record: record.thread == thread)
+        self.setFormatter(logging.Formatter("%(name)s: %(message)s"))
+
+    def emit(self, record: logging.LogRecord):
+        self.lines.append(self.format(record))
 
 
 @dataclass(frozen=True, eq=True)
@@ -96,29 +689,10 @@ class StratParam:
     default: Any = field(hash=False)
 
 
-class SingleStrategyRunner(Runner):
-    """Runs a single strategy, one time, with custom parameters."""
+class StrategyParamsMixin:
+    """Builds argument parsers for strategy parameters from their constructor signatures."""
 
-    TYPES = {"str": str, "int": int, "float": float}
-
-    def __init__(self, *args, strategy: str, params: list[str]):
-        super().__init__(*args)
-        self._rawparams = params
-        strat_class = self.pab.strategies[strategy]
-        if not strat_class:
-            raise RuntimeError(f"Strategy '{strategy}' not found.")
-        self._base_params: list[str] = self._get_base_params()
-        self.params: argparse.Namespace = self._parse_params(strat_class)
-        self.strat = strat_class(
-            self.pab.blockchain, strat_class.__name__, **self.params.__dict__
-        )
-
-    def run(self):
-        self.strat.run()
-
-    def _parse_params(self, strat_class: type[BaseStrategy]) -> argparse.Namespace:
-        parser = self._get_strat_parser(strat_class)
-        return parser.parse_args(self._rawparams)
+    TYPES = PARAM_TYPES
 
     def _get_strat_parser(
         self, strat_class: type[BaseStrategy]
@@ -139,6 +713,11 @@ class SingleStrategyRunner(Runner):
                 )
         return parser
 
+    @staticmethod
+    def _raise_params_error(message: str):
+        """Replaces `ArgumentParser.error` so invalid params fail instead of exiting."""
+        raise ValueError(message)
+
     def _validate_and_get_param_type(self, param: StratParam) -> Callable:
         if callable(param.type):
             return param.type
@@ -171,3 +750,138 @@ class SingleStrategyRunner(Runner):
         """Returns the names of the base parameters of :class:`BaseStrategy`."""
         params = signature(BaseStrategy).parameters
         return [p.name for p in params.values()]
+
+
+class SingleStrategyRunner(StrategyParamsMixin, Runner):
+    """Runs a single strategy, one time, with custom parameters."""
+
+    def __init__(
+        self,
+        *args,
+        strategy: str,
+        params: list[str] | argparse.Namespace,
+        profile: bool = False,
+        exit_on_error: bool = True,
+    ):
+        """`params` are given as in `pab run strat`, or already parsed as a Namespace.
+        If `profile` is True, the run is profiled and the stats written to `profiles/`.
+        If `exit_on_error` is False, invalid params raise :exc:`ValueError` instead of
+        exiting."""
+        super().__init__(*args)
+        self._rawparams = params
+        self.profile: bool = profile
+        self.exit_on_error: bool = exit_on_error
+        strat_class = self.pab.strategies.get(strategy)
+        if not strat_class:
+            raise RuntimeError(f"Strategy '{strategy}' not found.")
+        self._base_params: list[str] = self._get_base_params()
+        self.params: argparse.Namespace = (
+            params
+            if isinstance(params, argparse.Namespace)
+            else self._parse_params(strat_class)
+        )
+        self.strat = strat_class(
+            self.pab.blockchain, strat_class.__name__, **self.params.__dict__
+        )
+
+    def run(self):
+        if not self.profile:
+            self.strat.run()
+            return
+        with profile(self.pab.root / PROFILES_DIR, self.strat.name):
+            self.strat.run()
+
+    def _parse_params(self, strat_class: type[BaseStrategy]) -> argparse.Namespace:
+        parser = self._get_strat_parser(strat_class)
+        if not self.exit_on_error:
+            parser.error = self._raise_params_error  # type: ignore
+        return parser.parse_args(self._rawparams)
+
+
+class SweepRunner(StrategyParamsMixin, Runner):
+    """Runs a strategy once for each row of a CSV file of parameters, concurrently.
+
+    Rows are streamed from the file, and all runs share the same :class:`PAB` instance
+    (connection, accounts and contracts). Each row is parsed as the parameters of
+    `pab run strat`, where the column names are the parameter names. `params` are
+    used as defaults for all rows. The result of each run is written as a JSON line
+    to `summary`."""
+
+    def __init__(
+        self,
+        *args,
+        strategy: str,
+        params_file: Path,
+        jobs: int = 1,
+        summary: Path | None = None,
+        params: list[str] | None = None,
+        profile: bool = False,
+    ):
+        super().__init__(*args)
+        self.strat_class = self.pab.strategies.get(strategy)
+        if not self.strat_class:
+            raise RuntimeError(f"Strategy '{strategy}' not found.")
+        self.params_file: Path = params_file
+        self.jobs: int = max(jobs, 1)
+        self.summary: Path = summary or params_file.with_suffix(".summary.jsonl")
+        self._base_params: list[str] = self._get_base_params()
+        self._common_params: list[str] = params or []
+        self.profile: bool = profile
+        """ If True, each run is profiled and the stats written to `profiles/`. """
+        self._parser = self._get_strat_parser(self.strat_class)
+        self._parser.error = self._raise_params_error  # type: ignore
+
+    def run(self) -> dict[str, int]:
+        """Runs all rows and returns the amount of successful and failed runs."""
+        totals = {"ok": 0, "failed": 0}
+        running: set[Future] = set()
+        with ThreadPoolExecutor(self.jobs) as executor, open(self.summary, "w") as dst:
+            for ix, row in enumerate(self._iter_rows()):
+                # Keep a bounded amount of rows in memory
+                if len(running) >= self.jobs * 2:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    self._write_results(done, dst, totals)
+                running.add(executor.submit(self.run_row, ix, row))
+            self._write_results(wait(running).done, dst, totals)
+        self.logger.info(
+            f"Sweep finished: {totals['ok']} ok, {totals['failed']} failed. "
+            f"Summary written to '{self.summary}'."
+        )
+        return totals
+
+    def run_row(self, ix: int, row: dict[str, str]) -> dict:
+        """Parses a row of parameters and runs the strategy. Errors are returned in the result."""
+        result: dict[str, Any] = {"row": ix, "params": row, "status": "ok"}
+        start = time.perf_counter()
+        try:
+            args = self._common_params + [
+                arg
+                for name, value in row.items()
+                if value not in (None, "")
+                for arg in (f"--{name}", value)
+            ]
+            params = self._parser.parse_args(args)
+            name = f"{self.strat_class.__name__}#{ix}"
+            strat = self.strat_class(self.pab.blockchain, name, **params.__dict__)
+            profiled = nullcontext()
+            if self.profile:
+                profiled = profile(self.pab.root / PROFILES_DIR, name)
+            with profiled:
+                output = strat.run()
+            result["result"] = None if output is None else str(output)
+        except Exception as err:
+            self.logger.error(f"Row {ix} failed: {type(err).__name__}: {err}")
+            result.update(status="failed", error=f"{type(err).__name__}: {err}")
+        result["seconds"] = round(time.perf_counter() - start, 6)
+        return result
+
+    def _iter_rows(self) -> Iterator[dict[str, str]]:
+        """Streams rows from :attr:`params_file`."""
+        with open(self.params_file, newline="") as fp:
+            yield from csv.DictReader(fp)
+
+    def _write_results(self, done: set[Future], fhandle: TextIO, totals: dict):
+        for future in sorted(done, key=lambda f: f.result()["row"]):
+            result = future.result()
+            totals[result["status"]] += 1
+            fhandle.write(json.dumps(result) + "\n")
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import calendar
+
+from bisect import bisect_left
+from functools import lru_cache
+from datetime import datetime, timezone
+
+__all__ = ["CronSchedule", "CronError", "compile_cron"]
+
+
+MACROS: dict[str, str] = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+""" Supported shorthand expressions. """
+
+MONTH_NAMES = "jan feb mar apr may jun jul aug sep oct nov dec".split()
+DAY_NAMES = "sun mon tue wed thu fri sat".split()
+
+MAX_YEARS_SEARCH = 30
+""" Amount of years to search for a matching date before considering an expression impossible. """
+
+
+class CronSchedule:
+    """Precompiled cron expression with the standard 5 fields
+    (minute, hour, day of month, month and day of week). Times are evaluated in UTC.
+
+    Each field is compiled once into a sorted tuple of allowed values, so finding the
+    next fire time only takes a few binary searches. The last result is cached, which
+    makes repeated queries between two consecutive fire times O(1)."""
+
+    def __init__(self, expression: str):
+        self.expression: str = expression
+        """ Original expression """
+        fields = MACROS.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise CronError(f"Cron expression '{expression}' must have 5 fields")
+        minute, hour, dom, month, dow = fields
+        self.minutes: tuple[int, ...] = _parse_field(minute, 0, 59)
+        self.hours: tuple[int, ...] = _parse_field(hour, 0, 23)
+        self.days: tuple[int, ...] = _parse_field(dom, 1, 31)
+        self.months: tuple[int, ...] = _parse_field(month, 1, 12, MONTH_NAMES, 1)
+        # Both 0 and 7 mean sunday
+        weekdays = {d % 7 for d in _parse_field(dow, 0, 7, DAY_NAMES)}
+        self.weekdays: frozenset[int] = frozenset(weekdays)
+        self._any_day: bool = dom == "*"
+        self._any_weekday: bool = dow == "*"
+        self._last: tuple[int, int] = (0, 0)
+
+    def next_after(self, timestamp: int | float) -> int:
+        """Returns the first fire time strictly after `timestamp` as an integer timestamp."""
+        start, result = self._last
+        if start <= timestamp < result:
+            return result
+        result = self._compute_next(int(timestamp))
+        self._last = (int(timestamp), result)
+        return result
+
+    def _compute_next(self, timestamp: int) -> int:
+        """Finds the next matching minute moving through months, days, hours and minutes.
+        Each step either matches or resets all the smaller units."""
+        start = datetime.fromtimestamp(timestamp - timestamp % 60 + 60, timezone.utc)
+        year, month, day = start.year, start.month, start.day
+        hour, minute = start.hour, start.minute
+        while year <= start.year + MAX_YEARS_SEARCH:
+            month_ix = bisect_left(self.months, month)
+            if month_ix == len(self.months):
+                year, month, day, hour, minute = year + 1, self.months[0], 1, 0, 0
+                continue
+            if self.months[month_ix] != month:
+                month, day, hour, minute = self.months[month_ix], 1, 0, 0
+            next_day = self._next_day(year, month, day)
+            if next_day is None:
+                month, day, hour, minute = month + 1, 1, 0, 0
+                continue
+            if next_day != day:
+                day, hour, minute = next_day, 0, 0
+            hour_ix = bisect_left(self.hours, hour)
+            if hour_ix == len(self.hours):
+                day, hour, minute = day + 1, 0, 0
+                continue
+            if self.hours[hour_ix] != hour:
+                hour, minute = self.hours[hour_ix], 0
+            minute_ix = bisect_left(self.minutes, minute)
+            if minute_ix == len(self.minutes):
+                hour, minute = hour + 1, 0
+                continue
+            return calendar.timegm((year, month, day, hour, self.minutes[minute_ix], 0))
+        raise CronError(f"Cron expression '{self.expression}' never matches a date")
+
+    def _next_day(self, year: int, month: int, day: int) -> int | None:
+        """Returns the first day of `month` equal or after `day` that matches the
+        day of month and day of week fields, or None if there isn't any."""
+        first_weekday, month_days = calendar.monthrange(year, month)
+        for candidate in range(day, month_days + 1):
+            # calendar uses monday == 0, cron uses sunday == 0
+            weekday = (first_weekday + candidate) % 7
+            if self._day_matches(candidate, weekday):
+                return candidate
+        return None
+
+    def _day_matches(self, day: int, weekday: int) -> bool:
+        """Day matching follows the usual cron rule: if both day of month and day of week
+        are restricted, a day matches when any of them matches."""
+        in_days = day in self.days
+        in_weekdays = weekday in self.weekdays
+        if self._any_day and self._any_weekday:
+            return True
+        if self._any_day:
+            return in_weekdays
+        if self._any_weekday:
+            return in_days
+        return in_days or in_weekdays
+
+    def __str__(self):
+        return self.expression
+
+    def __repr__(self):
+        return f"CronSchedule({self.expression!r})"
+
+
+@lru_cache(maxsize=1024)
+def compile_cron(expression: str) -> CronSchedule:
+    """Returns a shared :class:`CronSchedule` for `expression`.
+    Tasks using the same expression share the compiled matcher and its cache."""
+    return CronSchedule(expression)
+
+
+def _parse_field(
+    field: str,
+    low: int,
+    high: int,
+    names: list[str] | None = None,
+    names_offset: int = 0,
+) -> tuple[int, ...]:
+    """Parses a single cron field into a sorted tuple of allowed values."""
+    values: set[int] = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, raw_step = part.split("/", 1)
+            step = _parse_value(raw_step, 1, high)
+            if step < 1:
+                raise CronError(f"Invalid step in cron field '{field}'")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            raw_start, raw_end = part.split("-", 1)
+            start = _parse_value(raw_start, low, high, names, names_offset)
+            end = _parse_value(raw_end, low, high, names, names_offset)
+        else:
+            start = _parse_value(part, low, high, names, names_offset)
+            end = high if step > 1 else start
+        if start > end:
+            raise CronError(f"Invalid range in cron field '{field}'")
+        values.update(range(start, end + 1, step))
+    return tuple(sorted(values))
+
+
+def _parse_value(
+    value: str,
+    low: int,
+    high: int,
+    names: list[str] | None = None,
+    names_offset: int = 0,
+) -> int:
+    """Parses a single number or name and checks that it's between `low` and `high`."""
+    if names and value.lower() in names:
+        return names.index(value.lower()) + names_offset
+    try:
+        number = int(value)
+    except ValueError as err:
+        raise CronError(f"Invalid cron value '{value}'") from err
+    if not low <= number <= high:
+        raise CronError(f"Cron value {number} out of range [{low}, {high}]")
+    return number
+
+
+class CronError(ValueError):
+    """Invalid or impossible cron expression."""
+
+    pass
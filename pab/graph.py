@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from pab.task import TasksFileParseError
+
+__all__ = ["TaskGraph"]
+
+
+class TaskGraph:
+    """Dependencies between tasks declared with the `after` field of the tasks file.
+
+    A task with dependencies runs once all the tasks in its `after` list finished a run
+    since its own last run. The graph must be acyclic and only reference known tasks,
+    otherwise :exc:`pab.task.TasksFileParseError` is raised. If `keys` is given, with the
+    `shard_key` of each task, tasks must share it with the tasks they depend on, as
+    dependencies are only tracked inside each worker or node."""
+
+    def __init__(
+        self, after: dict[str, Iterable[str]], keys: dict[str, str] | None = None
+    ):
+        self.upstream: dict[str, frozenset[str]] = {
+            name: frozenset(deps) for name, deps in after.items() if deps
+        }
+        """ Tasks each task waits for. Only tasks with dependencies are included. """
+        self.downstream: dict[str, list[str]] = {}
+        """ Tasks waiting for each task. """
+        for name, deps in self.upstream.items():
+            for dep in sorted(deps):
+                if dep not in after:
+                    raise TasksFileParseError(
+                        f"Task '{name}' runs after unknown task '{dep}'"
+                    )
+                if keys is not None and keys[dep] != keys[name]:
+                    raise TasksFileParseError(
+                        f"Task '{name}' runs after '{dep}' but they have a different "
+                        f"shard_key ('{keys[name]}' and '{keys[dep]}'). Tasks that depend "
+                        "on each other must share a shard_key with workers or coordination"
+                    )
+                self.downstream.setdefault(dep, []).append(name)
+        self._check_cycles()
+        self._finished: dict[str, set[str]] = {name: set() for name in self.upstream}
+
+    def __bool__(self):
+        return bool(self.upstream)
+
+    def complete(self, name: str) -> list[str]:
+        """Records that `name` finished a run and returns the tasks that are now ready to run."""
+        ready = []
+        for child in self.downstream.get(name, []):
+            finished = self._finished[child]
+            finished.add(name)
+            if finished >= self.upstream[child]:
+                finished.clear()
+                ready.append(child)
+        return ready
+
+    def _check_cycles(self) -> None:
+        """Raises :exc:`TasksFileParseError` if dependencies have cycles (Kahn's algorithm)."""
+        pending = {name: len(deps) for name, deps in self.upstream.items()}
+        roots = [name for name in self.downstream if name not in pending]
+        while roots:
+            for child in self.downstream.get(roots.pop(), []):
+                pending[child] -= 1
+                if pending[child] == 0:
+                    del pending[child]
+                    roots.append(child)
+        if pending:
+            names = ", ".join(f"'{name}'" for name in sorted(pending))
+            raise TasksFileParseError(f"Tasks have circular dependencies: {names}")
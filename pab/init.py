@@ -7,7 +7,7 @@ from contextlib import AbstractContextManager
 from pathlib import Path
 
 from projectutils.init import Directory, File, Tree
-from pab.config import SCHEMA
+from pab.config import get_schema
 
 
 class chdir(AbstractContextManager):
@@ -27,7 +27,7 @@ class chdir(AbstractContextManager):
 
 
 SAMPLE_ABI_DATA = '[{"This ABI is not valid. Only serves as an example."}]'
-SAMPLE_CONFIG_DATA = json.dumps(SCHEMA.defaults(), indent=4)
+SAMPLE_CONFIG_DATA = json.dumps(get_schema().defaults(), indent=4)
 SAMPLE_TASKS_DATA = """[
     {
         "name": "Example Task",
@@ -67,6 +67,24 @@ key.file
 
 ## Probably don't want to version the log
 pab.log
+
+## Compiled tasks, generated with `pab tasks compile`
+tasks.ndjson
+
+## Jobs database
+jobs.sqlite3
+
+## Coordination leases
+leases.sqlite3
+
+## Traces
+traces.jsonl
+
+## Profiles
+profiles/
+
+## Strategies index, generated by `pab list-strategies` and `pab tasks compile`
+.strategies.index.json
 """
 GITIGNORE_WARNING = "Warning! .gitignore was not created because it already exists. You should probably gitignore .env* files."
 
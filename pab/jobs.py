@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import logging
+import threading
+
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+__all__ = ["Job", "JobQueue", "JobPoller", "job_owner"]
+
+
+_logger = logging.getLogger("pab.jobs")
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    strategy TEXT NOT NULL,
+    params TEXT NOT NULL DEFAULT '[]',
+    status TEXT NOT NULL DEFAULT 'pending',
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    claimed_by TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+""" Jobs table. Other services can insert rows with only `strategy`, `params` and `submitted_at`. """
+
+
+def job_owner(pid: int | None = None) -> str:
+    """Returns the ID a process stores in the jobs it claims, the current process by default."""
+    return f"{socket.gethostname()}:{pid or os.getpid()}"
+
+
+def _is_running(pid: int) -> bool:
+    """Returns whether a process of this host is running. Always True where it can't be
+    checked without side effects, so jobs of live consumers are never failed."""
+    if os.name != "posix" or pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+@dataclass
+class Job:
+    """One-shot strategy execution requested through a :class:`JobQueue`."""
+
+    id: int
+    strategy: str
+    params: list[str]
+    """ Strategy parameters, in the same format as `pab run strat` (e.g. ``["--value", "1"]``). """
+    status: str
+    submitted_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    error: str | None = None
+    claimed_by: str | None = None
+    """ :func:`job_owner` of the process that claimed the job. """
+
+
+class JobQueue:
+    """Durable queue of jobs stored in a SQLite database.
+
+    Jobs go from ``pending`` to ``running`` when claimed, and to ``done`` or ``failed``
+    when finished. Claiming is atomic, so many processes can submit and consume jobs."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+        """ Database file. """
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Opens a connection in autocommit mode. Connections are not shared between threads."""
+        with closing(
+            sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        ) as conn:
+            conn.row_factory = sqlite3.Row
+            yield conn
+
+    def submit(self, strategy: str, params: list[str] | None = None) -> int:
+        """Adds a job to the queue and returns its ID."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (strategy, params, submitted_at) VALUES (?, ?, ?)",
+                (strategy, json.dumps(params or []), time.time()),
+            )
+            return int(cursor.lastrowid)
+
+    def claim(self, limit: int = 10) -> list[Job]:
+        """Marks up to `limit` pending jobs as running, claimed by the current process,
+        and returns them, oldest first."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY id LIMIT ?",
+                    (self.PENDING, limit),
+                ).fetchall()
+                now, owner = time.time(), job_owner()
+                conn.executemany(
+                    "UPDATE jobs SET status = ?, started_at = ?, claimed_by = ? WHERE id = ?",
+                    [(self.RUNNING, now, owner, row["id"]) for row in rows],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        jobs = [self._to_job(row) for row in rows]
+        for job in jobs:
+            job.status, job.started_at, job.claimed_by = self.RUNNING, now, owner
+        return jobs
+
+    def finish(self, job_id: int, error: str | None = None) -> None:
+        """Marks a job as done, or failed if `error` is given."""
+        status = self.FAILED if error is not None else self.DONE
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                (status, time.time(), error, job_id),
+            )
+
+    def fail_interrupted(self, owner: str | None = None) -> int:
+        """Marks jobs left running by a stopped consumer as failed and returns how many.
+        If `owner` is given, only the jobs claimed by that :func:`job_owner` are marked.
+        Otherwise, the jobs claimed by processes of this host that are no longer running
+        are marked, so jobs of other consumers of the database are left running.
+        They are not retried, as they could have already sent transactions."""
+        with self._connect() as conn:
+            if owner is not None:
+                owners = [owner]
+            else:
+                rows = conn.execute(
+                    "SELECT DISTINCT claimed_by FROM jobs WHERE status = ?",
+                    (self.RUNNING,),
+                ).fetchall()
+                owners = []
+                for (claimed_by,) in rows:
+                    host, _, pid = (claimed_by or "").rpartition(":")
+                    if host == socket.gethostname() and not _is_running(int(pid)):
+                        owners.append(claimed_by)
+            cursor = conn.executemany(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ?"
+                " WHERE status = ? AND claimed_by = ?",
+                [
+                    (self.FAILED, time.time(), "Interrupted", self.RUNNING, owner)
+                    for owner in owners
+                ],
+            )
+            return cursor.rowcount
+
+    def get(self, job_id: int) -> Job | None:
+        """Returns a job by ID."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def list(self, status: str | None = None, limit: int = 100) -> list[Job]:
+        """Returns the latest jobs, optionally filtered by status."""
+        query, args = "SELECT * FROM jobs", []
+        if status:
+            query, args = query + " WHERE status = ?", [status]
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY id DESC LIMIT ?", [*args, limit])
+            return [self._to_job(row) for row in rows.fetchall()]
+
+    def _to_job(self, row: sqlite3.Row) -> Job:
+        return Job(
+            id=row["id"],
+            strategy=row["strategy"],
+            params=json.loads(row["params"]),
+            status=row["status"],
+            submitted_at=row["submitted_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            error=row["error"],
+            claimed_by=row["claimed_by"],
+        )
+
+
+class JobPoller:
+    """Polls a :class:`JobQueue` from a daemon thread and runs claimed jobs with `callback`
+    in a pool of `workers` threads. Jobs are only claimed while a thread is free, so
+    pending jobs are left to other consumers."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        callback: Callable[[Job], None],
+        interval: float,
+        workers: int = 1,
+    ):
+        self.queue = queue
+        self.callback = callback
+        self.interval = interval
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="pab-job")
+        self._running: set[Future] = set()
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Starts polling in a daemon thread."""
+        thread = threading.Thread(target=self._poll, name="pab-jobs", daemon=True)
+        thread.start()
+
+    def stop(self) -> None:
+        """Stops polling. Running jobs are left to finish."""
+        self._stop.set()
+        self._executor.shutdown(wait=False)
+
+    def _poll(self) -> None:
+        while not self._stop.is_set():
+            self._running = {future for future in self._running if not future.done()}
+            free = self.workers - len(self._running)
+            try:
+                for job in self.queue.claim(free) if free > 0 else []:
+                    self._running.add(self._executor.submit(self.callback, job))
+            except sqlite3.Error as err:
+                _logger.error(f"Error polling jobs: {err}")
+            self._stop.wait(self.interval)
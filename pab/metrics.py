@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+
+from abc import ABC, abstractmethod
+from typing import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Registry",
+    "REGISTRY",
+    "MetricsServer",
+]
+
+
+_logger = logging.getLogger("pab.metrics")
+
+
+LabelValues = tuple[str, ...]
+
+
+class Metric(ABC):
+    """Base class for metrics. Values are kept by label values, and each metric has its own
+    lock, held only to update a value, so updates from different threads rarely contend.
+    """
+
+    TYPE = ""
+
+    def __init__(self, name: str, doc: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.doc = doc
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if labels.keys() != set(self.labels):
+            raise ValueError(f"Metric {self.name} requires labels {self.labels}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _format_labels(self, values: LabelValues, **extra: str) -> str:
+        pairs = list(zip(self.labels, values)) + list(extra.items())
+        if not pairs:
+            return ""
+        escaped = (
+            (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for k, v in pairs
+        )
+        return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Yields the lines of the metric samples in Prometheus text format."""
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.doc}\n# TYPE {self.name} {self.TYPE}\n"
+        return header + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(Metric):
+    """Value that only goes up."""
+
+    TYPE = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.copy().items()):
+            yield f"{self.name}{self._format_labels(key)} {value}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    TYPE = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    TYPE = "histogram"
+    DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[LabelValues, list[float]] = {}
+        """ Counts of each bucket plus +Inf, followed by sum and count. """
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        ix = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = [0] * (len(self.buckets) + 3)
+            values[ix] += 1
+            values[-2] += value
+            values[-1] += 1
+
+    def count(self, **labels: str) -> int:
+        values = self._values.get(self._key(labels))
+        return int(values[-1]) if values else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, values in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels = self._format_labels(key, le=le)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{self._format_labels(key)} {values[-2]}"
+            yield f"{self.name}_count{self._format_labels(key)} {int(values[-1])}"
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, doc: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, doc, labels))  # type: ignore
+
+    def gauge(self, name: str, doc: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, doc, labels))  # type: ignore
+
+    def histogram(
+        self,
+        name: str,
+        doc: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = Histogram.DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, doc, labels, buckets=buckets))  # type: ignore
+
+    def _register(self, metric: Metric) -> Metric:
+        """Registers `metric`, or returns the existing metric with the same name."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        return "".join(metric.render() for metric in list(self._metrics.values()))
+
+
+REGISTRY = Registry()
+""" Default registry, used by all PAB metrics. """
+
+
+TASK_RUNS = REGISTRY.counter(
+    "pab_task_runs_total", "Task executions by result.", ("strategy", "result")
+)
+TASK_DURATION = REGISTRY.histogram(
+    "pab_task_duration_seconds", "Time spent running tasks.", ("strategy",)
+)
+TASK_LATENESS = REGISTRY.histogram(
+    "pab_task_lateness_seconds",
+    "Time between when a task was due and when it started.",
+    ("strategy",),
+)
+RPC_REQUESTS = REGISTRY.counter(
+    "pab_rpc_requests_total",
+    "JSON-RPC requests by method and calling strategy.",
+    ("method", "strategy"),
+)
+RPC_ERRORS = REGISTRY.counter(
+    "pab_rpc_errors_total", "JSON-RPC requests that failed, by method.", ("method",)
+)
+RPC_DURATION = REGISTRY.histogram(
+    "pab_rpc_duration_seconds",
+    "JSON-RPC request latency.",
+    ("method",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RPC_RESPONSE_BYTES = REGISTRY.counter(
+    "pab_rpc_response_bytes_total", "Size of JSON-RPC responses.", ("method",)
+)
+TRANSACTIONS = REGISTRY.counter(
+    "pab_transactions_total", "Transactions sent by receipt status.", ("status",)
+)
+GAS_USED = REGISTRY.counter("pab_gas_used_total", "Gas used by sent transactions.")
+GAS_SPENT = REGISTRY.counter(
+    "pab_gas_spent_wei_total", "Fees paid by sent transactions, in wei."
+)
+ALERTS = REGISTRY.counter("pab_alerts_total", "Alerted exceptions by type.", ("error",))
+
+
+class MetricsServer:
+    """Local HTTP server exposing a :class:`Registry` at ``GET /metrics``."""
+
+    def __init__(self, registry: Registry, host: str, port: int):
+        self.registry = registry
+        self.server = ThreadingHTTPServer((host, port), _handler_for(registry))
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """Host and port the server is listening on."""
+        return self.server.server_address[:2]
+
+    def start(self) -> None:
+        """Starts serving requests in a daemon thread."""
+        threading.Thread(
+            target=self.server.serve_forever, name="pab-metrics", daemon=True
+        ).start()
+        _logger.info("Metrics server listening on %s:%s", *self.address)
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _handler_for(registry: Registry) -> type[BaseHTTPRequestHandler]:
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            content = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            _logger.debug(format, *args)
+
+    return _Handler
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import time
+import logging
+import threading
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+from pab.metrics import RPC_DURATION, RPC_ERRORS, RPC_REQUESTS, RPC_RESPONSE_BYTES
+from pab.tracing import TRACER
+
+if TYPE_CHECKING:
+    from web3 import Web3
+    from web3.types import RPCEndpoint, RPCResponse
+
+__all__ = ["RPCMonitor", "RPCStats", "attribute_calls", "current_task"]
+
+
+_logger = logging.getLogger("pab.rpc")
+
+
+CURRENT_TASK: ContextVar[tuple[str, str] | None] = ContextVar(
+    "pab_current_task", default=None
+)
+""" Name and strategy of the task running in the current thread. """
+
+RESPONSE_SIZE: ContextVar[int] = ContextVar("pab_response_size", default=0)
+""" Size in bytes of the last raw response read in the current thread. Set by
+:class:`pab.providers.SizedHTTPProvider`, stays at 0 with other providers. """
+
+
+@contextmanager
+def attribute_calls(task: str, strategy: str) -> Iterator[None]:
+    """Attributes the RPC calls made inside the block to `task` and `strategy`."""
+    token = CURRENT_TASK.set((task, strategy))
+    try:
+        yield
+    finally:
+        CURRENT_TASK.reset(token)
+
+
+def current_task() -> tuple[str, str] | None:
+    """Returns the name and strategy of the task running in the current thread, if any."""
+    return CURRENT_TASK.get()
+
+
+class RPCStats:
+    """Rolling stats of JSON-RPC calls. Percentiles are computed from the latencies
+    of the last `window` calls of each method."""
+
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._latencies: dict[str, deque[float]] = {}
+        self._methods: dict[str, list[int]] = {}
+        """ Calls, errors and response bytes by method. """
+        self._tasks: dict[tuple[str, str], dict[str, int]] = {}
+        """ Calls by method for each task and strategy. """
+
+    def record(
+        self,
+        method: str,
+        elapsed: float,
+        size: int,
+        error: bool,
+        task: tuple[str, str] | None,
+    ) -> None:
+        with self._lock:
+            latencies = self._latencies.get(method)
+            if latencies is None:
+                latencies = self._latencies[method] = deque(maxlen=self.window)
+                self._methods[method] = [0, 0, 0]
+            latencies.append(elapsed)
+            totals = self._methods[method]
+            totals[0] += 1
+            totals[1] += error
+            totals[2] += size
+            if task is not None:
+                calls = self._tasks.setdefault(task, {})
+                calls[method] = calls.get(method, 0) + 1
+
+    def percentiles(self, method: str) -> dict[str, float]:
+        """Returns the rolling latency percentiles of `method` in seconds."""
+        with self._lock:
+            values = sorted(self._latencies.get(method, ()))
+        if not values:
+            return {}
+        return {
+            f"p{q}": values[min(len(values) - 1, len(values) * q // 100)]
+            for q in self.PERCENTILES
+        }
+
+    def summary(self) -> dict:
+        """Returns the stats of each method and the calls made by each task."""
+        with self._lock:
+            methods = {m: list(v) for m, v in self._methods.items()}
+            tasks = {k: dict(v) for k, v in self._tasks.items()}
+        return {
+            "methods": {
+                method: {
+                    "calls": calls,
+                    "errors": errors,
+                    "bytes": size,
+                    **self.percentiles(method),
+                }
+                for method, (calls, errors, size) in sorted(methods.items())
+            },
+            "tasks": {
+                name: {"strategy": strategy, "calls": calls}
+                for (name, strategy), calls in sorted(tasks.items())
+            },
+        }
+
+
+class RPCMonitor:
+    """Records every JSON-RPC request in :class:`RPCStats` and in the RPC metrics,
+    attributed to the running task, and logs requests slower than `slow_threshold`
+    seconds (0 disables slow call logging).
+
+    :meth:`middleware` is added to the Web3 middleware onion by :class:`pab.blockchain.Blockchain`.
+    """
+
+    def __init__(self, stats: RPCStats, slow_threshold: float = 0):
+        self.stats = stats
+        self.slow_threshold = slow_threshold
+
+    def record(self, method: str, elapsed: float, size: int, error: bool) -> None:
+        """Records a request made outside the middleware, e.g. a batch request."""
+        task = CURRENT_TASK.get()
+        strategy = task[1] if task else ""
+        RPC_REQUESTS.inc(method=method, strategy=strategy)
+        RPC_DURATION.observe(elapsed, method=method)
+        RPC_RESPONSE_BYTES.inc(size, method=method)
+        if error:
+            RPC_ERRORS.inc(method=method)
+        self.stats.record(method, elapsed, size, error, task)
+        if self.slow_threshold and elapsed >= self.slow_threshold:
+            source = f" in task '{task[0]}' ({task[1]})" if task else ""
+            _logger.warning(
+                f"Slow RPC call {method}{source} took {elapsed:.3f}s ({size} bytes)"
+            )
+
+    def middleware(
+        self, make_request: Callable[[RPCEndpoint, Any], RPCResponse], w3: Web3
+    ) -> Callable[[RPCEndpoint, Any], RPCResponse]:
+        def middleware(method: RPCEndpoint, params: Any) -> RPCResponse:
+            RESPONSE_SIZE.set(0)
+            error = True
+            start = time.perf_counter()
+            try:
+                with TRACER.span(f"rpc.{method}"):
+                    response = make_request(method, params)
+                error = "error" in response
+                return response
+            finally:
+                elapsed = time.perf_counter() - start
+                self.record(method, elapsed, RESPONSE_SIZE.get(), error)
+
+        return middleware
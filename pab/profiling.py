@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import re
+import pstats
+import cProfile
+import logging
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+__all__ = ["PROFILES_DIR", "Hotspot", "profile", "find_profiles", "hotspots"]
+
+
+_logger = logging.getLogger("pab.profiling")
+
+
+PROFILES_DIR = "profiles"
+""" Directory of the project where run profiles are written. """
+
+
+@dataclass
+class Hotspot:
+    """Function that took a large share of the profiled time."""
+
+    function: str
+    """ Function as `file:line(name)` """
+    calls: int
+    tottime: float
+    """ Seconds spent in the function itself """
+    cumtime: float
+    """ Seconds spent in the function and the functions it called """
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "run"
+
+
+@contextmanager
+def profile(directory: Path, name: str) -> Iterator[None]:
+    """Profiles the block with `cProfile` and writes the stats to
+    ``<directory>/<name>-<timestamp>.prof``, readable with :mod:`pstats`.
+
+    Only the calling thread is profiled."""
+    profiler: cProfile.Profile | None = cProfile.Profile()
+    try:
+        profiler.enable()  # type: ignore
+    except ValueError as err:
+        # Another profiler is already active in this process
+        _logger.warning(f"Can't profile '{name}': {err}")
+        profiler = None
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            directory.mkdir(parents=True, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            path = directory / f"{_slug(name)}-{timestamp}.prof"
+            profiler.dump_stats(path)
+            _logger.info(f"Profile of '{name}' written to '{path}'")
+
+
+def find_profiles(directory: Path, name: str | None = None) -> list[Path]:
+    """Returns the profiles in `directory`, only of runs of `name` if given, oldest first."""
+    pattern = f"{_slug(name)}-*.prof" if name else "*.prof"
+    return sorted(directory.glob(pattern))
+
+
+def hotspots(
+    paths: list[Path], limit: int = 20, sort: str = "tottime"
+) -> list[Hotspot]:
+    """Merges the profiles in `paths` and returns the `limit` functions with the highest
+    `sort` time (``tottime`` or ``cumtime``)."""
+    if sort not in ("tottime", "cumtime"):
+        raise ValueError("sort must be 'tottime' or 'cumtime'")
+    stats = pstats.Stats(*[str(path) for path in paths])
+    spots = [
+        Hotspot(f"{file}:{line}({func})", calls, tottime, cumtime)
+        for (file, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items()  # type: ignore
+    ]
+    spots.sort(key=lambda spot: getattr(spot, sort), reverse=True)
+    return spots[:limit]
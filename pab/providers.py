@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import gzip
+import json
+import atexit
+import threading
+
+from pathlib import Path
+from typing import IO, Any
+
+from web3 import HTTPProvider
+from web3.providers import BaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+from pab.middleware import RESPONSE_SIZE
+
+__all__ = [
+    "Cassette",
+    "CassetteError",
+    "RecordingProvider",
+    "ReplayProvider",
+    "SizedHTTPProvider",
+]
+
+
+class SizedHTTPProvider(HTTPProvider):
+    """HTTP provider that records the size of each raw response for :class:`pab.middleware.RPCMonitor`."""
+
+    def decode_rpc_response(self, raw_response: bytes) -> RPCResponse:
+        RESPONSE_SIZE.set(len(raw_response))
+        return super().decode_rpc_response(raw_response)
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    """Opens a cassette file, compressed with gzip if its name ends with `.gz`."""
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    raise TypeError(f"Can't serialize {type(value).__name__}")
+
+
+class Cassette:
+    """JSON-RPC responses recorded from a live node, indexed by method and params.
+
+    Requests with the same method and params are answered with their recorded responses
+    in order, and the last one is repeated when they run out, so polling calls like
+    `eth_blockNumber` replay the same sequence as the recording.
+
+    Cassettes are stored as JSON lines with a request and its response each,
+    compressed with gzip if the file name ends with `.gz`."""
+
+    def __init__(self):
+        self._responses: dict[str, list[dict]] = {}
+        self._served: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(method: str, params: Any) -> str:
+        """Returns the index key of a request."""
+        dumped = json.dumps(
+            params, sort_keys=True, separators=(",", ":"), default=_json_default
+        )
+        return f"{method}:{dumped}"
+
+    def add(self, method: str, params: Any, response: dict) -> None:
+        """Adds the response of a request."""
+        entry = {k: v for k, v in response.items() if k in ("result", "error")}
+        with self._lock:
+            self._responses.setdefault(self.key(method, params), []).append(entry)
+
+    def lookup(self, method: str, params: Any) -> dict:
+        """Returns the next recorded response of a request, with `result` or `error`.
+        May raise :exc:`CassetteError`."""
+        key = self.key(method, params)
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise CassetteError(f"Request not found in cassette: {key[:200]}")
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+        return responses[min(served, len(responses) - 1)]
+
+    def rewind(self) -> None:
+        """Replays all requests from their first response again."""
+        with self._lock:
+            self._served.clear()
+
+    def __len__(self) -> int:
+        return sum(len(responses) for responses in self._responses.values())
+
+    @classmethod
+    def load(cls, path: Path) -> Cassette:
+        """Loads a cassette file. May raise :exc:`CassetteError`."""
+        cassette = cls()
+        try:
+            with _open(path, "r") as fp:
+                for line in fp:
+                    if line.strip():
+                        entry = json.loads(line)
+                        cassette.add(entry["method"], entry["params"], entry)
+        except (OSError, ValueError, KeyError) as err:
+            raise CassetteError(f"Can't load cassette '{path}': {err}")
+        return cassette
+
+
+class RecordingProvider(BaseProvider):
+    """Sends requests to `provider` and appends each request and its response to the
+    cassette file at `path`. The file is closed when the process exits."""
+
+    def __init__(self, provider: BaseProvider, path: Path):
+        super().__init__()
+        self.provider = provider
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = _open(path, "a")
+        atexit.register(self.close)
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        response = self.provider.make_request(method, params)
+        entry = {"method": method, "params": params}
+        entry.update((k, v) for k, v in response.items() if k in ("result", "error"))
+        line = json.dumps(entry, separators=(",", ":"), default=_json_default)
+        with self._lock:
+            self._file.write(line + "\n")
+        return response
+
+    def isConnected(self) -> bool:
+        return self.provider.isConnected()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class ReplayProvider(BaseProvider):
+    """Answers requests from a :class:`Cassette` without a network. Requests that weren't
+    recorded raise :exc:`CassetteError`."""
+
+    def __init__(self, cassette: Cassette):
+        super().__init__()
+        self.cassette = cassette
+        self._ids = iter(range(1, 2**63))
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        response: dict = {"jsonrpc": "2.0", "id": next(self._ids)}
+        response.update(self.cassette.lookup(method, params))
+        return response  # type: ignore
+
+    def isConnected(self) -> bool:
+        return True
+
+
+class CassetteError(Exception):
+    """Error loading or replaying a cassette."""
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import math
+import time
+import random
+import logging
+
+from collections import Counter
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from inspect import signature
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from pab.clock import VirtualClock
+from pab.strategy import BaseStrategy, RescheduleError
+from pab.task import Task, TaskFileParser, TaskLoadError, TaskTable
+from pab.tracing import TRACER
+
+if TYPE_CHECKING:
+    from pab.core import TasksRunner
+
+__all__ = ["Simulation", "SimulationReport"]
+
+
+class _InlineExecutor(Executor):
+    """Executor that runs functions in the calling thread."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as err:
+            future.set_exception(err)
+        return future
+
+
+class _StubStrategy(BaseStrategy):
+    """Stands in for the strategy of a task. :class:`Simulation` replaces its run."""
+
+    def run(self):
+        pass
+
+
+class _StubParser(TaskFileParser):
+    """Parser that creates :class:`_StubStrategy` instead of the strategies of tasks,
+    so the constructors of strategies, which may make RPC calls, don't run."""
+
+    def _create_strat_from_data(self, data: dict) -> BaseStrategy:
+        """Checks that the strategy exists and accepts the params of the task, and returns
+        a stub. May raise :exc:`TaskLoadError`."""
+        strat_class = self._find_strat_by_name(data["strategy"])
+        try:
+            signature(strat_class).bind(
+                self.blockchain, data["name"], **data.get("params", {})
+            )
+        except TypeError as err:
+            raise TaskLoadError(f"Error loading task '{data['name']}': {err}")
+        return _StubStrategy(self.blockchain, data["name"])
+
+
+@dataclass
+class SimulationReport:
+    """Results of a :class:`Simulation`."""
+
+    start: float
+    end: float
+    iterations: int = 0
+    """ Scheduler iterations that ran at least one task """
+    runs: dict[str, int] = field(default_factory=dict)
+    """ Amount of runs of each task """
+    rescheduled: int = 0
+    """ Runs that raised a simulated :exc:`pab.strategy.RescheduleError` """
+    peak: int = 0
+    """ Most tasks run in a single iteration """
+    peak_at: float = 0
+    collisions: int = 0
+    """ Iterations where a lane had more ready tasks than it can run at the same time """
+    hours: Counter[int] = field(default_factory=Counter)
+    """ Runs by hour, as the timestamp of the start of the hour """
+    not_simulated: list[str] = field(default_factory=list)
+    """ Tasks with triggers, which only run on chain activity """
+    wall_seconds: float = 0
+
+    @property
+    def total_runs(self) -> int:
+        return sum(self.runs.values())
+
+    @property
+    def runs_per_second(self) -> float:
+        """Runs simulated per second of wall time, a measure of the scheduler throughput."""
+        return self.total_runs / self.wall_seconds if self.wall_seconds else 0.0
+
+    def busiest_hours(self, amount: int = 5) -> list[tuple[int, int]]:
+        return self.hours.most_common(amount)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "start": self.start,
+            "end": self.end,
+            "iterations": self.iterations,
+            "total_runs": self.total_runs,
+            "runs": self.runs,
+            "rescheduled": self.rescheduled,
+            "peak": self.peak,
+            "peak_at": self.peak_at,
+            "collisions": self.collisions,
+            "busiest_hours": self.busiest_hours(),
+            "never_run": [name for name, runs in self.runs.items() if runs == 0],
+            "not_simulated": self.not_simulated,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "runs_per_second": round(self.runs_per_second, 1),
+        }
+
+
+class Simulation:
+    """Runs the schedule of a :class:`pab.core.TasksRunner` against a :class:`VirtualClock`.
+
+    Strategies are replaced by stubs that return immediately, or raise
+    :exc:`pab.strategy.RescheduleError` with probability `reschedule_rate`. Conditions,
+    gas price limits and coordination are ignored. The runner wakes up every `tick`
+    seconds like :meth:`TasksRunner.run` does, but the clock skips the iterations
+    where no task is due, so months of schedule run in seconds.
+
+    The runner must be created with ``stream=True``, tasks are loaded by the simulation
+    without creating their strategies. Profiles and traces are not written."""
+
+    def __init__(
+        self,
+        runner: TasksRunner,
+        tick: float | None = None,
+        reschedule_rate: float = 0,
+        seed: int | None = None,
+    ):
+        if not isinstance(runner.clock, VirtualClock):
+            raise ValueError("Simulations require a runner with a VirtualClock")
+        if runner.tasks:
+            raise ValueError("Simulations require a runner created with stream=True")
+        self.runner = runner
+        self.clock: VirtualClock = runner.clock
+        self.tick: float = tick or runner.ITERATION_SLEEP
+        self.reschedule_rate = reschedule_rate
+        self._random = random.Random(seed)
+        self._fired: list[Task] = []
+        self._rescheduled = 0
+
+    def run(self, seconds: float) -> SimulationReport:
+        """Simulates `seconds` of schedule from the current time of the clock."""
+        start = self.clock.time()
+        report = SimulationReport(start, start + seconds)
+        runner = self.runner
+        runner.coordinator = None
+        if runner._loader is not None:
+            parser = runner._parser
+            runner._parser = _StubParser(
+                parser.root, parser.blockchain, parser.strategies, parser.clock
+            )
+            runner.load_tasks()
+        # Stubs return immediately, running them in threads would only add overhead
+        inline = _InlineExecutor()
+        runner._lanes = {task.lane: inline for task in runner.tasks}
+        for task in runner.tasks:
+            self._stub(task)
+            report.runs[task.strategy.name] = 0
+            if task.trigger is not None:
+                report.not_simulated.append(task.strategy.name)
+        loggers = [logging.getLogger("pab.task"), runner.logger]
+        levels = [logger.level for logger in loggers]
+        for logger in loggers:
+            logger.setLevel(logging.ERROR)
+        exporter, TRACER.exporter = TRACER.exporter, None
+        wall = time.perf_counter()
+        try:
+            while self.clock.time() <= report.end:
+                runner.process_tasks()
+                self._collect(report)
+                steps = self._ticks_to_next_due()
+                if steps is None:
+                    break
+                self.clock.advance(steps * self.tick)
+        finally:
+            for logger, level in zip(loggers, levels):
+                logger.setLevel(level)
+            TRACER.exporter = exporter
+            runner._lanes = {}
+        report.rescheduled = self._rescheduled
+        report.wall_seconds = time.perf_counter() - wall
+        return report
+
+    def _stub(self, task: Task) -> None:
+        """Replaces the strategy run and guards of `task`."""
+
+        def run():
+            self._fired.append(task)
+            if self.reschedule_rate and self._random.random() < self.reschedule_rate:
+                self._rescheduled += 1
+                raise RescheduleError("Simulated reschedule")
+
+        task.strategy.run = run  # type: ignore
+        task.strategy.should_run = lambda: True  # type: ignore
+        task.conditions = []
+        task.max_gas_price = None
+        task.max_defer = None
+        task.profile_dir = None
+
+    def _collect(self, report: SimulationReport) -> None:
+        """Adds the runs of the last iteration to `report`."""
+        fired, self._fired = self._fired, []
+        if not fired:
+            return
+        now = self.clock.time()
+        report.iterations += 1
+        for task in fired:
+            report.runs[task.strategy.name] += 1
+        report.hours[int(now // 3600 * 3600)] += len(fired)
+        if len(fired) > report.peak:
+            report.peak, report.peak_at = len(fired), now
+        by_lane = Counter(task.lane for task in fired)
+        if max(by_lane.values()) > self.runner.parallelism:
+            report.collisions += 1
+
+    def _ticks_to_next_due(self) -> int | None:
+        """Returns the amount of ticks until the next iteration where a task is ready,
+        or None if no task will run again."""
+        table = self.runner.table
+        size = len(table)
+        active = (table.flags[:size] & TaskTable.FLAG_PAUSED) == 0
+        next_at = table.next_at[:size][active]
+        if (next_at == Task.RUN_ASAP).any():
+            return 1
+        scheduled = next_at[next_at > 0]
+        if not len(scheduled):
+            return None
+        # Tasks are ready once the clock is past their next_at
+        wait = float(np.min(scheduled)) - self.clock.time()
+        return max(1, math.floor(wait / self.tick) + 1)
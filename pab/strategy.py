@@ -65,7 +65,11 @@ class BaseStrategy(ABC):
     """Abstract Base Class for custom strategies."""
 
     def __init__(self, blockchain: Blockchain, name: str):
-        self.logger = logging.getLogger(f"{self.__class__.__name__}-{name}")
+        self.logger = logging.LoggerAdapter(
+            logging.getLogger(f"pab.strategy.{self.__class__.__name__}"),
+            {"strategy": name},
+        )
+        """ Logger shared by all instances of the strategy, with `name` as `extra` context. """
         self.blockchain: Blockchain = blockchain
         """ Current blockchain connection. """
         self.name: str = name
@@ -87,6 +91,14 @@ class BaseStrategy(ABC):
         """Strategy entrypoint. Must be defined by all childs."""
         raise NotImplementedError("Childs of BaseStrategy must implement 'run'")
 
+    def should_run(self) -> bool:
+        """Called by the tasks runner before running a due task. If it returns False the task
+        doesn't run and is checked again on the next iteration. Override it with a cheap
+        check to skip runs that would do nothing. Conditions that only read a contract can
+        be declared in `tasks.json` instead, which are read for all tasks with a single
+        request."""
+        return True
+
     def transact(self, account: LocalAccount, func: Callable, args: tuple) -> TxReceipt:
         """Makes a transaction on the current blockchain."""
         return self.blockchain.transact(account, func, args)
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import ast
+import json
+import logging
+import hashlib
+import argparse
+
+from inspect import Parameter, signature
+from pathlib import Path
+from dataclasses import asdict, dataclass, field
+from typing import Any, Iterator
+
+from pab.config import STRATEGY_INDEX_FILE
+
+__all__ = [
+    "ParamMeta",
+    "StrategyMeta",
+    "StrategyIndex",
+    "StrategyParamsError",
+]
+
+
+_logger = logging.getLogger("pab.strategy_index")
+
+
+_STRATS_MODULE_NAME = "strategies"
+_BASE_CLASS_NAME = "BaseStrategy"
+_BASE_PARAMS = ("self", "blockchain", "name")
+""" Parameters of strategy constructors that are passed by PAB. """
+
+PARAM_TYPES = {"str": str, "int": int, "float": float}
+""" Types of strategy parameters by annotation, for parsing them from the command line. """
+
+
+@dataclass(frozen=True)
+class ParamMeta:
+    """Keyword parameter of a strategy constructor, as written in the source."""
+
+    name: str
+    annotation: str | None = None
+    default: str | None = None
+    """ Source of the default value, None if the parameter is required. """
+
+    @property
+    def required(self) -> bool:
+        return self.default is None
+
+    def __str__(self):
+        # Same format as `str(inspect.Parameter)`
+        text = self.name
+        if self.annotation is not None:
+            text += f": {self.annotation}"
+        if self.default is not None:
+            text += (
+                f" = {self.default}"
+                if self.annotation is not None
+                else f"={self.default}"
+            )
+        return text
+
+
+@dataclass(frozen=True)
+class StrategyMeta:
+    """Name, docstring and parameters of a strategy, read without importing it."""
+
+    name: str
+    doc: str | None
+    params: tuple[ParamMeta, ...]
+    file: str
+    """ Source file relative to the project root. """
+    line: int
+
+    def check_params(self, params: dict[str, Any]) -> None:
+        """Checks that `params` are valid keyword arguments for the strategy.
+        May raise :exc:`StrategyParamsError`."""
+        names = {param.name for param in self.params}
+        unknown = sorted(params.keys() - names)
+        if unknown:
+            raise StrategyParamsError(
+                f"{self.name} got unexpected parameters: {', '.join(unknown)}"
+            )
+        missing = [p.name for p in self.params if p.required and p.name not in params]
+        if missing:
+            raise StrategyParamsError(
+                f"{self.name} is missing required parameters: {', '.join(missing)}"
+            )
+
+    def matches(self, strat_class: type) -> bool:
+        """Whether the parameters are the same as the ones of the imported `strat_class`.
+        They differ if it inherits its constructor from a class out of the `strategies`
+        module, or if it's created dynamically."""
+        names = {(param.name, param.annotation) for param in self.params}
+        return names == _class_params(strat_class)
+
+    @property
+    def typed(self) -> bool:
+        """Whether all parameters are annotated with `str`, `int` or `float`, so :meth:`parser`
+        converts them to the same values as the strategy parser of `pab run strat`."""
+        return all(param.annotation in PARAM_TYPES for param in self.params)
+
+    def parser(self) -> argparse.ArgumentParser:
+        """Returns a parser for the parameters of the strategy as `pab run strat` receives them.
+        Like in `pab run strat`, all parameters are required. Parameters annotated with other
+        types than `str`, `int` and `float` are parsed as `str`."""
+        parser = argparse.ArgumentParser(self.name, self.doc)
+        for param in self.params:
+            type_ = PARAM_TYPES.get(param.annotation or "", str)
+            parser.add_argument(f"--{param.name}", type=type_, required=True)
+        return parser
+
+
+@dataclass
+class _FileEntry:
+    """Cached classes of a source file, with the stamp used to detect changes."""
+
+    mtime_ns: int
+    size: int
+    sha1: str
+    classes: list[dict] = field(default_factory=list)
+
+
+class StrategyIndex:
+    """Metadata of the strategies of a project, parsed from the source of the `strategies`
+    module with :mod:`ast`, so the module and its dependencies are never imported.
+
+    The classes found in each file are cached in :data:`pab.config.STRATEGY_INDEX_FILE`.
+    A file is only parsed again when its modification time or size changed and its
+    content hash is different. Like :func:`pab.strategy.load_strategies`, only direct
+    subclasses of `BaseStrategy` are strategies. Strategies created dynamically can't
+    be found."""
+
+    VERSION = 1
+
+    def __init__(self, root: Path, files: dict[str, _FileEntry]):
+        self.root = root
+        self.files = files
+        """ Cached entries by source file, relative to :attr:`root`. """
+        self.strategies: dict[str, StrategyMeta] = self._resolve()
+        """ Strategies by name. """
+
+    @classmethod
+    def load(cls, root: Path) -> StrategyIndex:
+        """Returns the index of the strategies in `root`, updating the cached index if
+        any source file changed."""
+        cached = cls._read_cache(root / STRATEGY_INDEX_FILE)
+        files, changed = {}, False
+        for path in _find_sources(root):
+            key = path.relative_to(root).as_posix()
+            entry, updated = _refresh_entry(path, cached.get(key))
+            files[key] = entry
+            changed = changed or updated
+        changed = changed or cached.keys() != files.keys()
+        index = cls(root, files)
+        if changed and files:
+            index.save()
+        return index
+
+    @classmethod
+    def _read_cache(cls, path: Path) -> dict[str, _FileEntry]:
+        try:
+            data = json.loads(path.read_text())
+            if data.get("version") != cls.VERSION:
+                return {}
+            return {key: _FileEntry(**entry) for key, entry in data["files"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def save(self) -> None:
+        """Writes the index to :data:`pab.config.STRATEGY_INDEX_FILE`. Errors are logged."""
+        path = self.root / STRATEGY_INDEX_FILE
+        data = {
+            "version": self.VERSION,
+            "files": {key: asdict(entry) for key, entry in self.files.items()},
+        }
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            tmp.write_text(json.dumps(data))
+            tmp.replace(path)
+        except OSError as err:
+            _logger.warning(f"Can't write strategies index '{path}': {err}")
+
+    def get(self, name: str) -> StrategyMeta | None:
+        return self.strategies.get(name)
+
+    def json(self) -> dict[str, dict]:
+        """Returns the strategies in the same format as :func:`pab.utils.json_strats`."""
+        return {
+            name: {"params": [str(p) for p in meta.params], "doc": meta.doc}
+            for name, meta in self.strategies.items()
+        }
+
+    def _resolve(self) -> dict[str, StrategyMeta]:
+        classes = {
+            cls["name"]: (key, cls)
+            for key, entry in self.files.items()
+            for cls in entry.classes
+        }
+        strategies = {}
+        for name, (key, cls) in classes.items():
+            if _BASE_CLASS_NAME not in cls["bases"]:
+                continue
+            params = tuple(ParamMeta(**p) for p in _init_params(classes, name, set()))
+            strategies[name] = StrategyMeta(name, cls["doc"], params, key, cls["line"])
+        return strategies
+
+
+def _init_params(
+    classes: dict[str, tuple[str, dict]], name: str, seen: set[str]
+) -> list[dict]:
+    """Returns the constructor parameters of a class as `pab run strat` finds them: the
+    parameters of its own or inherited `__init__`, and the ones of each of its base classes
+    found in the index."""
+    if name in seen or name not in classes:
+        return []
+    seen = seen | {name}
+    params = list(_inherited_init_params(classes, name, set()))
+    for base in classes[name][1]["bases"]:
+        for param in _init_params(classes, base, seen):
+            if param not in params:
+                params.append(param)
+    return params
+
+
+def _inherited_init_params(
+    classes: dict[str, tuple[str, dict]], name: str, seen: set[str]
+) -> list[dict]:
+    """Returns the parameters of the `__init__` of a class, from its own or the first
+    base class found in the index that defines one."""
+    if name in seen or name not in classes:
+        return []
+    seen.add(name)
+    cls = classes[name][1]
+    if cls["params"] is not None:
+        return cls["params"]
+    for base in cls["bases"]:
+        params = _inherited_init_params(classes, base, seen)
+        if params:
+            return params
+    return []
+
+
+def _class_params(cls: type) -> set[tuple[str, str | None]]:
+    """Returns the names and annotations of the constructor parameters of an imported
+    class and its base classes, like :func:`_init_params` does from the source."""
+    params = set()
+    for param in signature(cls).parameters.values():
+        if param.kind in (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY):
+            if param.name not in _BASE_PARAMS:
+                params.add((param.name, _annotation_name(param.annotation)))
+    for base in cls.__bases__:
+        if base.__name__ != _BASE_CLASS_NAME and base is not object:
+            params |= _class_params(base)
+    return params
+
+
+def _annotation_name(annotation: Any) -> str | None:
+    """Returns an annotation as written in the source."""
+    if annotation is Parameter.empty:
+        return None
+    if isinstance(annotation, type):
+        return annotation.__name__
+    return str(annotation)
+
+
+def _find_sources(root: Path) -> Iterator[Path]:
+    """Yields the source files of the `strategies` module or package in `root`."""
+    module = root / f"{_STRATS_MODULE_NAME}.py"
+    if module.is_file():
+        yield module
+    package = root / _STRATS_MODULE_NAME
+    if package.is_dir():
+        yield from sorted(
+            p for p in package.rglob("*.py") if "__pycache__" not in p.parts
+        )
+
+
+def _refresh_entry(path: Path, entry: _FileEntry | None) -> tuple[_FileEntry, bool]:
+    """Returns the entry of `path` and whether it changed. `path` is only parsed if
+    its content is different from the one of `entry`."""
+    stat = path.stat()
+    if entry is not None and (entry.mtime_ns, entry.size) == (
+        stat.st_mtime_ns,
+        stat.st_size,
+    ):
+        return entry, False
+    content = path.read_bytes()
+    sha1 = hashlib.sha1(content).hexdigest()
+    if entry is not None and entry.sha1 == sha1:
+        return _FileEntry(stat.st_mtime_ns, stat.st_size, sha1, entry.classes), True
+    return (
+        _FileEntry(stat.st_mtime_ns, stat.st_size, sha1, _parse_classes(path, content)),
+        True,
+    )
+
+
+def _parse_classes(path: Path, content: bytes) -> list[dict]:
+    """Returns the name, docstring, base names and constructor parameters of the
+    top level classes defined in a source file."""
+    try:
+        tree = ast.parse(content, str(path))
+    except SyntaxError as err:
+        _logger.warning(f"Can't parse strategies file '{path}': {err}")
+        return []
+    classes = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        init = next(
+            (
+                item
+                for item in node.body
+                if isinstance(item, ast.FunctionDef) and item.name == "__init__"
+            ),
+            None,
+        )
+        classes.append(
+            {
+                "name": node.name,
+                "doc": ast.get_docstring(node, clean=False),
+                "bases": [_base_name(base) for base in node.bases],
+                "params": _parse_params(init.args) if init else None,
+                "line": node.lineno,
+            }
+        )
+    return classes
+
+
+def _base_name(node: ast.expr) -> str:
+    """Returns the name of a base class, without the module (`pab.strategy.BaseStrategy`
+    is `BaseStrategy`)."""
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return ast.unparse(node)
+
+
+def _parse_params(args: ast.arguments) -> list[dict]:
+    """Returns the keyword parameters of a function, skipping the ones passed by PAB."""
+    positional = args.posonlyargs + args.args
+    defaults: list[ast.expr | None] = [None] * (len(positional) - len(args.defaults))
+    pairs = list(zip(positional, defaults + list(args.defaults)))
+    pairs += list(zip(args.kwonlyargs, args.kw_defaults))
+    return [
+        {
+            "name": arg.arg,
+            "annotation": ast.unparse(arg.annotation) if arg.annotation else None,
+            "default": ast.unparse(default) if default is not None else None,
+        }
+        for arg, default in pairs[len(args.posonlyargs) :]
+        if arg.arg not in _BASE_PARAMS
+    ]
+
+
+class StrategyParamsError(ValueError):
+    """Invalid parameters for a strategy."""
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+import zlib
 import json
+import time
+import hashlib
 import logging
+import threading
 
-from typing import Any, List, NewType, TextIO
+from typing import Any, Iterable, Iterator, List, NewType, TextIO
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from datetime import datetime, timedelta
 
+import numpy as np
+
 from pab.blockchain import Blockchain
 from pab.strategy import (
     BaseStrategy,
@@ -14,8 +21,23 @@ from pab.strategy import (
     SpecificTimeRescheduleError,
     StrategiesDict,
 )
-from pab.config import TASKS_FILE, DATETIME_FORMAT
+from pab.config import TASKS_FILE, TASKS_NDJSON_FILE, DATETIME_FORMAT
+from pab.cron import CronSchedule, CronError, compile_cron
+from pab.triggers import Trigger, TriggerError, create_trigger
+from pab.conditions import Condition, ConditionError
+from pab.metrics import TASK_DURATION, TASK_LATENESS, TASK_RUNS
+from pab.middleware import attribute_calls
+from pab.tracing import TRACER
+from pab.profiling import PROFILES_DIR, profile
+from pab.clock import SYSTEM_CLOCK, Clock
+from pab.strategy_index import StrategyIndex, StrategyParamsError
+
+
+_logger = logging.getLogger("pab.task")
 
+_TABLE_LOCK = threading.RLock()
+""" Guards the rows of all :class:`TaskTable`, which lanes write to while the runner adds
+tasks, grows the arrays or moves tasks to a new table. """
 
 TaskList = NewType("TaskList", list["Task"])
 """ Type for an explicit list of Tasks. """
@@ -27,10 +49,32 @@ RawTasksData = NewType("RawTasksData", List[dict])
 class Task:
     """Container for a strategy to be executed in the future"""
 
+    __slots__ = (
+        "id",
+        "strategy",
+        "repeat_every",
+        "cron",
+        "priority",
+        "lane",
+        "deadline",
+        "trigger",
+        "conditions",
+        "max_gas_price",
+        "max_defer",
+        "profile_dir",
+        "clock",
+        "_table",
+        "_row",
+        "_next_at",
+        "_last_start",
+    )
+
     RUN_ASAP: int = -10
     """ Constant. Means job should be rescheduled to run ASAP. """
     RUN_NEVER: int = -20
     """ Constant. Means job should't be rescheduled. """
+    DEFAULT_LANE: str = "default"
+    """ Constant. Lane of tasks that don't declare one. """
 
     def __init__(
         self,
@@ -38,18 +82,109 @@ class Task:
         strat: BaseStrategy,
         next_at: int,
         repeat_every: dict | None = None,
+        cron: CronSchedule | None = None,
+        priority: int = 0,
+        lane: str = DEFAULT_LANE,
+        deadline: float | None = None,
+        trigger: Trigger | None = None,
+        conditions: list[Condition] | None = None,
+        max_gas_price: int | None = None,
+        max_defer: int | None = None,
+        profile_dir: Path | None = None,
+        clock: Clock = SYSTEM_CLOCK,
     ):
         self.id = id_
         """ Internal Task ID """
         self.strategy: BaseStrategy = strat
         """ Strategy object """
-        self.next_at: int = next_at
-        """ Next execution time as timestamp"""
+        self._table: TaskTable | None = None
+        self._row: int = -1
+        self._next_at: int = next_at
+        self._last_start: int = 0
         self.repeat_every: dict[str, int] | None = repeat_every
         """ Repetition data. A dict that functions as kwargs for `datetime.timedelta` """
-        self.last_start: int = 0
-        """ Last execution start time as timestamp"""
-        self.logger = logging.getLogger(f"{self}")
+        self.cron: CronSchedule | None = cron
+        """ Cron schedule. If set, it's used instead of :attr:`repeat_every` """
+        self.priority: int = priority
+        """ Tasks with higher priority run first when many are ready """
+        self.lane: str = lane
+        """ Dispatch lane. Each lane runs its tasks in its own threads """
+        self.deadline: float | None = deadline
+        """ Seconds after :attr:`next_at` the task must start by, or it's reported as late """
+        self.trigger: Trigger | None = trigger
+        """ Chain trigger. If set, the task runs when it fires instead of on a schedule """
+        self.conditions: list[Condition] = conditions or []
+        """ Conditions that must be true for the task to run when it's due """
+        self.max_gas_price: int | None = max_gas_price
+        """ Gas price in wei above which the task is deferred """
+        self.max_defer: int | None = max_defer
+        """ Maximum seconds the task can be deferred by gas price, if limited """
+        self.profile_dir: Path | None = profile_dir
+        """ Directory where profiles of each run are written, if the task is profiled """
+        self.clock: Clock = clock
+        """ Source of the current time """
+
+    @property
+    def logger(self) -> logging.LoggerAdapter:
+        """Shared `pab.task` logger with the task as `extra` context."""
+        return logging.LoggerAdapter(_logger, {"task": str(self)})
+
+    @property
+    def next_at(self) -> int:
+        """Next execution time as timestamp"""
+        with _TABLE_LOCK:
+            if self._table is not None:
+                return int(self._table.next_at[self._row])
+            return self._next_at
+
+    @next_at.setter
+    def next_at(self, value: int) -> None:
+        with _TABLE_LOCK:
+            if self._table is not None:
+                self._table.next_at[self._row] = value
+            else:
+                self._next_at = value
+
+    @property
+    def last_start(self) -> int:
+        """Last execution start time as timestamp"""
+        with _TABLE_LOCK:
+            if self._table is not None:
+                return int(self._table.last_start[self._row])
+            return self._last_start
+
+    @last_start.setter
+    def last_start(self, value: int) -> None:
+        with _TABLE_LOCK:
+            if self._table is not None:
+                self._table.last_start[self._row] = value
+            else:
+                self._last_start = value
+
+    @property
+    def paused(self) -> bool:
+        """True if the task is paused in its :class:`TaskTable`. Paused tasks are never ready
+        in the table, but keep their schedule. Unbound tasks can't be paused."""
+        with _TABLE_LOCK:
+            if self._table is None:
+                return False
+            return bool(self._table.flags[self._row] & TaskTable.FLAG_PAUSED)
+
+    @paused.setter
+    def paused(self, value: bool) -> None:
+        with _TABLE_LOCK:
+            if self._table is None:
+                raise RuntimeError(f"Can't pause {self}, it's not in a TaskTable")
+            if value:
+                self._table.flags[self._row] |= TaskTable.FLAG_PAUSED
+            else:
+                self._table.flags[self._row] &= ~np.uint8(TaskTable.FLAG_PAUSED)
+
+    def repeat_interval(self) -> int:
+        """Returns :attr:`repeat_every` as seconds, or 0 if the task doesn't repeat."""
+        if not self.repeat_every:
+            return 0
+        return int(timedelta(**self.repeat_every).total_seconds())
 
     def reschedule(self) -> None:
         """Calculates next execution if applies and calls :meth:`schedule_for`"""
@@ -58,17 +193,19 @@ class Task:
 
     def repeats(self) -> bool:
         """True if Task has repetition data."""
-        return bool(self.repeat_every)
+        return bool(self.repeat_every) or self.cron is not None
 
     def next_repetition_time(self) -> int:
-        """Returns next repetition time based on :attr:`last_start` and :attr:`repeat_every`."""
+        """Returns next repetition time based on :attr:`last_start` and :attr:`repeat_every`.
+        Cron tasks return the next fire time after now, so they don't drift with run
+        time."""
+        if self.cron is not None:
+            return self.cron.next_after(self.clock.time())
         if not self.repeat_every:
             raise RuntimeError(
                 f"Can't calculate repetition time for {self} without repetition data."
             )
-        last = datetime.fromtimestamp(self.last_start)
-        new = last + timedelta(**self.repeat_every)
-        return int(new.timestamp())
+        return self.last_start + self.repeat_interval()
 
     def schedule_for(self, next_at: int) -> None:
         """Updates :attr:`self.next_at` for a specific time. Will disable job if value is
@@ -77,6 +214,8 @@ class Task:
             raise ValueError("Schedule for must receive an integer timestamp")
         if next_at == self.RUN_NEVER:
             self.logger.warning(f"{self} disabled")
+        elif next_at == self.RUN_ASAP:
+            self.logger.info(f"{self} will run as soon as possible")
         else:
             timestamp = datetime.fromtimestamp(next_at).strftime(DATETIME_FORMAT)
             self.logger.info(f"Next run of {self} will be at {timestamp}")
@@ -89,63 +228,234 @@ class Task:
         elif self.next_at == self.RUN_NEVER:
             return False
         elif self.next_at > 0:
-            return datetime.fromtimestamp(self.next_at) < datetime.now()
+            return self.next_at < self.clock.time()
         else:
             raise ValueError(
                 f"Wrong value {self.next_at} of type {type(self.next_at)} for {self}"
             )
 
-    def process(self) -> None:
-        """Calls :meth:`_process` and handles :exc:`pab.strategy.RescheduleError`."""
+    def process(self) -> bool:
+        """Calls :meth:`_process` and handles :exc:`pab.strategy.RescheduleError`.
+        Returns True if the strategy ran until the end."""
         try:
-            self._process()
+            return self._process()
         except SpecificTimeRescheduleError as err:
             self.logger.warning(err)
             self.schedule_for(int(err.next_at))
         except RescheduleError as err:
             self.logger.warning(err)
             self.reschedule()
+        return False
 
-    def _process(self) -> None:
+    def _process(self) -> bool:
         """Runs strategy and updates schedule."""
-        if self.is_ready():
-            self.logger.info(f"Running task {self.strategy}")
-            self.last_start = int(datetime.now().timestamp())
-            self.strategy.run()
+        if not self.is_ready():
+            return False
+        self.logger.info(f"Running task {self.strategy}")
+        now = self.clock.time()
+        name, strategy = self.strategy.name, type(self.strategy).__name__
+        if self.next_at > 0:
+            TASK_LATENESS.observe(max(now - self.next_at, 0), strategy=strategy)
+        self.last_start = int(now)
+        with TRACER.span("task.process", task=name, strategy=strategy):
+            profiled = (
+                profile(self.profile_dir, name) if self.profile_dir else nullcontext()
+            )
+            with _record_run(strategy), attribute_calls(name, strategy), profiled:
+                self.strategy.run()
             self.reschedule()
-            self.logger.info(f"Done with {self.strategy}")
+        self.logger.info(f"Done with {self.strategy}")
+        return True
 
     def __str__(self):
         return f"Task[{self.strategy}]"
 
 
+@contextmanager
+def _record_run(strategy: str) -> Iterator[None]:
+    """Records the duration and result of a strategy run in the task metrics."""
+    start = time.perf_counter()
+    result = "error"
+    try:
+        yield
+        result = "ok"
+    except RescheduleError:
+        result = "rescheduled"
+        raise
+    finally:
+        TASK_DURATION.observe(time.perf_counter() - start, strategy=strategy)
+        TASK_RUNS.inc(strategy=strategy, result=result)
+
+
+class TaskTable:
+    """Struct-of-arrays with the schedule state of many tasks.
+
+    :attr:`next_at`, :attr:`last_start`, :attr:`interval` and :attr:`flags` are NumPy arrays
+    where each row belongs to a task. Tasks added to a table become views: reading or writing
+    :attr:`Task.next_at` and :attr:`Task.last_start` goes to the table row. This allows
+    computing readiness and rescheduling for the whole list with vectorized operations.
+
+    :attr:`Task.repeat_every` and :attr:`Task.cron` are read when the task is added,
+    later changes to them are not reflected on the table. Rows are read and written under
+    a lock shared by all tables, so tasks can run in other threads while the table
+    grows."""
+
+    FLAG_REPEATS: int = 1
+    """ Flag. Task repeats every :attr:`interval` seconds. """
+    FLAG_CRON: int = 2
+    """ Flag. Task follows a cron schedule. """
+    FLAG_PAUSED: int = 4
+    """ Flag. Task is paused and will not be ready until resumed. """
+
+    INITIAL_CAPACITY: int = 64
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        self.tasks: list[Task] = []
+        """ Tasks by row """
+        self.next_at: np.ndarray = np.zeros(self.INITIAL_CAPACITY, dtype=np.int64)
+        """ Next execution time of each task """
+        self.last_start: np.ndarray = np.zeros(self.INITIAL_CAPACITY, dtype=np.int64)
+        """ Last execution start time of each task """
+        self.interval: np.ndarray = np.zeros(self.INITIAL_CAPACITY, dtype=np.int64)
+        """ Repetition interval in seconds of each task, 0 if it doesn't repeat """
+        self.flags: np.ndarray = np.zeros(self.INITIAL_CAPACITY, dtype=np.uint8)
+        """ State flags of each task """
+        self.priority: np.ndarray = np.zeros(self.INITIAL_CAPACITY, dtype=np.int64)
+        """ Priority of each task """
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task: Task) -> int:
+        """Adds `task` to the table, binds it as a view of the new row and returns the row.
+        Tasks in another table are moved, keeping the writes made to their old row."""
+        with _TABLE_LOCK:
+            row = len(self.tasks)
+            if row == len(self.next_at):
+                self._grow()
+            self.next_at[row] = task.next_at
+            self.last_start[row] = task.last_start
+            self.interval[row] = task.repeat_interval()
+            self.priority[row] = task.priority
+            flags = 0
+            if task.repeat_every:
+                flags |= self.FLAG_REPEATS
+            if task.cron is not None:
+                flags |= self.FLAG_CRON
+            if task.paused:
+                flags |= self.FLAG_PAUSED
+            self.flags[row] = flags
+            task._table, task._row = self, row
+            self.tasks.append(task)
+            return row
+
+    def _grow(self) -> None:
+        """Doubles the capacity of all arrays."""
+        size = len(self.next_at) * 2
+        for name in ("next_at", "last_start", "interval", "flags", "priority"):
+            array = getattr(self, name)
+            grown = np.zeros(size, dtype=array.dtype)
+            grown[: len(array)] = array
+            setattr(self, name, grown)
+
+    def ready(self, now: float) -> np.ndarray:
+        """Returns the rows of the tasks ready to run at `now`, by priority (highest first),
+        then by how long they have been due and then by row."""
+        with _TABLE_LOCK:
+            size = len(self.tasks)
+            next_at = self.next_at[:size].copy()
+            paused = (self.flags[:size] & self.FLAG_PAUSED) != 0
+            priority = self.priority[:size]
+        mask = (next_at == Task.RUN_ASAP) | ((next_at > 0) & (next_at < now))
+        mask &= ~paused
+        rows = np.flatnonzero(mask)
+        return rows[np.lexsort((rows, next_at[rows], -priority[rows]))]
+
+    def ready_tasks(self, now: float) -> list[Task]:
+        """Returns the tasks ready to run at `now`."""
+        return [self.tasks[row] for row in self.ready(now)]
+
+    def reschedule(self, rows: np.ndarray, now: float) -> None:
+        """Reschedules `rows` at once. Same as calling :meth:`Task.reschedule` on each task
+        but without logging: interval tasks are updated with a single vectorized operation,
+        cron tasks are computed one by one and tasks that don't repeat get disabled."""
+        rows = np.asarray(rows, dtype=np.intp)
+        with _TABLE_LOCK:
+            flags = self.flags[rows]
+            by_interval = rows[(flags & self.FLAG_REPEATS) != 0]
+            self.next_at[by_interval] = (
+                self.last_start[by_interval] + self.interval[by_interval]
+            )
+            for row in rows[(flags & self.FLAG_CRON) != 0]:
+                self.next_at[row] = self.tasks[row].cron.next_after(now)
+            never = rows[(flags & (self.FLAG_REPEATS | self.FLAG_CRON)) == 0]
+            self.next_at[never] = Task.RUN_NEVER
+
+    def __len__(self):
+        return len(self.tasks)
+
+
 class TaskFileParser:
     """Parses a tasks file and loads a TaskList."""
 
     REQUIRED_TASK_FIELDS: list[str] = ["name", "strategy"]
     """ Fields that must be declared in all tasks. """
 
-    def __init__(self, root: Path, blockchain: Blockchain, strategies: StrategiesDict):
+    def __init__(
+        self,
+        root: Path,
+        blockchain: Blockchain,
+        strategies: StrategiesDict,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
         self.root: Path = root
         """ Root of the project. """
         self.blockchain: Blockchain = blockchain
         """ :class:`Blockchain` used by tasks. """
         self.strategies: StrategiesDict = strategies
         """ Strategies dictionary. """
+        self.clock: Clock = clock
+        """ Clock of the created tasks. """
 
     def load(self) -> TaskList:
         """Loads TaskList from tasks file."""
-        with open(self.root / TASKS_FILE) as fp:
-            tasks = self._load_tasks_json_or_exception(fp)
-            return self._create_tasklist(tasks)
-
-    def _load_tasks_json_or_exception(self, fhandle: TextIO) -> RawTasksData:
-        """Parses TextIO input as JSON, validates and returns raw data.
-        May raise :exc:`TasksFileParseError`."""
+        return TaskList(list(self.iter_load()))
+
+    def iter_load(self) -> Iterator[Task]:
+        """Yields tasks one by one while the tasks file is read.
+        Tasks can be scheduled before the whole file is loaded."""
+        for ix, data in enumerate(self.iter_raw()):
+            yield self.create_task(ix, data)
+
+    def iter_raw(self) -> Iterator[dict]:
+        """Yields validated raw task data from the tasks file. Uses the compiled
+        `tasks.ndjson` (see :func:`compile_tasks_file`) if it's up to date."""
+        path = self.tasks_file()
+        with open(path) as fp:
+            if path.suffix == TASKS_NDJSON_FILE.suffix:
+                yield from self._iter_validated(iter_ndjson(fp))
+            else:
+                yield from self._iter_validated(iter_json_list(fp))
+
+    def tasks_file(self) -> Path:
+        """Returns the path of the file to load tasks from."""
+        source, compiled = self.root / TASKS_FILE, self.root / TASKS_NDJSON_FILE
+        if not compiled.is_file():
+            return source
+        if source.is_file() and source.stat().st_mtime > compiled.stat().st_mtime:
+            _logger.warning(f"{compiled} is older than {source}, ignoring it.")
+            return source
+        return compiled
+
+    def _iter_validated(self, items: Iterator[Any]) -> Iterator[dict]:
+        """Validates each item of `items` as it's parsed. Task names must be unique."""
+        names: set[str] = set()
         try:
-            data = json.load(fhandle)
-            self._validate_raw_data(data)
-            return RawTasksData(data)
+            for task in items:
+                self._validate_task(task)
+                if task["name"] in names:
+                    raise TasksFileParseError(f"Duplicated task name '{task['name']}'")
+                names.add(task["name"])
+                yield task
         except json.JSONDecodeError as err:
             raise TasksFileParseError("Error parsing tasks.json as JSON") from err
 
@@ -153,24 +463,162 @@ class TaskFileParser:
         """Validates raw tasks data format. May raise :exc:`TasksFileParseError`."""
         if not isinstance(data, list):
             raise TasksFileParseError("tasks.json must be a list of dicts")
-        for task in data:
-            if not isinstance(task, dict):
-                raise TasksFileParseError("All tasks in tasks.json must dicts")
-            if not all(field in task.keys() for field in self.REQUIRED_TASK_FIELDS):
-                fields = ", ".join(self.REQUIRED_TASK_FIELDS)
+        for _ in self._iter_validated(iter(data)):
+            pass
+
+    def _validate_task(self, task: Any) -> None:
+        """Validates the raw data of a single task. May raise :exc:`TasksFileParseError`."""
+        if not isinstance(task, dict):
+            raise TasksFileParseError("All tasks in tasks.json must dicts")
+        if not all(field in task.keys() for field in self.REQUIRED_TASK_FIELDS):
+            fields = ", ".join(self.REQUIRED_TASK_FIELDS)
+            raise TasksFileParseError(
+                f"All tasks must declare all the following fields: {fields}"
+            )
+        if "cron" in task.keys():
+            if not isinstance(task["cron"], str):
+                raise TasksFileParseError("Task 'cron' must be a string")
+            if task.get("repeat_every"):
+                raise TasksFileParseError(
+                    f"Task '{task['name']}' can't declare both 'cron' and 'repeat_every'"
+                )
+        if "shard_key" in task.keys() and not isinstance(task["shard_key"], str):
+            raise TasksFileParseError("Task 'shard_key' must be a string")
+        if "priority" in task.keys() and type(task["priority"]) is not int:
+            raise TasksFileParseError("Task 'priority' must be an integer")
+        if "lane" in task.keys() and not isinstance(task["lane"], str):
+            raise TasksFileParseError("Task 'lane' must be a string")
+        if "deadline" in task.keys():
+            deadline = task["deadline"]
+            if type(deadline) not in (int, float) or deadline < 0:
+                raise TasksFileParseError(
+                    "Task 'deadline' must be a positive amount of seconds"
+                )
+        if "trigger" in task.keys():
+            if not isinstance(task["trigger"], dict):
+                raise TasksFileParseError("Task 'trigger' must be a dict")
+            if task.get("repeat_every") or "cron" in task.keys() or "after" in task:
+                raise TasksFileParseError(
+                    f"Task '{task['name']}' has a trigger, "
+                    "it can't declare 'repeat_every', 'cron' or 'after'"
+                )
+        condition = task.get("condition", [])
+        if not isinstance(condition, (dict, list)):
+            raise TasksFileParseError("Task 'condition' must be a dict or a list")
+        if "max_gas_price" in task.keys():
+            price = task["max_gas_price"]
+            if type(price) not in (int, float) or price <= 0:
                 raise TasksFileParseError(
-                    f"All tasks must declare all the following fields: {fields}"
+                    "Task 'max_gas_price' must be a positive number"
+                )
+        if "max_defer" in task.keys():
+            if not isinstance(task["max_defer"], dict):
+                raise TasksFileParseError("Task 'max_defer' must be a dict")
+            if "max_gas_price" not in task.keys():
+                raise TasksFileParseError(
+                    f"Task '{task['name']}' declares 'max_defer' without 'max_gas_price'"
+                )
+        if "profile" in task.keys() and type(task["profile"]) is not bool:
+            raise TasksFileParseError("Task 'profile' must be a boolean")
+        if "after" in task.keys():
+            after = task["after"]
+            if not isinstance(after, list) or any(type(n) is not str for n in after):
+                raise TasksFileParseError("Task 'after' must be a list of task names")
+            if task.get("repeat_every") or "cron" in task.keys():
+                raise TasksFileParseError(
+                    f"Task '{task['name']}' runs after other tasks, "
+                    "it can't declare 'repeat_every' or 'cron'"
                 )
 
     def _create_tasklist(self, tasks: RawTasksData) -> TaskList:
         """Creates a list of :class:`Task` objects from raw data. May raise :exc:`TaskLoadError`."""
-        out = []
-        for ix, data in enumerate(tasks):
-            strat = self._create_strat_from_data(data)
-            repeat = data.get("repeat_every", {})
-            item = Task(ix, strat, Task.RUN_ASAP, repeat_every=repeat)
-            out.append(item)
-        return TaskList(out)
+        return TaskList([self.create_task(ix, data) for ix, data in enumerate(tasks)])
+
+    def create_task(self, ix: int, data: dict) -> Task:
+        """Creates a single :class:`Task` from raw data. May raise :exc:`TaskLoadError`."""
+        strat = self._create_strat_from_data(data)
+        repeat = data.get("repeat_every", {})
+        cron, first_at = self._create_cron_from_data(data)
+        trigger = self._create_trigger_from_data(data)
+        conditions = self._create_conditions_from_data(data)
+        max_gas_price, max_defer = self._create_gas_limits_from_data(data)
+        if first_at is not None:
+            next_at = first_at
+        elif data.get("after") or trigger:
+            # Runs when the tasks it depends on finish or when the trigger fires
+            next_at = Task.RUN_NEVER
+        else:
+            next_at = Task.RUN_ASAP
+        return Task(
+            ix,
+            strat,
+            next_at,
+            repeat_every=repeat,
+            cron=cron,
+            priority=data.get("priority", 0),
+            lane=data.get("lane", Task.DEFAULT_LANE),
+            deadline=data.get("deadline"),
+            trigger=trigger,
+            conditions=conditions,
+            max_gas_price=max_gas_price,
+            max_defer=max_defer,
+            profile_dir=self.root / PROFILES_DIR if data.get("profile") else None,
+            clock=self.clock,
+        )
+
+    def _create_cron_from_data(
+        self, data: dict
+    ) -> tuple[CronSchedule | None, int | None]:
+        """Compiles the task cron expression if any and returns it with its first fire time.
+        Expressions that never fire (e.g. ``0 0 31 2 *``) fail here too.
+        May raise :exc:`TaskLoadError`."""
+        if "cron" not in data.keys():
+            return None, None
+        try:
+            cron = compile_cron(data["cron"])
+            return cron, cron.next_after(self.clock.time())
+        except CronError as err:
+            raise TaskLoadError(f"Error loading task '{data['name']}': {err}")
+
+    def _create_trigger_from_data(self, data: dict) -> Trigger | None:
+        """Creates the task trigger if any. May raise :exc:`TaskLoadError`."""
+        if "trigger" not in data.keys():
+            return None
+        try:
+            return create_trigger(data["trigger"], self.blockchain)
+        except TriggerError as err:
+            raise TaskLoadError(f"Error loading task '{data['name']}': {err}")
+
+    def _create_conditions_from_data(self, data: dict) -> list[Condition]:
+        """Creates the conditions of the task and checks that their contracts and functions
+        exist. May raise :exc:`TaskLoadError`."""
+        raw = data.get("condition", [])
+        raw = raw if isinstance(raw, list) else [raw]
+        try:
+            conditions = [Condition.from_data(cond) for cond in raw]
+            for cond in conditions:
+                cond.validate(self.blockchain)
+            return conditions
+        except ConditionError as err:
+            raise TaskLoadError(f"Error loading task '{data['name']}': {err}")
+
+    def _create_gas_limits_from_data(self, data: dict) -> tuple[int | None, int | None]:
+        """Returns the gas price ceiling in wei and the maximum deferral in seconds of the
+        task. The ceiling uses the `transactions.gasPrice.unit` config. May raise
+        :exc:`TaskLoadError`."""
+        from web3 import Web3
+
+        if "max_gas_price" not in data.keys():
+            return None, None
+        unit = self.blockchain.config.get("transactions.gasPrice.unit")
+        max_gas_price = int(Web3.toWei(data["max_gas_price"], unit))
+        if "max_defer" not in data.keys():
+            return max_gas_price, None
+        try:
+            max_defer = int(timedelta(**data["max_defer"]).total_seconds())
+        except TypeError as err:
+            raise TaskLoadError(f"Error loading task '{data['name']}': {err}")
+        return max_gas_price, max_defer
 
     def _create_strat_from_data(self, data: dict) -> BaseStrategy:
         """Creates a single :class:`Task` object from raw data. May raise :exc:`TaskLoadError`."""
@@ -188,6 +636,111 @@ class TaskFileParser:
         raise UnkownStrategyError(f"Can't find strategy '{name}'")
 
 
+def task_digest(data: dict) -> str:
+    """Returns a digest of the raw data of a task, used to detect changes."""
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def task_shard_key(data: dict) -> str:
+    """Returns the `shard_key` of a task from its raw data, or its name if it doesn't have one."""
+    return data.get("shard_key") or data["name"]
+
+
+def task_shard(data: dict, shards: int) -> int:
+    """Returns the shard of a task from its raw data, by a stable hash of :func:`task_shard_key`."""
+    return zlib.crc32(task_shard_key(data).encode()) % shards
+
+
+def iter_json_list(fhandle: TextIO, chunk_size: int = 2**16) -> Iterator[Any]:
+    """Incrementally parses a JSON list from `fhandle`, yielding each item as soon as
+    it's read. Only `chunk_size` characters and the item being parsed are kept in memory.
+    May raise :exc:`json.JSONDecodeError` or :exc:`TasksFileParseError`."""
+    decoder = json.JSONDecoder()
+    buffer, eof = "", False
+
+    def _fill(pos: int) -> int:
+        """Reads more data, drops the consumed part of the buffer and returns the new position."""
+        nonlocal buffer, eof
+        chunk = fhandle.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        return 0
+
+    def _skip_whitespace(pos: int) -> int:
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return pos
+            pos = _fill(pos)
+
+    pos = _skip_whitespace(_fill(0))
+    if pos == len(buffer) or buffer[pos] != "[":
+        raise TasksFileParseError("tasks.json must be a list of dicts")
+    pos = _skip_whitespace(pos + 1)
+    if pos < len(buffer) and buffer[pos] == "]":
+        return
+    while True:
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            pos = _fill(pos)
+            continue
+        if end == len(buffer) and not eof:
+            # Numbers or literals may continue in the next chunk
+            pos = _fill(pos)
+            continue
+        yield item
+        pos = _skip_whitespace(end)
+        if pos == len(buffer):
+            raise json.JSONDecodeError("Unterminated list", buffer, pos)
+        if buffer[pos] == "]":
+            return
+        if buffer[pos] != ",":
+            raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+        pos = _skip_whitespace(pos + 1)
+
+
+def iter_ndjson(fhandle: TextIO) -> Iterator[Any]:
+    """Parses newline delimited JSON from `fhandle`, yielding one item per line."""
+    for line in fhandle:
+        if line.strip():
+            yield json.loads(line)
+
+
+def compile_tasks_file(root: Path, output: Path | None = None) -> int:
+    """Validates `tasks.json` and converts it to newline delimited JSON, which
+    :class:`TaskFileParser` loads faster and with constant memory.
+    Returns the amount of tasks written. May raise :exc:`TasksFileParseError`."""
+    output = output or root / TASKS_NDJSON_FILE
+    parser = TaskFileParser(root, None, {})
+    index = StrategyIndex.load(root)
+    count = 0
+    with open(root / TASKS_FILE) as src, open(output, "w") as dst:
+        for task in parser._iter_validated(iter_json_list(src)):
+            if index.files:
+                _check_strategy_params(index, task)
+            dst.write(json.dumps(task, separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+def _check_strategy_params(index: StrategyIndex, data: dict) -> None:
+    """Checks the strategy and params of a task against the strategies index.
+    May raise :exc:`TasksFileParseError`."""
+    meta = index.get(data["strategy"])
+    if meta is None:
+        raise TasksFileParseError(
+            f"Error loading task '{data['name']}': Can't find strategy '{data['strategy']}'"
+        )
+    try:
+        meta.check_params(data.get("params", {}))
+    except StrategyParamsError as err:
+        raise TasksFileParseError(f"Error loading task '{data['name']}': {err}")
+
+
 class TasksFileParseError(Exception):
     """Error while parsing tasks.json"""
 
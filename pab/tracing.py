@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import time
+import secrets
+import logging
+import threading
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
+
+if TYPE_CHECKING:
+    from pab.config import Config
+
+__all__ = [
+    "Span",
+    "SpanExporter",
+    "JSONLExporter",
+    "Tracer",
+    "TRACER",
+    "configure_tracing",
+    "summarize_traces",
+]
+
+
+_logger = logging.getLogger("pab.tracing")
+
+
+class Span:
+    """Timed operation. Spans started while another span is active in the same thread
+    are its children and share its trace id."""
+
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "start",
+        "end",
+        "attributes",
+        "error",
+    )
+
+    def __init__(self, name: str, parent: Span | None, attributes: dict[str, Any]):
+        self.trace_id: str = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id: str = secrets.token_hex(8)
+        self.parent_id: str | None = parent.span_id if parent else None
+        self.name = name
+        self.start: int = time.time_ns()
+        self.end: int | None = None
+        self.attributes = attributes
+        self.error: str | None = None
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds, 0 while the span is active."""
+        return (self.end - self.start) / 1e9 if self.end else 0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns the span with the field names used by OpenTelemetry collectors."""
+        status = (
+            {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"}
+        )
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start,
+            "endTimeUnixNano": self.end,
+            "attributes": self.attributes,
+            "status": status,
+        }
+
+
+class SpanExporter(ABC):
+    """Receives finished spans."""
+
+    @abstractmethod
+    def export(self, span: Span) -> None: ...
+
+
+class JSONLExporter(SpanExporter):
+    """Appends each finished span as a JSON line to `path`."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", buffering=1, encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+_CURRENT_SPAN: ContextVar[Span | None] = ContextVar("pab_current_span", default=None)
+
+
+class Tracer:
+    """Creates spans and sends them to its exporter. Without an exporter, spans are not created."""
+
+    def __init__(self, exporter: SpanExporter | None = None):
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span | None]:
+        """Times the block in a span that's a child of the current span, if any.
+        Yields None when tracing is disabled."""
+        exporter = self.exporter
+        if exporter is None:
+            yield None
+            return
+        span = Span(name, _CURRENT_SPAN.get(), attributes)
+        token = _CURRENT_SPAN.set(span)
+        try:
+            yield span
+        except BaseException as err:
+            span.error = f"{type(err).__name__}: {err}"
+            raise
+        finally:
+            span.end = time.time_ns()
+            _CURRENT_SPAN.reset(token)
+            try:
+                exporter.export(span)
+            except Exception as err:
+                _logger.error(f"Error exporting span: {err}")
+
+    def current_span(self) -> Span | None:
+        """Returns the span active in the current thread."""
+        return _CURRENT_SPAN.get()
+
+
+TRACER = Tracer()
+""" Tracer used by PAB. Disabled until :func:`configure_tracing` is called with `tracing.enabled`. """
+
+
+def configure_tracing(root: Path, config: Config) -> None:
+    """Exports the spans of :data:`TRACER` to `tracing.file` if `tracing.enabled` is set."""
+    if config.get("tracing.enabled") and TRACER.exporter is None:
+        TRACER.exporter = JSONLExporter(root / config.get("tracing.file"))
+
+
+def summarize_traces(path: Path) -> dict[str, dict[str, Any]]:
+    """Summarizes the task traces in a JSONL file written by :class:`JSONLExporter`.
+
+    Returns, for each task, the amount of runs, the mean duration of a run and the mean time
+    spent in each kind of span during a run, slowest first. Nested spans are counted
+    in their own name and in their parents."""
+    spans = []
+    with open(path, encoding="utf-8") as fp:
+        for line in fp:
+            if line.strip():
+                spans.append(json.loads(line))
+    roots = {}
+    for span in spans:
+        if span["name"] == "task.process":
+            roots[span["traceId"]] = span
+    times: dict[str, dict[str, float]] = {}
+    runs: dict[str, list[float]] = {}
+    for span in spans:
+        root = roots.get(span["traceId"])
+        if root is None:
+            continue
+        task = root["attributes"].get("task", "")
+        elapsed = (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e9
+        if span is root:
+            runs.setdefault(task, []).append(elapsed)
+        else:
+            by_name = times.setdefault(task, {})
+            by_name[span["name"]] = by_name.get(span["name"], 0) + elapsed
+    summary = {}
+    for task, durations in sorted(runs.items()):
+        count = len(durations)
+        spent = sorted(times.get(task, {}).items(), key=lambda item: -item[1])
+        summary[task] = {
+            "runs": count,
+            "mean": sum(durations) / count,
+            "spans": {name: total / count for name, total in spent},
+        }
+    return summary
@@ -1,7 +1,11 @@
 import logging
+import threading
 
 from typing import TYPE_CHECKING, Callable, Optional
 
+from pab.metrics import GAS_SPENT, GAS_USED, TRANSACTIONS
+from pab.tracing import TRACER
+
 if TYPE_CHECKING:
     import web3
     from web3.types import TxReceipt, Wei
@@ -19,6 +23,8 @@ class TransactionHandler:
         """ ChainID of current blockchain for transactions. """
         self.config = config
         """ Config data. """
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
 
     def transact(
         self,
@@ -30,13 +36,39 @@ class TransactionHandler:
         """Submits transaction and returns receitp."""
         if not timeout:
             timeout = self.config.get("transactions.timeout")
-        stxn = self._build_signed_txn(account, func, args)
-        sent = self.w3.eth.send_raw_transaction(stxn.rawTransaction)
-        rcpt = self.w3.eth.wait_for_transaction_receipt(sent, timeout=timeout)
+        with TRACER.span("transact", account=account.address) as span:
+            # Transactions from the same account are serialized to avoid nonce
+            # collisions when strategies run concurrently.
+            with self._account_lock(account.address):
+                with TRACER.span("build_signed_txn"):
+                    stxn = self._build_signed_txn(account, func, args)
+                with TRACER.span("send_raw_transaction"):
+                    sent = self.w3.eth.send_raw_transaction(stxn.rawTransaction)
+                with TRACER.span("wait_for_transaction_receipt"):
+                    rcpt = self.w3.eth.wait_for_transaction_receipt(
+                        sent, timeout=timeout
+                    )
+            if span is not None:
+                span.set_attribute("hash", sent.hex())
+                span.set_attribute("gasUsed", rcpt["gasUsed"])
         self.logger.info(f"Block Hash: {rcpt['blockHash'].hex()}")
         self.logger.info(f"Gas Used: {rcpt['gasUsed']}")
+        self._record_receipt(rcpt)
         return rcpt
 
+    def _record_receipt(self, rcpt: "TxReceipt") -> None:
+        """Updates transaction metrics with a receipt."""
+        status = "success" if rcpt.get("status", 1) == 1 else "failed"
+        TRANSACTIONS.inc(status=status)
+        GAS_USED.inc(rcpt["gasUsed"])
+        price = rcpt.get("effectiveGasPrice") or self.gas_price()
+        GAS_SPENT.inc(rcpt["gasUsed"] * price)
+
+    def _account_lock(self, address: str) -> threading.Lock:
+        """Returns the lock used to serialize transactions of `address`."""
+        with self._locks_lock:
+            return self._locks.setdefault(address, threading.Lock())
+
     def _build_signed_txn(
         self, account: "LocalAccount", func: Callable, args: tuple
     ) -> "SignedTransaction":
@@ -67,11 +99,16 @@ class TransactionHandler:
         return int(call.estimateGas())
 
     def gas_price(self) -> "Wei":
+        """Returns the gas price used for transactions, from the PAB configs."""
         return self.w3.toWei(
             self.config.get("transactions.gasPrice.number"),
             self.config.get("transactions.gasPrice.unit"),
         )
 
+    def network_gas_price(self) -> "Wei":
+        """Returns the current gas price of the network."""
+        return self.w3.eth.gas_price
+
 
 class TransactionError(Exception):
     pass
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+
+from pab.conditions import Condition, ConditionError, evaluate_conditions
+
+if TYPE_CHECKING:
+    from pab.blockchain import Blockchain
+
+__all__ = [
+    "Trigger",
+    "BlocksTrigger",
+    "EventTrigger",
+    "ConditionTrigger",
+    "ChainWatcher",
+    "TriggerError",
+    "create_trigger",
+]
+
+
+_logger = logging.getLogger("pab.triggers")
+
+
+class Trigger:
+    """Base class for chain triggers. Tasks with a trigger run when it fires instead of on a schedule."""
+
+
+@dataclass(frozen=True)
+class BlocksTrigger(Trigger):
+    """Fires every :attr:`every` new blocks."""
+
+    every: int
+
+
+@dataclass(frozen=True)
+class EventTrigger(Trigger):
+    """Fires when a contract emits an event."""
+
+    contract: str
+    event: str
+    address: str
+    """ Checksum address of the contract """
+    topic: str
+    """ Hex topic of the event signature """
+
+
+@dataclass(frozen=True)
+class ConditionTrigger(Trigger):
+    """Fires when a condition changes from false to true between blocks."""
+
+    condition: Condition
+
+
+def create_trigger(data: Any, blockchain: Blockchain) -> Trigger:
+    """Creates a trigger from the `trigger` field of a task. May raise :exc:`TriggerError`.
+
+    * ``{"type": "blocks", "every": 10}``
+    * ``{"type": "event", "contract": "MasterChef", "event": "Deposit"}``
+    * ``{"type": "condition", "contract": "MasterChef", "function": "pendingCake",
+      "args": [0, "0x..."], "op": ">", "value": 1000}``
+    """
+    if not isinstance(data, dict) or "type" not in data:
+        raise TriggerError("Trigger must be a dict with a 'type'")
+    kind = data["type"]
+    if kind == "blocks":
+        every = data.get("every", 1)
+        if type(every) is not int or every < 1:
+            raise TriggerError("Blocks trigger 'every' must be a positive integer")
+        return BlocksTrigger(every)
+    if kind == "event":
+        return _create_event_trigger(data, blockchain)
+    if kind == "condition":
+        try:
+            cond = Condition.from_data({k: v for k, v in data.items() if k != "type"})
+            cond.validate(blockchain)
+        except ConditionError as err:
+            raise TriggerError(str(err))
+        return ConditionTrigger(cond)
+    raise TriggerError(f"Unknown trigger type '{kind}'")
+
+
+def _create_event_trigger(data: dict, blockchain: Blockchain) -> EventTrigger:
+    from eth_utils import event_abi_to_log_topic
+    from web3 import Web3
+
+    if not {"contract", "event"} <= data.keys():
+        raise TriggerError("Event trigger must declare 'contract' and 'event'")
+    contract = blockchain.contracts.contracts.get(data["contract"])
+    if contract is None:
+        raise TriggerError(f"Contract '{data['contract']}' not found")
+    for abi in json.loads(contract.abi):
+        if abi.get("type") == "event" and abi.get("name") == data["event"]:
+            topic = _to_hex(event_abi_to_log_topic(abi))
+            address = Web3.toChecksumAddress(contract.address)
+            return EventTrigger(data["contract"], data["event"], address, topic)
+    raise TriggerError(f"Event '{data['event']}' not found in '{data['contract']}'")
+
+
+def _to_hex(value: str | bytes) -> str:
+    """Returns `value` as a 0x prefixed hex string."""
+    value = value if isinstance(value, str) else value.hex()
+    return value if value.startswith("0x") else "0x" + value
+
+
+class ChainWatcher:
+    """Polls the chain for new blocks from a single thread and fires the triggers of all tasks.
+
+    On each new block, blocks triggers are checked, logs of all event triggers are read
+    with one `eth_getLogs` call, and conditions are evaluated. `callback` is called from
+    the watcher thread with the names of the tasks whose triggers fired."""
+
+    MAX_BLOCK_RANGE = 2000
+    """ Maximum amount of blocks to read logs from in a single call. """
+
+    def __init__(
+        self,
+        blockchain: Blockchain,
+        callback: Callable[[list[str]], None],
+        interval: float,
+    ):
+        self.blockchain = blockchain
+        self.callback = callback
+        self.interval = interval
+        self.last_block: int | None = None
+        """ Last block processed. """
+        self._triggers: dict[str, Trigger] = {}
+        self._fired_at: dict[str, int] = {}
+        self._conditions: dict[str, bool] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def set_triggers(self, triggers: dict[str, Trigger]) -> None:
+        """Sets the triggers to watch by task name, dropping the state of removed tasks.
+        Thread-safe."""
+        with self._lock:
+            self._triggers = dict(triggers)
+            self._fired_at = {k: v for k, v in self._fired_at.items() if k in triggers}
+            self._conditions = {
+                k: v for k, v in self._conditions.items() if k in triggers
+            }
+
+    def poll(self) -> list[str]:
+        """Checks for new blocks and returns the names of the tasks whose triggers fired.
+        The state of triggers is only updated if all checks succeed, so a failed poll
+        checks the same blocks again."""
+        head = self.blockchain.w3.eth.block_number
+        if self.last_block is None:
+            self.last_block = head
+            return []
+        if head <= self.last_block:
+            return []
+        with self._lock:
+            triggers = dict(self._triggers)
+        fired, fired_at = self._check_blocks(triggers, head)
+        fired += self._check_events(triggers, self.last_block + 1, head)
+        fired_conds, conditions = self._check_conditions(triggers, head)
+        fired += fired_conds
+        with self._lock:
+            # Triggers may have been removed while polling
+            self._fired_at.update(
+                (k, v) for k, v in fired_at.items() if k in self._triggers
+            )
+            self._conditions.update(
+                (k, v) for k, v in conditions.items() if k in self._triggers
+            )
+        self.last_block = head
+        return fired
+
+    def _check_blocks(
+        self, triggers: dict[str, Trigger], head: int
+    ) -> tuple[list[str], dict[str, int]]:
+        """Returns the names of the fired blocks triggers and the new blocks they fired at."""
+        fired, fired_at = [], {}
+        for name, trigger in triggers.items():
+            if not isinstance(trigger, BlocksTrigger):
+                continue
+            last = self._fired_at.get(name, self.last_block)
+            if head - last >= trigger.every:
+                fired.append(name)
+                last = head
+            fired_at[name] = last
+        return fired, fired_at
+
+    def _check_events(
+        self, triggers: dict[str, Trigger], start: int, end: int
+    ) -> list[str]:
+        by_log: dict[tuple[str, str], list[str]] = {}
+        addresses, topics = set(), set()
+        for name, trigger in triggers.items():
+            if isinstance(trigger, EventTrigger):
+                key = (trigger.address.lower(), trigger.topic)
+                by_log.setdefault(key, []).append(name)
+                addresses.add(trigger.address)
+                topics.add(trigger.topic)
+        if not by_log:
+            return []
+        fired: set[str] = set()
+        for chunk_start in range(start, end + 1, self.MAX_BLOCK_RANGE):
+            logs = self.blockchain.w3.eth.get_logs(
+                {
+                    "fromBlock": chunk_start,
+                    "toBlock": min(chunk_start + self.MAX_BLOCK_RANGE - 1, end),
+                    "address": sorted(addresses),
+                    "topics": [sorted(topics)],
+                }
+            )
+            for log in logs:
+                key = (log["address"].lower(), _to_hex(log["topics"][0]).lower())
+                fired.update(by_log.get(key, []))
+        return sorted(fired)
+
+    def _check_conditions(
+        self, triggers: dict[str, Trigger], head: int
+    ) -> tuple[list[str], dict[str, bool]]:
+        """Returns the names of the fired condition triggers and the new results of all of them."""
+        names = [n for n, t in triggers.items() if isinstance(t, ConditionTrigger)]
+        if not names:
+            return [], {}
+        conditions = [triggers[name].condition for name in names]  # type: ignore
+        results = evaluate_conditions(self.blockchain, conditions, head)
+        fired = [
+            name
+            for name, result in zip(names, results)
+            if result and not self._conditions.get(name, False)
+        ]
+        return fired, dict(zip(names, results))
+
+    def start(self) -> None:
+        """Starts polling in a daemon thread, if not started yet."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._loop, name="pab-chain", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                fired = self.poll()
+            except Exception as err:
+                _logger.error(f"Error polling chain: {err}")
+                continue
+            if fired:
+                _logger.debug(f"Triggers fired for {len(fired)} tasks")
+                self.callback(fired)
+
+
+class TriggerError(ValueError):
+    """Invalid trigger."""
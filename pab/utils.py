@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import inspect
 
 from pab.strategy import BaseStrategy
@@ -8,9 +10,10 @@ def amountToDecimal(amount: int, decimals: int = 18) -> float:
     return amount / 10 ** decimals
 
 
-def print_strats(print_params):
+def print_strats(print_params, strats: dict[str, dict] | None = None):
+    """Prints `strats`, in the format of :func:`json_strats`. Defaults to the imported strategies."""
     print("Available strategies:")
-    strats = json_strats()
+    strats = json_strats() if strats is None else strats
     for strat, params in strats.items():
         print(f"* {strat}{':' if print_params else ''}")
         if print_params:
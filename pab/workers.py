@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+
+from pathlib import Path
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable
+
+from pab.config import load_configs
+from pab.jobs import JobQueue, job_owner
+from pab.metrics import Gauge, MetricsServer, Registry
+
+__all__ = ["WorkerSupervisor", "run_worker"]
+
+
+_logger = logging.getLogger("pab.workers")
+
+
+STATS_INTERVAL = 10
+""" Seconds between stats reports from workers to the supervisor. """
+
+
+def run_worker(
+    root: Path,
+    keyfiles: list[Path],
+    envs: list[str],
+    shard: tuple[int, int],
+    log_queue: Any,
+    stats_queue: Any,
+) -> None:
+    """Entrypoint of worker processes. Runs the tasks of `shard`, sending log records
+    to `log_queue` and periodic runner stats to `stats_queue`."""
+    from pab.core import PAB, TasksRunner
+
+    logger = logging.getLogger()
+    logger.handlers = [QueueHandler(log_queue)]
+    logger.setLevel(logging.INFO)
+    pab = PAB(root, keyfiles, envs)
+    runner = TasksRunner(pab, stream=True, shard=shard)
+
+    def _report():
+        while True:
+            stats_queue.put((shard[0], runner.stats()))
+            time.sleep(STATS_INTERVAL)
+
+    threading.Thread(target=_report, name="pab-stats", daemon=True).start()
+    runner.run()
+
+
+class WorkerSupervisor:
+    """Runs tasks in `workers` processes to use more than one core.
+
+    Each worker runs a :class:`pab.core.TasksRunner` with the tasks of its shard (see
+    :func:`pab.task.task_shard`), so a task is always run by the same worker. Tasks that
+    share a `shard_key` (e.g. tasks that send transactions from the same account) are run
+    by the same worker. Workers that exit are restarted after :attr:`RESTART_DELAY` seconds,
+    and the jobs they were running are marked as failed. Log records of all workers are handled
+    by the handlers of the supervisor process, and the stats of all workers are added
+    together in :attr:`registry`."""
+
+    RESTART_DELAY = 5
+    CHECK_INTERVAL = 1
+
+    def __init__(
+        self,
+        root: Path,
+        workers: int,
+        keyfiles: list[Path] | None = None,
+        envs: list[str] | None = None,
+        target: Callable[..., None] = run_worker,
+    ):
+        self.root = root
+        self.workers = workers
+        self.keyfiles = keyfiles or []
+        self.envs = envs or []
+        self.target = target
+        self._ctx = multiprocessing.get_context("spawn")
+        self.log_queue = self._ctx.Queue()
+        self.stats_queue = self._ctx.Queue()
+        self.processes: dict[int, BaseProcess] = {}
+        self.restarts: dict[int, int] = {ix: 0 for ix in range(workers)}
+        """ Amount of times each worker was restarted. """
+        self.worker_stats: dict[int, dict] = {}
+        """ Last stats reported by each worker. """
+        self.jobs: JobQueue | None = None
+        """ Jobs database, if jobs are enabled. Set by :meth:`run`. """
+        self.registry = Registry()
+        """ Metrics of the supervisor, with the values of :meth:`stats`. """
+        self._gauges: dict[str, Gauge] = {}
+        self._exited_at: dict[int, float] = {}
+        self._stop = threading.Event()
+
+    def start_worker(self, index: int) -> BaseProcess:
+        """Starts the worker for shard `index`."""
+        proc = self._ctx.Process(
+            target=self.target,
+            args=(
+                self.root,
+                self.keyfiles,
+                self.envs,
+                (index, self.workers),
+                self.log_queue,
+                self.stats_queue,
+            ),
+            name=f"pab-worker-{index}",
+            daemon=True,
+        )
+        proc.start()
+        self.processes[index] = proc
+        _logger.info(f"Started worker {index} (pid {proc.pid})")
+        return proc
+
+    def check_workers(self) -> None:
+        """Restarts workers that exited at least :attr:`RESTART_DELAY` seconds ago.
+        Jobs claimed by a worker that exited are marked as failed."""
+        now = time.time()
+        for index, proc in list(self.processes.items()):
+            if proc.is_alive():
+                continue
+            if index not in self._exited_at:
+                self._exited_at[index] = now
+                _logger.error(f"Worker {index} exited with code {proc.exitcode}")
+                self._fail_jobs_of(index, proc)
+            if now - self._exited_at[index] >= self.RESTART_DELAY:
+                del self._exited_at[index]
+                self.restarts[index] += 1
+                self.start_worker(index)
+
+    def collect_stats(self) -> None:
+        """Reads stats reported by the workers and updates :attr:`registry`."""
+        while True:
+            try:
+                index, stats = self.stats_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.worker_stats[index] = stats
+        for key, value in self.stats().items():
+            if key not in self._gauges:
+                self._gauges[key] = self.registry.gauge(
+                    f"pab_supervisor_{key}", f"`{key}` in the stats of all workers."
+                )
+            self._gauges[key].set(value)
+
+    def stats(self) -> dict:
+        """Returns the stats of all workers added together."""
+        totals: dict[str, Any] = {
+            "workers": self.workers,
+            "restarts": sum(self.restarts.values()),
+        }
+        for stats in self.worker_stats.values():
+            for key in ("iterations", "processed", "tasks", "ready", "paused"):
+                totals[key] = totals.get(key, 0) + stats.get(key, 0)
+        return totals
+
+    def run(self) -> None:
+        """Starts all workers and supervises them until interrupted."""
+        listener = QueueListener(
+            self.log_queue, *logging.getLogger().handlers, respect_handler_level=True
+        )
+        listener.start()
+        config = load_configs(self.root, self.envs)
+        try:
+            if config.get("jobs.enabled"):
+                self.jobs = JobQueue(self.root / config.get("jobs.database"))
+                self._fail_interrupted_jobs()
+            if config.get("metrics.enabled"):
+                # Workers listen on the ports before
+                MetricsServer(
+                    self.registry,
+                    config.get("metrics.host"),
+                    config.get("metrics.port") + self.workers,
+                ).start()
+            for index in range(self.workers):
+                self.start_worker(index)
+            while not self._stop.wait(self.CHECK_INTERVAL):
+                self.check_workers()
+                self.collect_stats()
+        finally:
+            self.terminate()
+            listener.stop()
+
+    def stop(self) -> None:
+        """Stops supervising workers. Thread-safe."""
+        self._stop.set()
+
+    def terminate(self) -> None:
+        """Terminates all workers."""
+        for proc in self.processes.values():
+            proc.terminate()
+        for proc in self.processes.values():
+            proc.join()
+
+    def _fail_interrupted_jobs(self) -> None:
+        """Marks jobs left running by a previous run as failed. Done once here instead
+        of in each worker, as workers would mark jobs of other workers."""
+        if interrupted := self.jobs.fail_interrupted():  # type: ignore
+            _logger.warning(f"{interrupted} interrupted jobs marked as failed.")
+
+    def _fail_jobs_of(self, index: int, proc: BaseProcess) -> None:
+        """Marks the jobs left running by a worker that exited as failed. They are not
+        retried, as the worker could have already sent their transactions."""
+        if self.jobs is None or proc.pid is None:
+            return
+        if interrupted := self.jobs.fail_interrupted(job_owner(proc.pid)):
+            _logger.warning(
+                f"{interrupted} interrupted jobs of worker {index} marked as failed."
+            )
@@ -25,7 +25,8 @@ setup(
     packages=[
         "pab",
         "pab.resources",
+        "pab.bench",
     ],
-    install_requires=["web3", "hexbytes", "python-dotenv", "projectutils"],
+    install_requires=["web3", "hexbytes", "python-dotenv", "projectutils", "numpy"],
     extras_require={"ui": ["pabui"]},
 )
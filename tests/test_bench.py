@@ -0,0 +1,25 @@
+import pytest
+
+from pab.bench import BenchProject, StubNode, compare_reports, run_benchmarks
+
+
+def test_quick_benchmarks():
+    report = run_benchmarks(["scheduler_tick", "transactions"], quick=True)
+    results = {r["name"]: r for r in report["results"]}
+    assert results["scheduler_tick"]["due"] > 0
+    assert results["transactions"]["ops"] == 10
+    assert results["transactions"]["requests"] >= 30
+    slower = {"results": [dict(r, seconds=r["seconds"] * 2) for r in report["results"]]}
+    assert {c["ratio"] for c in compare_reports(report, slower)} == {2.0}
+    with pytest.raises(ValueError, match="Unknown benchmarks: nope"):
+        run_benchmarks(["nope"])
+
+
+def test_stub_node_answers_batches():
+    with BenchProject() as project:
+        func = project.blockchain.contracts.get("Poke").functions.poke(1)
+        assert project.blockchain.w3.eth.chain_id == BenchProject.CHAIN_ID
+        project.blockchain._http_batch_call([func, func], "latest")
+        assert project.node.requests == 3
+        assert project.node.handle({"id": 1, "method": "eth_foo"})["error"]
+    assert isinstance(project.node, StubNode)
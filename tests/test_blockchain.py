@@ -1,7 +1,80 @@
+import time
+import asyncio
+import threading
+
+import pytest
 import web3
 
-from pab.blockchain import Blockchain
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from pab.accounts import load_accounts
+from pab.bench import BenchProject
+from pab.blockchain import Blockchain, WarmupError
+from pab.config import load_configs
 
 
 def test_w3_connection(blockchain: Blockchain):
     assert isinstance(blockchain.w3, web3.Web3)
+
+
+def test_batch_call_sends_single_request(blockchain: Blockchain):
+    wbtc = blockchain.contracts.get("WBTC")
+    funcs = [
+        wbtc.get_function_by_name("balanceOf")(wbtc.address),
+        wbtc.get_function_by_name("decimals")(),
+    ]
+    response = MagicMock()
+    response.json.return_value = [
+        {"jsonrpc": "2.0", "id": 1, "result": "0x" + "8".rjust(64, "0")},
+        {"jsonrpc": "2.0", "id": 0, "result": "0x" + "64".rjust(64, "0")},
+    ]
+    with patch("requests.post", return_value=response) as post:
+        assert blockchain.batch_call(funcs, 123) == [100, 8]
+    post.assert_called_once()
+    payload = post.call_args.kwargs["json"]
+    assert [call["params"][1] for call in payload] == ["0x7b", "0x7b"]
+
+
+def test_components_are_created_on_first_use(blockchain: Blockchain):
+    assert not blockchain._components
+    assert blockchain.contracts.w3 is blockchain.w3
+    assert blockchain._txn_handler.w3 is blockchain.w3
+
+
+def test_components_are_created_once_across_threads(blockchain: Blockchain):
+    blockchain = Blockchain(blockchain.root, blockchain.config, {})
+    barrier = threading.Barrier(8)
+    created = []
+
+    def _create_w3():
+        created.append(None)
+        time.sleep(0.05)
+        return MagicMock()
+
+    def _use():
+        barrier.wait()
+        return blockchain._txn_handler.w3
+
+    with patch.object(blockchain, "_create_w3", _create_w3):
+        with ThreadPoolExecutor(8) as pool:
+            handlers = list(pool.map(lambda _: _use(), range(8)))
+    assert len(created) == 1
+    assert all(handler is blockchain.w3 for handler in handlers)
+
+
+def test_warmup_runs_preflight_checks():
+    pk = "0x00f02cb8ad2ab4bdd67a59d50535f431d2c89d42144c3ed2fe06c79617ea3a86"
+    with BenchProject() as project, patch.dict("os.environ", {"PAB_PK1": pk}):
+        accounts = load_accounts([])
+        blockchain = Blockchain(project.root, load_configs(project.root), accounts)
+        asyncio.run(blockchain.warmup())
+        assert blockchain.balances == {1: project.node.BALANCE}
+
+        project.write_json("config.json", {"endpoint": project.node.url, "chainId": 56})
+        project.node.code.clear()
+        blockchain = Blockchain(project.root, load_configs(project.root), accounts)
+        with pytest.raises(WarmupError) as err:
+            asyncio.run(blockchain.warmup())
+    assert "'chainId' config is 56" in str(err.value)
+    assert "Contract 'Poke' has no code" in str(err.value)
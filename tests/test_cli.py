@@ -1,3 +1,7 @@
+import os
+import sys
+import subprocess
+
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from unittest.mock import patch
@@ -25,3 +29,37 @@ def test_create_keyfile():
         accs = load_accounts([keyfile])
         assert len(accs) == 1
         assert accs[0].key == HexBytes(pk)
+
+
+HELP_IMPORT_BUDGET_MS = 60
+""" Cumulative import time allowed for `pab.cli` when running `pab --help`. """
+
+
+def test_help_import_time():
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).parents[1]))
+    with TemporaryDirectory() as tmpdir:
+        proc = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                "from pab.cli import ep; ep()",
+                "--help",
+            ],
+            cwd=tmpdir,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    imports = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:") :].split("|")
+            if cumulative.strip().isdigit():
+                imports[name.strip()] = int(cumulative) / 1000
+    assert "pab.cli" in imports
+    for module in ("pab.core", "pab.task", "web3", "numpy", "projectutils.config"):
+        assert module not in imports, f"'pab --help' imports {module}"
+    assert imports["pab.cli"] < HELP_IMPORT_BUDGET_MS
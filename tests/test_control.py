@@ -0,0 +1,60 @@
+import json
+
+from urllib.request import Request, urlopen
+
+from pab.core import PAB, TasksRunner
+from pab.control import ControlServer
+from pab.task import Task
+
+
+def _runner(blockchain) -> TasksRunner:
+    runner = TasksRunner(PAB(blockchain.root))
+    runner.tasks[0].schedule_for(Task.RUN_NEVER)
+    return runner
+
+
+def test_control_list_and_stats(blockchain):
+    control = ControlServer(_runner(blockchain), "127.0.0.1", 0)
+    status, tasks = control.handle("GET", "/tasks", None)
+    assert status == 200
+    assert tasks[0]["name"] == "Test task"
+    assert tasks[0]["next_at"] == Task.RUN_NEVER
+    status, stats = control.handle("GET", "/stats", None)
+    assert status == 200
+    assert stats["tasks"] == 1
+    control.server.server_close()
+
+
+def test_control_run_pause_and_resume(blockchain):
+    runner = _runner(blockchain)
+    control = ControlServer(runner, "127.0.0.1", 0)
+    assert control.handle("POST", "/tasks/Test%20task/run", None)[0] == 202
+    assert control.handle("POST", "/tasks/Test%20task/pause", None)[0] == 202
+    runner._run_commands()
+    assert runner.tasks[0].next_at == Task.RUN_ASAP
+    assert not runner.table.ready(0).size
+    assert control.handle("POST", "/tasks/Test%20task/resume", None)[0] == 202
+    runner._run_commands()
+    assert runner.table.ready(0).size == 1
+    assert control.handle("POST", "/tasks/Missing/run", None)[0] == 404
+    control.server.server_close()
+
+
+def test_control_add_task_over_http(blockchain):
+    runner = _runner(blockchain)
+    control = ControlServer(runner, "127.0.0.1", 0)
+    control.start()
+    host, port = control.address
+    data = {
+        "name": "One shot",
+        "strategy": "CustomStrategy",
+        "params": {"test_var": "x"},
+    }
+    req = Request(
+        f"http://{host}:{port}/tasks", json.dumps(data).encode(), method="POST"
+    )
+    with urlopen(req) as resp:
+        assert resp.status == 202
+    runner._run_commands()
+    assert runner.find_task("One shot").next_at == Task.RUN_ASAP
+    control.stop()
@@ -0,0 +1,68 @@
+import time
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock
+
+from pab.core import PAB, TasksRunner
+from pab.coordination import Coordinator, SQLiteLeaseBackend
+
+
+def test_sqlite_leases_are_exclusive_until_expired():
+    with TemporaryDirectory() as tmpdir:
+        backend = SQLiteLeaseBackend(Path(tmpdir) / "leases.sqlite3")
+        assert backend.acquire(["a", "b"], "node1", 60) == {"a", "b"}
+        assert backend.acquire(["a", "b", "c"], "node2", 60) == {"c"}
+        assert backend.acquire(["a", "b"], "node1", -1) == set()
+        assert backend.acquire(["a", "b", "c"], "node2", 60) == {"a", "b", "c"}
+        backend.release(["a"], "node2")
+        assert backend.acquire(["a"], "node1", 60) == {"a"}
+
+
+def test_coordinator_releases_removed_keys():
+    with TemporaryDirectory() as tmpdir:
+        backend = SQLiteLeaseBackend(Path(tmpdir) / "leases.sqlite3")
+        node1, node2 = Coordinator(backend, "n1", 60), Coordinator(backend, "n2", 60)
+        node1.set_keys(["a", "b"])
+        node2.set_keys(["a", "b"])
+        assert node1.renew() == {"a", "b"}
+        assert node2.renew() == set()
+        assert node1.owns("a") and not node2.owns("a")
+        node1.set_keys(["b"])
+        node1.renew()
+        assert node2.renew() == {"a"}
+        node1.stop()
+        assert node2.renew() == {"a", "b"}
+
+
+def test_live_nodes_split_the_leases():
+    with TemporaryDirectory() as tmpdir:
+        backend = SQLiteLeaseBackend(Path(tmpdir) / "leases.sqlite3")
+        keys = ["a", "b", "c", "d"]
+        assert backend.acquire(keys, "node1", 60) == set(keys)
+        assert backend.acquire(keys, "node2", 60) == set()
+        # The first node releases its excess, then the second node takes it
+        assert backend.acquire(keys, "node1", 60) == {"a", "b"}
+        assert backend.acquire(keys, "node2", 60) == {"c", "d"}
+        backend.release({"c", "d"}, "node2")
+        backend.leave("node2")
+        assert backend.acquire(keys, "node1", 60) == set(keys)
+
+
+def test_only_one_node_runs_each_task(blockchain):
+    with TemporaryDirectory() as tmpdir:
+        backend = SQLiteLeaseBackend(Path(tmpdir) / "leases.sqlite3")
+        runners = [TasksRunner(PAB(blockchain.root)) for _ in range(2)]
+        for ix, runner in enumerate(runners):
+            runner.tasks[0].strategy.run = MagicMock(name="run")
+            runner.coordinator = Coordinator(backend, f"node{ix}", 60)
+            runner.coordinator.set_keys(runner._lease_keys.values())
+            runner.coordinator.renew()
+            runner.process_tasks()
+            runner.join()
+    owner, other = runners
+    owner.tasks[0].strategy.run.assert_called_once()
+    other.tasks[0].strategy.run.assert_not_called()
+    # Not disabled, the other node runs it if it takes over the lease
+    assert other.tasks[0].next_at > time.time()
+    assert other.tasks[0].next_at <= time.time() + TasksRunner.ITERATION_SLEEP
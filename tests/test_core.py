@@ -1,9 +1,18 @@
+import argparse
+import json
+import shutil
+import threading
+
+import pytest
+
 from datetime import datetime, timedelta
-from unittest.mock import MagicMock
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
 
 from pab.strategy import BaseStrategy, SpecificTimeRescheduleError
-from pab.core import PAB, TasksRunner, SingleStrategyRunner
-from pab.task import TaskList, Task
+from pab.core import PAB, TasksRunner, SingleStrategyRunner, SweepRunner
+from pab.task import TaskList, Task, TaskLoadError
 
 RANDOM_DELTA = timedelta(hours=4)
 RANDOM_DATE = datetime.now() + RANDOM_DELTA
@@ -59,6 +68,42 @@ def test_run_single_with_params(blockchain):
     runner.strat.run.assert_called_once()
 
 
+def test_run_single_with_parsed_params(blockchain):
+    pab = PAB(blockchain.root)
+    params = argparse.Namespace(text="asd", value=123)
+    with patch.object(SingleStrategyRunner, "_parse_params") as parse:
+        runner = SingleStrategyRunner(
+            pab, strategy="StrategyTestWithParams", params=params
+        )
+    parse.assert_not_called()
+    assert runner.strat.value == 123
+
+
+def test_sweep_runs_each_row(blockchain):
+    pab = PAB(blockchain.root)
+    with TemporaryDirectory() as tmpdir:
+        params_file = Path(tmpdir) / "params.csv"
+        params_file.write_text("text,value\na,1\nb,2\nc,notanint\nd,4\n")
+        runner = SweepRunner(
+            pab, strategy="StrategyTestWithParams", params_file=params_file, jobs=2
+        )
+        totals = runner.run()
+        assert totals == {"ok": 3, "failed": 1}
+        lines = runner.summary.read_text().splitlines()
+        results = {r["row"]: r for r in map(json.loads, lines)}
+    assert runner.summary == Path(tmpdir) / "params.summary.jsonl"
+    assert sorted(results) == [0, 1, 2, 3]
+    assert results[2]["status"] == "failed"
+    assert "notanint" in results[2]["error"]
+    assert results[3] == {
+        "row": 3,
+        "params": {"text": "d", "value": "4"},
+        "status": "ok",
+        "result": "True",
+        "seconds": results[3]["seconds"],
+    }
+
+
 def test_task_runs(blockchain):
     strat = StrategyTestHarvestNotAvailable(None, "Test Strategy")
     strat.run = MagicMock(name="run")
@@ -68,6 +113,7 @@ def test_task_runs(blockchain):
     runner.tasks = TaskList([item])
     assert len(runner.tasks) == 1
     runner.process_tasks()
+    runner.join()
     strat.run.assert_called_once()
 
 
@@ -78,15 +124,18 @@ def test_task_fails_is_rescheduled(blockchain):
     runner = TasksRunner(pab)
     runner.tasks = TaskList([item])
     runner.process_tasks()
+    runner.join()
     assert runner.tasks[0].next_at == int(RANDOM_DATE.timestamp())
     # Should wait RANDOM_DELTA before calling strat.run again
     strat.run = MagicMock(name="run")
     runner.process_tasks()
+    runner.join()
     strat.run.assert_not_called()
     # If we change the next_at time it should process it
     some_passed_date = (datetime.now() - timedelta(days=1)).timestamp()
     runner.tasks[0].schedule_for(int(some_passed_date))
     runner.process_tasks()
+    runner.join()
     strat.run.assert_called_once()
 
 
@@ -97,8 +146,247 @@ def test_task_repeats(blockchain):
     runner = TasksRunner(pab)
     runner.tasks = TaskList([item])
     runner.process_tasks()
+    runner.join()
     item_next_exec = datetime.fromtimestamp(runner.tasks[0].next_at)
     difference_in_time = item_next_exec - datetime.now()
     assert difference_in_time > timedelta(days=1) and difference_in_time < timedelta(
         days=1, hours=1, seconds=1
     )
+
+
+def test_lanes_dont_wait_for_each_other(blockchain):
+    bulk_started, critical_ran = threading.Event(), threading.Event()
+
+    def _bulk():
+        bulk_started.set()
+        assert critical_ran.wait(5)
+
+    bulk = Task(0, StrategyTestWorks(None, "Bulk"), Task.RUN_ASAP, lane="bulk")
+    bulk.strategy.run = _bulk
+    critical = Task(1, StrategyTestWorks(None, "Critical"), Task.RUN_ASAP)
+    critical.strategy.run = lambda: bulk_started.wait(5) and critical_ran.set()
+    runner = TasksRunner(PAB(blockchain.root))
+    runner.tasks = TaskList([bulk, critical])
+    runner.process_tasks()
+    runner.join()
+    assert critical_ran.is_set()
+
+
+def test_busy_lanes_dont_block_iterations(blockchain):
+    release, fast_ran = threading.Event(), threading.Event()
+    slow = Task(0, StrategyTestWorks(None, "Slow"), Task.RUN_ASAP, lane="bulk")
+    slow.strategy.run = MagicMock(side_effect=lambda: release.wait(5))
+    fast = Task(1, StrategyTestWorks(None, "Fast"), Task.RUN_NEVER)
+    fast.strategy.run = fast_ran.set
+    runner = TasksRunner(PAB(blockchain.root))
+    runner.tasks = TaskList([slow, fast])
+    runner.process_tasks()
+    fast.schedule_for(Task.RUN_ASAP)
+    # Slow is still running and is not dispatched again
+    runner.process_tasks()
+    assert fast_ran.wait(5)
+    release.set()
+    runner.join()
+    slow.strategy.run.assert_called_once()
+
+
+def test_missed_deadlines_are_reported(blockchain):
+    now = int(datetime.now().timestamp())
+    strat = StrategyTestWorks(None, "Late")
+    late = Task(0, strat, now - 120, deadline=60)
+    on_time = Task(1, StrategyTestWorks(None, "On time"), now - 30, deadline=60)
+    runner = TasksRunner(PAB(blockchain.root))
+    runner.tasks = TaskList([late, on_time])
+    runner.process_tasks()
+    runner.join()
+    assert runner.processed == 2
+    assert runner.stats()["missed_deadlines"] == 1
+
+
+def test_tasks_are_skipped_by_conditions(blockchain):
+    runner = TasksRunner(PAB(blockchain.root))
+    tasks = [
+        runner._parser.create_task(
+            ix,
+            {
+                "name": f"Task {ix}",
+                "strategy": "StrategyTestWorks",
+                "repeat_every": {"hours": 1},
+                "condition": {
+                    "contract": "WBTC",
+                    "function": "decimals",
+                    "op": ">",
+                    "value": threshold,
+                },
+            },
+        )
+        for ix, threshold in enumerate([5, 10])
+    ]
+    tasks.append(Task(2, StrategyTestWorks(None, "Not needed"), Task.RUN_ASAP))
+    tasks[2].strategy.should_run = lambda: False
+    for task in tasks:
+        task.strategy.run = MagicMock(name="run")
+    runner.tasks = TaskList(tasks)
+    runner.pab.blockchain.batch_call = MagicMock(return_value=[8])
+    runner.process_tasks()
+    runner.join()
+    runner.pab.blockchain.batch_call.assert_called_once()
+    tasks[0].strategy.run.assert_called_once()
+    tasks[1].strategy.run.assert_not_called()
+    tasks[2].strategy.run.assert_not_called()
+    # Delayed by one iteration, without disabling tasks that don't repeat
+    next_iteration = datetime.now().timestamp() + TasksRunner.ITERATION_SLEEP
+    assert tasks[1].next_at == tasks[2].next_at
+    assert 0 < next_iteration - tasks[2].next_at < 5
+    # Tasks wait when their conditions can't be read
+    tasks[0].schedule_for(Task.RUN_ASAP)
+    runner.pab.blockchain.batch_call.side_effect = ValueError("batch not supported")
+    runner.process_tasks()
+    runner.join()
+    tasks[0].strategy.run.assert_called_once()
+    assert tasks[0].next_at > 0
+
+
+def test_conditions_are_checked_at_load(blockchain):
+    runner = TasksRunner(PAB(blockchain.root))
+    data = {
+        "name": "Typo",
+        "strategy": "StrategyTestWorks",
+        "condition": {"contract": "WBTC", "function": "decimal", "op": ">", "value": 5},
+    }
+    with pytest.raises(TaskLoadError, match="Function 'decimal' not found in 'WBTC'"):
+        runner._parser.create_task(0, data)
+
+
+def test_tasks_are_deferred_by_gas_price(blockchain):
+    runner = TasksRunner(PAB(blockchain.root))
+    tasks = [
+        runner._parser.create_task(
+            ix,
+            {
+                "name": f"Task {ix}",
+                "strategy": "StrategyTestWorks",
+                "max_gas_price": 5,
+                "max_defer": {"hours": 1},
+            },
+        )
+        for ix in range(2)
+    ]
+    assert tasks[0].max_gas_price == 5 * 10**9
+    urgent = Task(2, StrategyTestWorks(None, "Urgent"), Task.RUN_ASAP)
+    for task in tasks + [urgent]:
+        task.strategy.run = MagicMock(name="run")
+    runner.tasks = TaskList(tasks + [urgent])
+    runner.pab.blockchain.network_gas_price = MagicMock(return_value=10 * 10**9)
+    runner.process_tasks()
+    runner.join()
+    runner.pab.blockchain.network_gas_price.assert_called_once()
+    urgent.strategy.run.assert_called_once()
+    tasks[0].strategy.run.assert_not_called()
+    # Deferred for longer than max_defer
+    runner._deferred["Task 0"] -= 3600
+    runner.process_tasks()
+    runner.join()
+    tasks[0].strategy.run.assert_called_once()
+    tasks[1].strategy.run.assert_not_called()
+    runner.pab.blockchain.network_gas_price.return_value = 3 * 10**9
+    runner.process_tasks()
+    runner.join()
+    tasks[1].strategy.run.assert_called_once()
+    assert runner._deferred == {}
+
+
+def test_tasks_runner_stream_loads_on_demand(blockchain):
+    pab = PAB(blockchain.root)
+    runner = TasksRunner(pab, stream=True)
+    assert len(runner.tasks) == 0
+    runner.load_tasks()
+    assert len(runner.tasks) == 1
+    assert len(runner.table) == 1
+    # Ready tasks are left to process_tasks
+    assert runner.processed == 0
+    assert runner.tasks[0].is_ready()
+
+
+def test_tasks_runner_stream_processes_batches(blockchain):
+    data = [
+        {"name": "claim", "strategy": "CustomStrategy", "params": {"test_var": "a"}},
+        {"name": "other", "strategy": "CustomStrategy", "params": {"test_var": "a"}},
+        {
+            "name": "swap",
+            "strategy": "CustomStrategy",
+            "params": {"test_var": "a"},
+            "after": ["claim"],
+        },
+    ]
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir) / "project"
+        shutil.copytree(blockchain.root, root)
+        (root / "tasks.json").write_text(json.dumps(data))
+        runner = TasksRunner(PAB(root), stream=True)
+        runner.LOAD_BATCH_SIZE = 1
+        loaded = []
+        process_tasks = runner.process_tasks
+
+        def _process_tasks():
+            loaded.append(len(runner.tasks))
+            process_tasks()
+            runner.join()
+
+        with patch.object(runner, "process_tasks", _process_tasks):
+            runner.load_tasks(process=True)
+        runner.join()
+    assert loaded == [1, 2]
+    # Runs after 'claim', which finished before 'swap' was loaded
+    assert all(task.last_start > 0 for task in runner.tasks)
+
+
+def test_tasks_runner_reload_keeps_unchanged_tasks(blockchain):
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir) / "project"
+        shutil.copytree(blockchain.root, root)
+        runner = TasksRunner(PAB(root))
+        kept = runner.tasks[0]
+        kept.schedule_for(int(RANDOM_DATE.timestamp()))
+        data = json.loads((root / "tasks.json").read_text())
+        data.append(
+            {"name": "New", "strategy": "CustomStrategy", "params": {"test_var": "a"}}
+        )
+        (root / "tasks.json").write_text(json.dumps(data))
+        runner.reload_tasks()
+        assert len(runner.tasks) == 2
+        assert runner.tasks[0] is kept
+        assert kept.next_at == int(RANDOM_DATE.timestamp())
+        data[1]["params"]["test_var"] = "b"
+        (root / "tasks.json").write_text(json.dumps(data[1:]))
+        runner.reload_tasks()
+        assert len(runner.tasks) == 1
+        assert runner.tasks[0].strategy.test_var == "b"
+
+
+def test_tasks_runner_reload_keeps_runtime_tasks(blockchain):
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir) / "project"
+        shutil.copytree(blockchain.root, root)
+        runner = TasksRunner(PAB(root))
+        runner.add_task(
+            {"name": "Added", "strategy": "CustomStrategy", "params": {"test_var": "a"}}
+        )
+        runner._run_commands()
+        added = runner.find_task("Added")
+        runner._deferred = {"Test task": 1.0, "Added": 1.0}
+        data = json.loads((root / "tasks.json").read_text())
+        data[0]["name"] = "Renamed"
+        (root / "tasks.json").write_text(json.dumps(data))
+        runner.reload_tasks()
+        assert [t.strategy.name for t in runner.tasks] == ["Renamed", "Added"]
+        assert runner.find_task("Added") is added
+        assert runner._deferred == {"Added": 1.0}
+        # The file takes over tasks with the same name
+        data.append(
+            {"name": "Added", "strategy": "CustomStrategy", "params": {"test_var": "b"}}
+        )
+        (root / "tasks.json").write_text(json.dumps(data))
+        runner.reload_tasks()
+        assert runner.find_task("Added").strategy.test_var == "b"
+        assert not runner._runtime
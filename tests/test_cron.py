@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from pab.cron import CronSchedule, CronError, compile_cron
+
+
+def _ts(iso: str) -> int:
+    return int(datetime.fromisoformat(iso).replace(tzinfo=timezone.utc).timestamp())
+
+
+@pytest.mark.parametrize(
+    "expression, start, expected",
+    [
+        ("5 0 * * *", "2024-01-01T00:04:59", "2024-01-01T00:05:00"),
+        ("5 0 * * *", "2024-01-01T00:05:00", "2024-01-02T00:05:00"),
+        ("*/15 * * * *", "2024-01-31T23:59:00", "2024-02-01T00:00:00"),
+        ("0 0 29 2 *", "2024-03-01T00:00:00", "2028-02-29T00:00:00"),
+        ("0 12 * * mon", "2024-01-01T12:00:00", "2024-01-08T12:00:00"),
+        ("0 0 13 * fri", "2024-01-01T00:00:00", "2024-01-05T00:00:00"),
+        ("30 9 * jan-mar 1-5", "2024-03-29T10:00:00", "2025-01-01T09:30:00"),
+        ("@hourly", "2024-12-31T23:30:00", "2025-01-01T00:00:00"),
+    ],
+)
+def test_cron_next_after(expression, start, expected):
+    assert CronSchedule(expression).next_after(_ts(start)) == _ts(expected)
+
+
+def test_cron_next_after_uses_cached_result():
+    cron = CronSchedule("0 0 * * *")
+    first = cron.next_after(_ts("2024-01-01T10:00:00"))
+    assert cron.next_after(_ts("2024-01-01T23:59:59")) == first
+    assert cron.next_after(first) == first + 24 * 60 * 60
+
+
+def test_compile_cron_is_shared():
+    assert compile_cron("5 0 * * *") is compile_cron("5 0 * * *")
+
+
+@pytest.mark.parametrize(
+    "expression", ["* * * *", "60 * * * *", "* * * foo *", "5-1 * * * *", "0 0 31 2 *"]
+)
+def test_cron_invalid_expressions(expression):
+    with pytest.raises(CronError):
+        CronSchedule(expression).next_after(0)
@@ -0,0 +1,121 @@
+import json
+import shutil
+
+import pytest
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock
+
+from pab.core import PAB, TasksRunner
+from pab.graph import TaskGraph
+from pab.task import Task, TasksFileParseError
+
+
+def test_graph_completes_after_all_dependencies():
+    graph = TaskGraph({"claim": [], "harvest": [], "swap": ["claim", "harvest"]})
+    assert graph.complete("claim") == []
+    assert graph.complete("claim") == []
+    assert graph.complete("harvest") == ["swap"]
+    assert graph.complete("swap") == []
+
+
+def test_graph_rejects_cycles_and_unknown_tasks():
+    with pytest.raises(TasksFileParseError, match="circular"):
+        TaskGraph({"a": ["c"], "b": ["a"], "c": ["b"], "d": []})
+    with pytest.raises(TasksFileParseError, match="unknown task 'x'"):
+        TaskGraph({"a": ["x"]})
+    keys = {"a": "a", "b": "b"}
+    assert TaskGraph({"a": [], "b": ["a"]}, None)
+    with pytest.raises(TasksFileParseError, match="different shard_key"):
+        TaskGraph({"a": [], "b": ["a"]}, keys)
+
+
+def test_runner_runs_dependents_in_same_iteration(blockchain):
+    data = [
+        {"name": "claim", "strategy": "CustomStrategy", "params": {"test_var": "a"}},
+        {"name": "harvest", "strategy": "CustomStrategy", "params": {"test_var": "a"}},
+        {
+            "name": "swap",
+            "strategy": "CustomStrategy",
+            "params": {"test_var": "a"},
+            "after": ["claim", "harvest"],
+        },
+        {
+            "name": "deposit",
+            "strategy": "CustomStrategy",
+            "params": {"test_var": "a"},
+            "after": ["swap"],
+        },
+    ]
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir) / "project"
+        shutil.copytree(blockchain.root, root)
+        (root / "tasks.json").write_text(json.dumps(data))
+        runner = TasksRunner(PAB(root))
+    order = []
+    for task in runner.tasks:
+        task.strategy.run = lambda name=task.strategy.name: order.append(name)
+    assert runner.find_task("swap").next_at == Task.RUN_NEVER
+    runner.process_tasks()
+    runner.join()
+    assert sorted(order[:2]) == ["claim", "harvest"]
+    assert order[2:] == ["swap", "deposit"]
+    assert runner.find_task("deposit").next_at == Task.RUN_NEVER
+
+
+def test_dependents_are_deferred_by_gas_price(blockchain):
+    data = [
+        {"name": "claim", "strategy": "CustomStrategy", "params": {"test_var": "a"}},
+        {
+            "name": "swap",
+            "strategy": "CustomStrategy",
+            "params": {"test_var": "a"},
+            "after": ["claim"],
+            "max_gas_price": 5,
+        },
+    ]
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir) / "project"
+        shutil.copytree(blockchain.root, root)
+        (root / "tasks.json").write_text(json.dumps(data))
+        runner = TasksRunner(PAB(root))
+    order = []
+    for task in runner.tasks:
+        task.strategy.run = lambda name=task.strategy.name: order.append(name)
+    runner.pab.blockchain.network_gas_price = MagicMock(return_value=10 * 10**9)
+    runner.process_tasks()
+    runner.join()
+    assert order == ["claim"]
+    assert runner.find_task("swap").is_ready()
+    runner.pab.blockchain.network_gas_price.return_value = 3 * 10**9
+    runner.process_tasks()
+    runner.join()
+    assert order == ["claim", "swap"]
+
+
+def test_dependents_check_should_run(blockchain):
+    data = [
+        {"name": "claim", "strategy": "CustomStrategy", "params": {"test_var": "a"}},
+        {
+            "name": "swap",
+            "strategy": "CustomStrategy",
+            "params": {"test_var": "a"},
+            "after": ["claim"],
+        },
+    ]
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir) / "project"
+        shutil.copytree(blockchain.root, root)
+        (root / "tasks.json").write_text(json.dumps(data))
+        runner = TasksRunner(PAB(root))
+    order = []
+    for task in runner.tasks:
+        task.strategy.run = lambda name=task.strategy.name: order.append(name)
+    swap = runner.find_task("swap")
+    swap.strategy.should_run = MagicMock(return_value=False)
+    runner.process_tasks()
+    runner.join()
+    assert order == ["claim"]
+    swap.strategy.should_run.assert_called_once()
+    assert swap.next_at > 0
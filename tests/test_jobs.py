@@ -0,0 +1,94 @@
+import logging
+import threading
+import subprocess
+import sys
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from pab.core import PAB, TasksRunner
+from pab.jobs import JobPoller, JobQueue, job_owner
+
+from tests.test_core import StrategyTestWithParams
+
+
+def test_job_queue_claim_and_finish():
+    with TemporaryDirectory() as tmpdir:
+        jobs = JobQueue(Path(tmpdir) / "jobs.sqlite3")
+        first = jobs.submit("StrategyTestWorks")
+        second = jobs.submit("StrategyTestWithParams", ["--text", "a", "--value", "1"])
+        claimed = jobs.claim(limit=1)
+        assert [job.id for job in claimed] == [first]
+        assert jobs.get(first).status == JobQueue.RUNNING
+        assert jobs.claim()[0].params == ["--text", "a", "--value", "1"]
+        assert jobs.claim() == []
+        jobs.finish(first)
+        assert jobs.get(first).status == JobQueue.DONE
+        # Jobs of running consumers are left running
+        assert jobs.fail_interrupted() == 0
+        stopped = subprocess.run(
+            [sys.executable, "-c", "import os; print(os.getpid())"],
+            capture_output=True,
+            text=True,
+        )
+        with jobs._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET claimed_by = ? WHERE id = ?",
+                (job_owner(int(stopped.stdout)), second),
+            )
+        assert jobs.fail_interrupted() == 1
+        assert jobs.get(second).error == "Interrupted"
+
+
+def test_runner_runs_jobs(blockchain):
+    with TemporaryDirectory() as tmpdir:
+        jobs = JobQueue(Path(tmpdir) / "jobs.sqlite3")
+        ok = jobs.submit("StrategyTestWithParams", ["--text", "a", "--value", "1"])
+        bad_params = jobs.submit("StrategyTestWithParams", ["--text", "a"])
+        runner = TasksRunner(PAB(blockchain.root))
+        with patch.object(StrategyTestWithParams, "run") as run:
+            for job in jobs.claim():
+                runner.run_job(jobs, job)
+            run.assert_called_once()
+        assert jobs.get(ok).status == JobQueue.DONE
+        assert jobs.get(bad_params).status == JobQueue.FAILED
+        assert "--value" in jobs.get(bad_params).error
+        assert "Traceback" not in jobs.get(bad_params).error
+
+
+def test_failed_job_stores_its_warnings(blockchain):
+    def run():
+        logging.getLogger("pab.strategy.StrategyTestWithParams").warning("Low balance")
+        raise RuntimeError("Out of gas")
+
+    with TemporaryDirectory() as tmpdir:
+        jobs = JobQueue(Path(tmpdir) / "jobs.sqlite3")
+        failed = jobs.submit("StrategyTestWithParams", ["--text", "a", "--value", "1"])
+        runner = TasksRunner(PAB(blockchain.root))
+        with patch.object(StrategyTestWithParams, "run", side_effect=run):
+            runner.run_job(jobs, jobs.claim()[0])
+        assert jobs.get(failed).error == (
+            "pab.strategy.StrategyTestWithParams: Low balance\n"
+            "RuntimeError: Out of gas"
+        )
+
+
+def test_poller_runs_jobs_when_claimed():
+    with TemporaryDirectory() as tmpdir:
+        jobs = JobQueue(Path(tmpdir) / "jobs.sqlite3")
+        ids = [jobs.submit("StrategyTestWorks") for _ in range(3)]
+        done = []
+        finished = threading.Event()
+
+        def run(job):
+            assert threading.current_thread().name.startswith("pab-job")
+            done.append(job.id)
+            if len(done) == len(ids):
+                finished.set()
+
+        poller = JobPoller(jobs, run, 0.01)
+        poller.start()
+        assert finished.wait(5)
+        poller.stop()
+        assert done == ids
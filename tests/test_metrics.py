@@ -0,0 +1,66 @@
+import urllib.request
+
+import pytest
+
+from unittest.mock import MagicMock
+
+from pab.metrics import RPC_ERRORS, RPC_REQUESTS, TASK_RUNS, MetricsServer, Registry
+from pab.middleware import RPCMonitor, RPCStats
+from pab.task import Task
+
+from tests.test_core import StrategyTestWorks
+
+
+def test_render_counters_and_histograms():
+    registry = Registry()
+    runs = registry.counter("runs_total", "Runs.", ("result",))
+    runs.inc(result="ok")
+    runs.inc(2, result='a"b')
+    hist = registry.histogram("duration_seconds", "Duration.", buckets=(1, 5))
+    hist.observe(0.5)
+    hist.observe(3)
+    hist.observe(10)
+    assert registry.counter("runs_total", "Other.", ("result",)) is runs
+    assert runs.value(result="ok") == 1
+    assert hist.count() == 3
+    assert registry.render().splitlines() == [
+        "# HELP runs_total Runs.",
+        "# TYPE runs_total counter",
+        'runs_total{result="a\\"b"} 2',
+        'runs_total{result="ok"} 1',
+        "# HELP duration_seconds Duration.",
+        "# TYPE duration_seconds histogram",
+        'duration_seconds_bucket{le="1.0"} 1',
+        'duration_seconds_bucket{le="5.0"} 2',
+        'duration_seconds_bucket{le="+Inf"} 3',
+        "duration_seconds_sum 13.5",
+        "duration_seconds_count 3",
+    ]
+    with pytest.raises(ValueError, match="requires labels"):
+        runs.inc()
+
+
+def test_metrics_server():
+    registry = Registry()
+    registry.gauge("up", "Up.").set(1)
+    server = MetricsServer(registry, "127.0.0.1", 0)
+    server.start()
+    try:
+        host, port = server.address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as resp:
+            assert resp.read().decode().endswith("up 1\n")
+    finally:
+        server.stop()
+
+
+def test_instrumentation():
+    before = TASK_RUNS.value(strategy="StrategyTestWorks", result="ok")
+    task = Task(0, StrategyTestWorks(None, "works"), Task.RUN_ASAP)
+    task.process()
+    assert TASK_RUNS.value(strategy="StrategyTestWorks", result="ok") == before + 1
+    make_request = MagicMock(return_value={"error": {"code": -32000}})
+    requests = RPC_REQUESTS.value(method="m", strategy="")
+    errors = RPC_ERRORS.value(method="m")
+    RPCMonitor(RPCStats()).middleware(make_request, None)("m", [])
+    assert RPC_REQUESTS.value(method="m", strategy="") == requests + 1
+    assert RPC_ERRORS.value(method="m") == errors + 1
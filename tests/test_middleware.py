@@ -0,0 +1,47 @@
+import logging
+
+import pytest
+
+from unittest.mock import MagicMock
+
+from pab.middleware import RESPONSE_SIZE, RPCMonitor, RPCStats, attribute_calls
+
+
+def test_stats_percentiles_use_recent_calls():
+    stats = RPCStats(window=100)
+    for ix in range(200):
+        stats.record("eth_call", ix / 1000, 10, False, None)
+    assert stats.percentiles("eth_call") == {"p50": 0.15, "p90": 0.19, "p99": 0.199}
+    assert stats.percentiles("eth_getLogs") == {}
+    summary = stats.summary()["methods"]["eth_call"]
+    assert (summary["calls"], summary["errors"], summary["bytes"]) == (200, 0, 2000)
+
+
+def test_monitor_attributes_calls_and_logs_slow_calls(caplog):
+    stats = RPCStats()
+    monitor = RPCMonitor(stats, slow_threshold=0.5)
+
+    def make_request(method, params):
+        RESPONSE_SIZE.set(42)
+        return {"result": "0x1"}
+
+    middleware = monitor.middleware(make_request, None)
+    with attribute_calls("Compound", "BasicCompound"):
+        middleware("eth_blockNumber", [])
+    middleware("eth_blockNumber", [])
+    with caplog.at_level(logging.WARNING, logger="pab.rpc"):
+        monitor.record("eth_getLogs", 0.7, 1000, False)
+    summary = stats.summary()
+    assert summary["methods"]["eth_blockNumber"]["bytes"] == 84
+    assert summary["tasks"] == {
+        "Compound": {"strategy": "BasicCompound", "calls": {"eth_blockNumber": 1}}
+    }
+    assert "Slow RPC call eth_getLogs took 0.700s" in caplog.text
+
+
+def test_monitor_records_failed_requests():
+    stats = RPCStats()
+    middleware = RPCMonitor(stats).middleware(MagicMock(side_effect=OSError), None)
+    with pytest.raises(OSError):
+        middleware("eth_call", [])
+    assert stats.summary()["methods"]["eth_call"]["errors"] == 1
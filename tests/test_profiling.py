@@ -0,0 +1,44 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pab.profiling import find_profiles, hotspots, profile
+from pab.task import Task, TaskFileParser
+
+from tests.test_core import StrategyTestWorks
+
+
+def _busy():
+    return sum(i * i for i in range(200000))
+
+
+def test_profile_and_hotspots():
+    with TemporaryDirectory() as tmpdir:
+        directory = Path(tmpdir) / "profiles"
+        for _ in range(2):
+            with profile(directory, "Compound BNB"):
+                _busy()
+        paths = find_profiles(directory, "Compound BNB")
+        assert len(paths) == 2
+        assert paths[0].name.startswith("Compound_BNB-")
+        assert find_profiles(directory, "Other") == []
+        spots = hotspots(paths, limit=50, sort="cumtime")
+        busy = [spot for spot in spots if spot.function.endswith("(_busy)")]
+        assert busy and busy[0].calls == 2
+
+
+def test_profiled_task(blockchain):
+    with TemporaryDirectory() as tmpdir:
+        strategies = {"StrategyTestWorks": StrategyTestWorks}
+        parser = TaskFileParser(Path(tmpdir), blockchain, strategies)
+        task = parser.create_task(
+            0,
+            {
+                "name": "Profiled",
+                "strategy": "StrategyTestWorks",
+                "profile": True,
+            },
+        )
+        assert task.profile_dir == Path(tmpdir) / "profiles"
+        task.process()
+        assert len(find_profiles(task.profile_dir, "Profiled")) == 1
+        assert Task(1, task.strategy, Task.RUN_ASAP).profile_dir is None
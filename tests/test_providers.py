@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from eth_account import Account
+
+from pab.bench import BenchProject
+from pab.blockchain import Blockchain
+from pab.config import load_configs
+from pab.providers import Cassette, CassetteError, RecordingProvider, ReplayProvider
+
+
+def _blockchain(project: BenchProject, **config) -> Blockchain:
+    data = {"endpoint": project.node.url, "chainId": BenchProject.CHAIN_ID, **config}
+    project.write_json("config.json", data)
+    return Blockchain(project.root, load_configs(project.root), {})
+
+
+@pytest.mark.parametrize("name", ["cassette.jsonl", "cassette.jsonl.gz"])
+def test_record_and_replay(name):
+    account = Account.create()
+    with BenchProject() as project:
+        live = _blockchain(project, rpc={"record": name})
+        assert isinstance(live.w3.provider, RecordingProvider)
+        recorded = [live.w3.eth.block_number]
+        func = live.contracts.get("Poke").functions.poke
+        rcpt = live.transact(account, func, (1,))
+        recorded.append(live.w3.eth.block_number)
+        live.w3.provider.close()
+        requests = project.node.requests
+
+        replay = _blockchain(project, rpc={"replay": name})
+        assert isinstance(replay.w3.provider, ReplayProvider)
+        assert replay.w3.eth.block_number == recorded[0]
+        assert replay.transact(account, func, (1,)) == rcpt
+        assert replay.w3.eth.block_number == recorded[1]
+        assert len(replay.w3.provider.cassette) == requests
+        assert project.node.requests == requests
+        with pytest.raises(CassetteError, match="eth_getBalance"):
+            replay.w3.eth.get_balance(account.address)
+
+
+def test_cassette_repeats_last_response(tmp_path):
+    path = tmp_path / "cassette.jsonl"
+    lines = [
+        {"method": "eth_blockNumber", "params": [], "result": "0x1"},
+        {"method": "eth_blockNumber", "params": [], "result": "0x2"},
+        {
+            "method": "eth_call",
+            "params": [{"to": "0x1"}, "latest"],
+            "error": {"code": 3},
+        },
+    ]
+    path.write_text("\n".join(json.dumps(line) for line in lines))
+    cassette = Cassette.load(path)
+    results = [cassette.lookup("eth_blockNumber", [])["result"] for _ in range(3)]
+    assert results == ["0x1", "0x2", "0x2"]
+    assert cassette.lookup("eth_call", [{"to": "0x1"}, "latest"]) == {
+        "error": {"code": 3}
+    }
+    cassette.rewind()
+    assert cassette.lookup("eth_blockNumber", [])["result"] == "0x1"
+    with pytest.raises(CassetteError, match="Can't load"):
+        Cassette.load(tmp_path / "missing.jsonl")
@@ -0,0 +1,88 @@
+import json
+import shutil
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pab.clock import VirtualClock
+from pab.core import PAB, TasksRunner
+from pab.profiling import PROFILES_DIR
+from pab.simulation import Simulation
+from pab.tracing import TRACER
+
+TASKS = [
+    {
+        "name": "hourly",
+        "strategy": "CustomStrategy",
+        "params": {"test_var": "a"},
+        "repeat_every": {"hours": 1},
+        "profile": True,
+    },
+    {
+        "name": "half hour",
+        "strategy": "CustomStrategy",
+        "params": {"test_var": "a"},
+        "cron": "*/30 * * * *",
+    },
+    {
+        "name": "after hourly",
+        "strategy": "CustomStrategy",
+        "params": {"test_var": "a"},
+        "after": ["hourly"],
+    },
+    {"name": "once", "strategy": "CustomStrategy", "params": {"test_var": "a"}},
+]
+
+
+@pytest.fixture
+def runner(blockchain):
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir) / "project"
+        shutil.copytree(blockchain.root, root)
+        (root / "tasks.json").write_text(json.dumps(TASKS))
+        yield TasksRunner(PAB(root), stream=True, clock=VirtualClock(1_700_000_000))
+
+
+def test_simulate_a_day(runner):
+    report = Simulation(runner, tick=60).run(86400)
+    # Runs start on the first tick after the interval, so hourly tasks drift a tick per run
+    assert report.runs["hourly"] == report.runs["after hourly"] == 24
+    assert report.runs["half hour"] == 48
+    assert report.runs["once"] == 1
+    assert report.peak == 3 and report.peak_at == 1_700_000_000
+    assert report.collisions > 0
+    assert report.iterations < 100
+    assert report.to_dict()["never_run"] == []
+
+
+def test_simulate_reschedules(runner):
+    report = Simulation(runner, tick=60, reschedule_rate=0.5, seed=1).run(86400)
+    assert 0 < report.rescheduled < report.total_runs
+
+
+def test_simulation_requires_virtual_clock(blockchain):
+    with pytest.raises(ValueError, match="VirtualClock"):
+        Simulation(TasksRunner(PAB(blockchain.root)))
+
+
+def test_simulation_does_not_create_strategies(runner):
+    strategy = MagicMock(side_effect=AssertionError("strategy created"))
+    runner.pab.strategies["CustomStrategy"] = strategy
+    runner._parser.strategies = runner.pab.strategies
+    exporter = MagicMock()
+    with patch.object(TRACER, "exporter", exporter):
+        report = Simulation(runner, tick=60).run(3600)
+        assert TRACER.exporter is exporter
+    assert report.runs["once"] == 1
+    strategy.assert_not_called()
+    exporter.export.assert_not_called()
+    assert all(task.profile_dir is None for task in runner.tasks)
+    assert not (runner.pab.root / PROFILES_DIR).exists()
+
+
+def test_simulation_requires_streamed_runner(blockchain):
+    with pytest.raises(ValueError, match="stream=True"):
+        Simulation(TasksRunner(PAB(blockchain.root), clock=VirtualClock(0)))
@@ -0,0 +1,163 @@
+import json
+import os
+
+import pytest
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from pab.cli import main
+from pab.config import STRATEGY_INDEX_FILE
+from pab.init import chdir
+from pab.strategy_index import StrategyIndex, StrategyParamsError
+from pab.task import TasksFileParseError, compile_tasks_file
+
+STRATEGIES_INIT = '''
+import not_installed_heavy_module
+from pab.strategy import BaseStrategy
+from strategies.base import Mixin
+
+
+class Compound(BaseStrategy):
+    """Compounds a pool"""
+
+    def __init__(self, blockchain, name, pool_id: int, slippage: float = 0.5, *, label="x"):
+        super().__init__(blockchain, name)
+
+    def run(self):
+        pass
+
+
+class Inherited(Mixin, BaseStrategy):
+    def run(self):
+        pass
+
+
+class NotAStrategy:
+    pass
+'''
+
+STRATEGIES_BASE = """
+class Mixin:
+    def __init__(self, blockchain, name, account: int):
+        pass
+"""
+
+
+@pytest.fixture
+def project():
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "strategies").mkdir()
+        (root / "strategies" / "__init__.py").write_text(STRATEGIES_INIT)
+        (root / "strategies" / "base.py").write_text(STRATEGIES_BASE)
+        yield root
+
+
+def test_index_parses_strategies_without_importing(project):
+    index = StrategyIndex.load(project)
+    assert index.json() == {
+        "Compound": {
+            "params": ["pool_id: int", "slippage: float = 0.5", "label='x'"],
+            "doc": "Compounds a pool",
+        },
+        "Inherited": {"params": ["account: int"], "doc": None},
+    }
+    compound = index.get("Compound")
+    assert compound.file == "strategies/__init__.py"
+    compound.check_params({"pool_id": 1})
+    with pytest.raises(
+        StrategyParamsError, match="missing required parameters: pool_id"
+    ):
+        compound.check_params({"slippage": 1})
+    with pytest.raises(StrategyParamsError, match="unexpected parameters: pool"):
+        compound.check_params({"pool": 1})
+    params = compound.parser().parse_args(
+        ["--pool_id", "3", "--slippage", "1", "--label", "y"]
+    )
+    assert vars(params) == {"pool_id": 3, "slippage": 1.0, "label": "y"}
+    assert not compound.typed and index.get("Inherited").typed
+
+
+def test_index_is_cached_by_mtime_and_hash(project):
+    StrategyIndex.load(project)
+    assert (project / STRATEGY_INDEX_FILE).is_file()
+    with patch("pab.strategy_index._parse_classes") as parse:
+        StrategyIndex.load(project)
+        init = project / "strategies" / "__init__.py"
+        os.utime(init, ns=(0, 0))
+        assert "Compound" in StrategyIndex.load(project).strategies
+        parse.assert_not_called()
+        init.write_text("")
+        parse.return_value = []
+        assert "Compound" not in StrategyIndex.load(project).strategies
+        parse.assert_called_once()
+    data = json.loads((project / STRATEGY_INDEX_FILE).read_text())
+    assert data["files"]["strategies/__init__.py"]["classes"] == []
+
+
+def test_compile_checks_strategy_params(project):
+    tasks = [{"name": "A", "strategy": "Compound", "params": {"pool_id": 1}}]
+    (project / "tasks.json").write_text(json.dumps(tasks))
+    assert compile_tasks_file(project) == 1
+    tasks.append({"name": "B", "strategy": "Compound", "params": {"pool": 1}})
+    (project / "tasks.json").write_text(json.dumps(tasks))
+    with pytest.raises(TasksFileParseError, match="Error loading task 'B'"):
+        compile_tasks_file(project)
+
+
+def test_list_strategies_from_index(project, capsys):
+    with chdir(project):
+        main(["list-strategies", "--json"])
+    assert list(json.loads(capsys.readouterr().out)) == ["Compound", "Inherited"]
+
+
+STRATEGIES_BASES = """
+from pab.strategy import BaseStrategy
+from external import Fees
+
+
+class Account:
+    def __init__(self, blockchain, name, account: int):
+        pass
+
+
+class Slippage:
+    def __init__(self, blockchain, name, slippage: float = 0.5):
+        pass
+
+
+class Swap(Account, Slippage, BaseStrategy):
+    def run(self):
+        pass
+
+
+class Pay(Fees, BaseStrategy):
+    def run(self):
+        pass
+"""
+
+
+class Fees:
+    def __init__(self, blockchain, name, fee: int):
+        pass
+
+
+def test_index_params_match_imported_strategies():
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "strategies.py").write_text(STRATEGIES_BASES)
+        index = StrategyIndex.load(root)
+    strategies = {"Fees": Fees}
+    exec(STRATEGIES_BASES.replace("from external import Fees", ""), strategies)
+    # Like `pab run strat`, parameters of all base classes are included
+    swap = index.get("Swap")
+    assert [str(param) for param in swap.params] == [
+        "account: int",
+        "slippage: float = 0.5",
+    ]
+    assert swap.matches(strategies["Swap"])
+    # Fees is imported from another module, which the index doesn't parse
+    assert index.get("Pay").params == ()
+    assert not index.get("Pay").matches(strategies["Pay"])
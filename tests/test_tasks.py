@@ -1,4 +1,24 @@
-from pab.task import Task, TaskFileParser
+import io
+import json
+import shutil
+import threading
+
+from datetime import datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from pab.cron import compile_cron
+from pab.task import (
+    Task,
+    TaskFileParser,
+    TaskLoadError,
+    TaskTable,
+    TasksFileParseError,
+    compile_tasks_file,
+    iter_json_list,
+)
 from pab.strategy import load_strategies
 
 
@@ -14,3 +34,126 @@ def test_task_file_parser_loads(blockchain):
     assert isinstance(tasks, list)
     assert len(tasks) > 0
     assert all(isinstance(item, Task) for item in tasks)
+
+
+def test_task_file_parser_cron(blockchain):
+    strats = load_strategies(blockchain.root)
+    parser = TaskFileParser(blockchain.root, blockchain, strats)
+    data = [{"name": "Cron", "strategy": "CustomStrategy", "cron": "5 0 * * *"}]
+    data[0]["params"] = {"test_var": "Hi"}
+    parser._validate_raw_data(data)
+    tasks = parser._create_tasklist(data)
+    assert tasks[0].repeats()
+    assert tasks[0].next_at == tasks[0].cron.next_after(datetime.now().timestamp())
+    assert not tasks[0].is_ready()
+
+
+def test_task_file_parser_impossible_cron_fails(blockchain):
+    strats = load_strategies(blockchain.root)
+    parser = TaskFileParser(blockchain.root, blockchain, strats)
+    data = {"name": "Never", "strategy": "CustomStrategy", "cron": "0 0 31 2 *"}
+    data["params"] = {"test_var": "Hi"}
+    with pytest.raises(TaskLoadError, match="Error loading task 'Never'"):
+        parser.create_task(0, data)
+
+
+def test_task_file_parser_cron_and_repeat_fails(blockchain):
+    strats = load_strategies(blockchain.root)
+    parser = TaskFileParser(blockchain.root, blockchain, strats)
+    data = [{"name": "X", "strategy": "CustomStrategy", "cron": "* * * * *"}]
+    data[0]["repeat_every"] = {"days": 1}
+    with pytest.raises(TasksFileParseError):
+        parser._validate_raw_data(data)
+
+
+def test_task_table_views():
+    tasks = [Task(ix, None, Task.RUN_NEVER) for ix in range(100)]
+    table = TaskTable(tasks)
+    assert len(table) == 100
+    tasks[42].next_at = 123
+    assert table.next_at[42] == 123
+    table.last_start[7] = 456
+    assert tasks[7].last_start == 456
+
+
+def test_task_table_ready_and_reschedule():
+    now = int(datetime.now().timestamp())
+    tasks = [
+        Task(0, None, Task.RUN_ASAP, repeat_every={"hours": 1}),
+        Task(1, None, now - 10),
+        Task(2, None, now + 3600),
+        Task(3, None, Task.RUN_NEVER),
+        Task(4, None, now - 10, cron=compile_cron("0 0 * * *")),
+    ]
+    table = TaskTable(tasks)
+    ready = table.ready(now)
+    assert list(ready) == [0, 1, 4]
+    table.last_start[ready] = now
+    table.reschedule(ready, now)
+    assert tasks[0].next_at == now + 3600
+    assert tasks[1].next_at == Task.RUN_NEVER
+    assert tasks[4].next_at == tasks[4].cron.next_after(now)
+    assert not table.ready(now).size
+
+
+def test_task_table_ready_by_priority():
+    now = int(datetime.now().timestamp())
+    tasks = [
+        Task(0, None, now - 10),
+        Task(1, None, now - 10, priority=5),
+        Task(2, None, now - 20),
+        Task(3, None, Task.RUN_ASAP, priority=-1),
+    ]
+    table = TaskTable(tasks)
+    assert list(table.ready(now)) == [1, 2, 0, 3]
+
+
+def test_task_table_keeps_writes_from_other_threads():
+    task = Task(0, None, Task.RUN_NEVER)
+    table = TaskTable([task])
+    done = threading.Event()
+
+    def _write():
+        value = 0
+        while not done.is_set():
+            value += 1
+            task.last_start = value
+        task.last_start = -1
+
+    writer = threading.Thread(target=_write)
+    writer.start()
+    for ix in range(1, 5000):
+        table.add(Task(ix, None, Task.RUN_NEVER))
+        if ix % 1000 == 0:
+            # Moved to a new table, as when tasks are reloaded
+            table = TaskTable(table.tasks)
+    done.set()
+    writer.join()
+    assert task.last_start == table.last_start[0] == -1
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 2**16])
+def test_iter_json_list(chunk_size):
+    data = [
+        {"name": f"Task {i}", "params": {"x": i * 1.5, "y": "a]b,"}} for i in range(50)
+    ]
+    fhandle = io.StringIO(json.dumps(data, indent=4))
+    assert list(iter_json_list(fhandle, chunk_size)) == data
+
+
+@pytest.mark.parametrize("content", ["[1, 2", "[1 2]", "[1,]"])
+def test_iter_json_list_invalid(content):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_list(io.StringIO(content), 2))
+
+
+def test_compile_tasks_file(blockchain):
+    strats = load_strategies(blockchain.root)
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        shutil.copy(blockchain.root / "tasks.json", root)
+        assert compile_tasks_file(root) == 1
+        parser = TaskFileParser(root, blockchain, strats)
+        assert parser.tasks_file() == root / "tasks.ndjson"
+        tasks = parser.load()
+        assert tasks[0].strategy.test_var == "Hi :)"
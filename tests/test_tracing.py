@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+
+from pab.task import Task
+from pab.tracing import TRACER, JSONLExporter, Tracer, summarize_traces
+from pab.transaction import TransactionHandler
+
+from tests.test_core import StrategyTestWorks
+
+
+def test_spans_nest_and_record_errors():
+    exported = []
+    tracer = Tracer(MagicMock(export=exported.append))
+    with tracer.span("root", task="a") as root:
+        with tracer.span("child"):
+            pass
+        with pytest.raises(ValueError):
+            with tracer.span("failing"):
+                raise ValueError("boom")
+    child, failing, _ = exported
+    assert child.parent_id == failing.parent_id == root.span_id
+    assert child.trace_id == root.trace_id and root.parent_id is None
+    assert failing.error == "ValueError: boom"
+    assert tracer.current_span() is None
+    with Tracer().span("disabled") as span:
+        assert span is None
+
+
+def test_transaction_and_task_spans(blockchain):
+    with TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "traces.jsonl"
+        exporter = JSONLExporter(path)
+        strategy = StrategyTestWorks(blockchain, "Compound")
+        handler = TransactionHandler(MagicMock(), 1, blockchain.config)
+        handler.w3.eth.wait_for_transaction_receipt.return_value = {
+            "blockHash": b"\x01",
+            "gasUsed": 21000,
+            "status": 1,
+        }
+        account = MagicMock(address="0x1")
+        strategy.run = lambda: handler.transact(account, MagicMock(), ())
+        with patch.object(TRACER, "exporter", exporter):
+            Task(0, strategy, Task.RUN_ASAP).process()
+        exporter.close()
+        spans = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [s["name"] for s in spans] == [
+            "build_signed_txn",
+            "send_raw_transaction",
+            "wait_for_transaction_receipt",
+            "transact",
+            "task.process",
+        ]
+        assert len({s["traceId"] for s in spans}) == 1
+        assert spans[3]["attributes"]["gasUsed"] == 21000
+        summary = summarize_traces(path)
+    assert summary["Compound"]["runs"] == 1
+    assert list(summary["Compound"]["spans"])[0] == "transact"
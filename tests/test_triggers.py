@@ -0,0 +1,149 @@
+import pytest
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from pab.core import PAB, TasksRunner
+from pab.task import Task, TaskList, TaskLoadError
+from pab.triggers import (
+    BlocksTrigger,
+    ChainWatcher,
+    ConditionTrigger,
+    EventTrigger,
+    TriggerError,
+    create_trigger,
+)
+
+from tests.test_core import StrategyTestWorks
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+
+def test_create_triggers(blockchain):
+    blocks = create_trigger({"type": "blocks", "every": 5}, blockchain)
+    assert blocks == BlocksTrigger(5)
+    event = create_trigger(
+        {"type": "event", "contract": "WBTC", "event": "Transfer"}, blockchain
+    )
+    assert event.topic == TRANSFER_TOPIC
+    assert event.address == "0x1BFD67037B42Cf73acF2047067bd4F2C47D9BfD6"
+    cond = create_trigger(
+        {
+            "type": "condition",
+            "contract": "WBTC",
+            "function": "balanceOf",
+            "args": ["0x1BFD67037B42Cf73acF2047067bd4F2C47D9BfD6"],
+            "op": ">",
+            "value": 10,
+        },
+        blockchain,
+    )
+    assert isinstance(cond, ConditionTrigger)
+    assert cond.condition.check(11) and not cond.condition.check(10)
+    with pytest.raises(TriggerError, match="not found"):
+        create_trigger({"type": "event", "contract": "WBTC", "event": "X"}, blockchain)
+    with pytest.raises(TriggerError, match="Unknown trigger"):
+        create_trigger({"type": "mempool"}, blockchain)
+    with pytest.raises(TriggerError, match="Function 'balance' not found in 'WBTC'"):
+        create_trigger(
+            {
+                "type": "condition",
+                "contract": "WBTC",
+                "function": "balance",
+                "op": ">",
+                "value": 10,
+            },
+            blockchain,
+        )
+
+
+def test_watcher_fires_triggers():
+    eth = MagicMock()
+    address = "0x1BFD67037B42Cf73acF2047067bd4F2C47D9BfD6"
+    eth.get_logs.return_value = [{"address": address, "topics": [TRANSFER_TOPIC]}]
+    watcher = ChainWatcher(SimpleNamespace(w3=SimpleNamespace(eth=eth)), None, 1)
+    cond = MagicMock()
+    watcher.set_triggers(
+        {
+            "blocks": BlocksTrigger(3),
+            "event": EventTrigger("WBTC", "Transfer", address, TRANSFER_TOPIC),
+            "cond": ConditionTrigger(cond),
+        }
+    )
+    eth.block_number = 100
+    assert watcher.poll() == []
+    with patch("pab.triggers.evaluate_conditions", return_value=[True]):
+        eth.block_number = 102
+        assert watcher.poll() == ["event", "cond"]
+        eth.block_number = 103
+        assert watcher.poll() == ["blocks", "event"]
+    eth.get_logs.assert_called_with(
+        {
+            "fromBlock": 103,
+            "toBlock": 103,
+            "address": [address],
+            "topics": [[TRANSFER_TOPIC]],
+        }
+    )
+    assert eth.get_logs.call_count == 2
+
+
+def test_watcher_keeps_state_when_poll_fails():
+    eth = MagicMock()
+    address = "0x1BFD67037B42Cf73acF2047067bd4F2C47D9BfD6"
+    watcher = ChainWatcher(SimpleNamespace(w3=SimpleNamespace(eth=eth)), None, 1)
+    watcher.set_triggers(
+        {
+            "blocks": BlocksTrigger(2),
+            "event": EventTrigger("WBTC", "Transfer", address, TRANSFER_TOPIC),
+        }
+    )
+    eth.block_number = 100
+    watcher.poll()
+    eth.block_number = 102
+    eth.get_logs.side_effect = ValueError("rpc error")
+    with pytest.raises(ValueError):
+        watcher.poll()
+    assert watcher.last_block == 100
+    eth.get_logs.side_effect = None
+    eth.get_logs.return_value = []
+    assert watcher.poll() == ["blocks"]
+
+
+def test_triggered_tasks_wait_for_trigger(blockchain):
+    pab = PAB(blockchain.root)
+    runner = TasksRunner(pab)
+    task = runner._parser.create_task(
+        0,
+        {
+            "name": "On transfer",
+            "strategy": "StrategyTestWorks",
+            "trigger": {"type": "event", "contract": "WBTC", "event": "Transfer"},
+        },
+    )
+    assert task.next_at == Task.RUN_NEVER
+    runner.tasks = TaskList([task])
+    runner._fire(["On transfer"])
+    assert task.next_at == Task.RUN_ASAP
+    assert isinstance(task.strategy, StrategyTestWorks)
+    with pytest.raises(TaskLoadError):
+        runner._parser.create_task(
+            1,
+            {
+                "name": "Bad",
+                "strategy": "StrategyTestWorks",
+                "trigger": {"type": "blocks", "every": 0},
+            },
+        )
+
+
+def test_triggered_tasks_added_at_runtime_are_watched(blockchain):
+    runner = TasksRunner(PAB(blockchain.root))
+    runner.watcher = MagicMock()
+    trigger = {"type": "blocks", "every": 5}
+    runner.add_task(
+        {"name": "Added", "strategy": "StrategyTestWorks", "trigger": trigger}
+    )
+    runner._run_commands()
+    runner.watcher.set_triggers.assert_called_once_with({"Added": BlocksTrigger(5)})
+    runner.watcher.start.assert_called_once()
@@ -0,0 +1,84 @@
+import sys
+import json
+import shutil
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pab.core import PAB, TasksRunner
+from pab.jobs import JobQueue
+from pab.task import task_shard
+from pab.workers import WorkerSupervisor
+
+
+def exit_with_error(root, keyfiles, envs, shard, log_queue, stats_queue):
+    stats_queue.put((shard[0], {"iterations": 1, "processed": 2, "tasks": 3}))
+    sys.exit(1)
+
+
+def test_task_shard_is_stable():
+    assert task_shard({"name": "A"}, 4) == task_shard({"name": "A"}, 4)
+    assert task_shard({"name": "A", "shard_key": "acc0"}, 4) == task_shard(
+        {"name": "B", "shard_key": "acc0"}, 4
+    )
+    assert {task_shard({"name": str(ix)}, 4) for ix in range(100)} == {0, 1, 2, 3}
+
+
+def test_tasks_runner_loads_only_its_shard(blockchain):
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir) / "project"
+        shutil.copytree(blockchain.root, root)
+        data = [
+            {
+                "name": f"Task {ix}",
+                "strategy": "CustomStrategy",
+                "params": {"test_var": "a"},
+            }
+            for ix in range(20)
+        ]
+        (root / "tasks.json").write_text(json.dumps(data))
+        pab = PAB(root)
+        names = [
+            {task.strategy.name for task in TasksRunner(pab, shard=(ix, 3)).tasks}
+            for ix in range(3)
+        ]
+    assert sum(len(shard) for shard in names) == 20
+    assert set.union(*names) == {f"Task {ix}" for ix in range(20)}
+
+
+def test_supervisor_restarts_workers(blockchain):
+    supervisor = WorkerSupervisor(blockchain.root, 2, target=exit_with_error)
+    supervisor.RESTART_DELAY = 0
+    for index in range(2):
+        supervisor.start_worker(index).join()
+    supervisor.check_workers()
+    assert supervisor.restarts == {0: 1, 1: 1}
+    supervisor.terminate()
+    supervisor.collect_stats()
+    stats = supervisor.stats()
+    assert stats["restarts"] == 2
+    assert stats["processed"] == 4
+    assert "pab_supervisor_processed 4" in supervisor.registry.render()
+
+
+def claim_jobs_and_exit(root, keyfiles, envs, shard, log_queue, stats_queue):
+    JobQueue(root / "jobs.sqlite3").claim()
+    sys.exit(1)
+
+
+def test_supervisor_fails_jobs_of_exited_workers():
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        supervisor = WorkerSupervisor(root, 1, target=claim_jobs_and_exit)
+        supervisor.jobs = JobQueue(root / "jobs.sqlite3")
+        job_id = supervisor.jobs.submit("StrategyTestWorks")
+        supervisor.start_worker(0).join()
+        assert supervisor.jobs.get(job_id).status == JobQueue.RUNNING
+        # Jobs of other consumers are left running
+        other = supervisor.jobs.submit("StrategyTestWorks")
+        supervisor.jobs.claim()
+        supervisor.check_workers()
+        supervisor.terminate()
+        assert supervisor.jobs.get(job_id).status == JobQueue.FAILED
+        assert supervisor.jobs.get(job_id).error == "Interrupted"
+        assert supervisor.jobs.get(other).status == JobQueue.RUNNING